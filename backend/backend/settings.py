@@ -183,6 +183,14 @@ else:
     MEDIA_ROOT = BASE_DIR / 'media'
     print(f"Using local media files at {MEDIA_ROOT}")  # Debug log
 
+# Obrada slika pri upload-u (shop/image_processing.py)
+IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', '2560'))  # duža strana u pikselima
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+IMAGE_RECOMPRESS_MIN_BYTES = 300 * 1024  # manje slike bez metapodataka se ne re-enkoduju
+# Bulk upload slika - broj paralelnih upload-a i maksimalan broj fajlova po zahtevu
+IMAGE_UPLOAD_WORKERS = int(os.environ.get('IMAGE_UPLOAD_WORKERS', '6'))
+IMAGE_BULK_UPLOAD_MAX_FILES = int(os.environ.get('IMAGE_BULK_UPLOAD_MAX_FILES', '50'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -280,12 +288,33 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Bravarska Radnja <noreply@gvozdjara.rs>')
 
+# Email delivery sloj (shop/email_utils.py): 'resend' ili 'smtp'
+EMAIL_TRANSPORT = os.environ.get('EMAIL_TRANSPORT', 'resend')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '10'))  # sekunde po pozivu (koristi ga i SMTP backend)
+EMAIL_MAX_RETRIES = int(os.environ.get('EMAIL_MAX_RETRIES', '3'))
+EMAIL_RETRY_BACKOFF = float(os.environ.get('EMAIL_RETRY_BACKOFF', '1.0'))  # 1s, 2s, 4s...
+# Slanje iz view-a (posle commit-a, pre odgovora): manje pokušaja, da ostane ispod gunicorn timeout-a (30s)
+EMAIL_REQUEST_MAX_RETRIES = int(os.environ.get('EMAIL_REQUEST_MAX_RETRIES', '1'))
+
 # Owner email addresses for order notifications
 OWNER_EMAILS = os.environ.get('OWNER_EMAILS', 'office@betapack.co.rs').split(',')
 
 # Contact form email recipient
 CONTACT_EMAIL_RECIPIENT = os.environ.get('CONTACT_EMAIL_RECIPIENT', 'office@betapack.co.rs')
 
+# ============================================
+# ADMIN EVENT STREAM (SSE)
+# ============================================
+
+# Prag zaliha varijante ispod kog se šalje 'low_stock' događaj
+LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', '5'))
+# Koliko često SSE konekcija proverava nove događaje (sekunde)
+ADMIN_EVENTS_POLL_SECONDS = int(os.environ.get('ADMIN_EVENTS_POLL_SECONDS', '5'))
+# Koliko dana se čuvaju admin događaji
+ADMIN_EVENTS_RETENTION_DAYS = int(os.environ.get('ADMIN_EVENTS_RETENTION_DAYS', '7'))
+# Najmanji razmak između dva brisanja starih događaja u jednom procesu (sekunde)
+ADMIN_EVENTS_PRUNE_INTERVAL_SECONDS = int(os.environ.get('ADMIN_EVENTS_PRUNE_INTERVAL_SECONDS', '3600'))
+
 # ============================================
 # CACHING CONFIGURATION (TTFB Optimization)
 # ============================================
@@ -336,6 +365,70 @@ CACHE_TTL = {
     'product_detail': 60 * 5, # 5 minuta - detalji proizvoda
 }
 
+# ============================================
+# SITEMAP (unapred generisan, gzip)
+# ============================================
+SITEMAP_ROOT = Path(os.environ.get('SITEMAP_ROOT', BASE_DIR / 'sitemaps'))
+# Domen frontenda koji ide u <loc> adrese stranica
+SITEMAP_DOMAIN = os.environ.get('SITEMAP_DOMAIN', 'www.betapack.co.rs')
+# Adresa na kojoj backend servira delove sitemap-a (za sitemap index)
+SITEMAP_INDEX_BASE_URL = os.environ.get('SITEMAP_INDEX_BASE_URL', 'https://betapack-production.up.railway.app')
+SITEMAP_MAX_URLS = int(os.environ.get('SITEMAP_MAX_URLS', '5000'))  # adresa po fajlu pre podele
+SITEMAP_REBUILD_DELAY = int(os.environ.get('SITEMAP_REBUILD_DELAY', '30'))  # debounce u sekundama
+
+# ============================================
+# PRODUCT FEED (agregatori cena / shopping platforme)
+# ============================================
+PRODUCT_FEED_ROOT = Path(os.environ.get('PRODUCT_FEED_ROOT', BASE_DIR / 'feeds'))
+PRODUCT_FEED_SITE_URL = os.environ.get('PRODUCT_FEED_SITE_URL', 'https://www.betapack.co.rs')
+# Prefiks za relativne /media/ URL-ove slika (lokalni storage)
+PRODUCT_FEED_MEDIA_BASE_URL = os.environ.get('PRODUCT_FEED_MEDIA_BASE_URL', SITEMAP_INDEX_BASE_URL)
+PRODUCT_FEED_CURRENCY = os.environ.get('PRODUCT_FEED_CURRENCY', 'RSD')
+PRODUCT_FEED_CHUNK_SIZE = int(os.environ.get('PRODUCT_FEED_CHUNK_SIZE', '200'))  # proizvoda po upitu
+
+# ============================================
+# SCRAPING KONKURENCIJE
+# ============================================
+# Broj sajtova koji se scrape-uju istovremeno (crawl delay važi po hostu)
+SCRAPE_MAX_CONCURRENT_SITES = int(os.environ.get('SCRAPE_MAX_CONCURRENT_SITES', '5'))
+# Broj redova po INSERT-u pri upisu scrape-ovanih proizvoda i istorije cena
+SCRAPE_BULK_BATCH_SIZE = int(os.environ.get('SCRAPE_BULK_BATCH_SIZE', '500'))
+# Koliko dugo važi keširan robots.txt konkurenta (sekunde)
+SCRAPE_ROBOTS_TTL_SECONDS = int(os.environ.get('SCRAPE_ROBOTS_TTL_SECONDS', str(24 * 3600)))
+# Ponovni pokušaji stranice (greška konekcije, 429, 5xx) sa eksponencijalnim
+# backoff-om; Retry-After se poštuje
+SCRAPE_MAX_RETRIES = int(os.environ.get('SCRAPE_MAX_RETRIES', '3'))
+SCRAPE_BACKOFF_BASE_SECONDS = float(os.environ.get('SCRAPE_BACKOFF_BASE_SECONDS', '2'))
+SCRAPE_BACKOFF_MAX_SECONDS = float(os.environ.get('SCRAPE_BACKOFF_MAX_SECONDS', '60'))
+# Circuit breaker: prekini scrape sajta kada je više od ERROR_RATE poslednjih
+# WINDOW zahteva neuspešno (posle bar MIN_REQUESTS zahteva)
+SCRAPE_BREAKER_ERROR_RATE = float(os.environ.get('SCRAPE_BREAKER_ERROR_RATE', '0.5'))
+SCRAPE_BREAKER_WINDOW = int(os.environ.get('SCRAPE_BREAKER_WINDOW', '20'))
+SCRAPE_BREAKER_MIN_REQUESTS = int(os.environ.get('SCRAPE_BREAKER_MIN_REQUESTS', '6'))
+# Povezivanje proizvoda konkurencije sa našim varijantama: ispod ove
+# pouzdanosti (0-1) automatsko poklapanje se ne koristi
+PRODUCT_MATCH_MIN_CONFIDENCE = float(os.environ.get('PRODUCT_MATCH_MIN_CONFIDENCE', '0.5'))
+# Red scrape poslova (run_scrape_worker): koliko često worker proverava red,
+# koliko često upisuje napredak (i proverava otkazivanje) i posle koliko
+# sekundi tišine se posao smatra propalim
+SCRAPE_WORKER_POLL_SECONDS = float(os.environ.get('SCRAPE_WORKER_POLL_SECONDS', '5'))
+SCRAPE_JOB_HEARTBEAT_SECONDS = float(os.environ.get('SCRAPE_JOB_HEARTBEAT_SECONDS', '5'))
+SCRAPE_JOB_STALE_SECONDS = int(os.environ.get('SCRAPE_JOB_STALE_SECONDS', '300'))
+# Padovi cena (/api/scraped-products/price_drops/): podrazumevani vremenski
+# prozor u danima i najveći broj rezultata po zahtevu
+PRICE_DROP_DEFAULT_DAYS = int(os.environ.get('PRICE_DROP_DEFAULT_DAYS', '7'))
+PRICE_DROP_MAX_RESULTS = int(os.environ.get('PRICE_DROP_MAX_RESULTS', '500'))
+# Istorija cena (rollup_price_history): sirovi redovi se čuvaju N dana, starije
+# se sažima u dnevne ili nedeljne min/max/poslednja cena redove
+PRICE_HISTORY_RAW_DAYS = int(os.environ.get('PRICE_HISTORY_RAW_DAYS', '90'))
+PRICE_HISTORY_ROLLUP_PERIOD = os.environ.get('PRICE_HISTORY_ROLLUP_PERIOD', 'day')  # 'day' ili 'week'
+# PostgreSQL: koliko mesečnih particija unapred (ako je tabela particionisana)
+PRICE_HISTORY_PARTITIONS_AHEAD = int(os.environ.get('PRICE_HISTORY_PARTITIONS_AHEAD', '3'))
+# Grafikon istorije cena (/api/scraped-products/series/): najviše proizvoda
+# po zahtevu i najviše tačaka po seriji
+PRICE_SERIES_MAX_PRODUCTS = int(os.environ.get('PRICE_SERIES_MAX_PRODUCTS', '20'))
+PRICE_SERIES_MAX_POINTS = int(os.environ.get('PRICE_SERIES_MAX_POINTS', '2000'))
+
 # Database connection pooling za PostgreSQL (production)
 if not DEBUG and os.environ.get('DATABASE_URL'):
     DATABASES['default']['CONN_MAX_AGE'] = 600  # 10 minuta connection pooling
@@ -20,22 +20,18 @@ from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
 from django.conf.urls.static import static
-from shop.sitemaps import ProductSitemap, CategorySitemap, StaticViewSitemap
-from shop.views_robots import robots_txt, sitemap_view
-
-sitemaps = {
-    'products': ProductSitemap,
-    'categories': CategorySitemap,
-    'static': StaticViewSitemap,
-}
+from shop.views_robots import robots_txt, sitemap_view, sitemap_section_view
+from shop.views_feed import product_feed_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/login/', TokenObtainPairView.as_view(), name='login'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='refresh'),
     path('api/', include('shop.urls')),
-    path('sitemap.xml', sitemap_view, {'sitemaps': sitemaps}, name='sitemap'),
+    path('sitemap.xml', sitemap_view, name='sitemap'),
+    path('sitemap-<slug:section>-<int:page>.xml', sitemap_section_view, name='sitemap-section'),
     path('robots.txt', robots_txt, name='robots_txt'),
+    path('feeds/products.<str:fmt>', product_feed_view, name='product-feed'),
 ]
 
 # Serve media files in development
@@ -1,9 +1,11 @@
 from django.contrib import admin
 from .models import (
     Category, Subcategory, Product, ProductVariant,
-    ProductImage, Order, OrderItem, ContactMessage,
-    CompetitorSite, ScrapedProduct, PriceHistory, ScrapeLog
+    ProductImage, ImageAsset, Order, OrderItem, ContactMessage, AdminEvent, EmailDeliveryLog,
+    CompetitorSite, ScrapedProduct, PriceHistory, PriceHistoryRollup, PageFetchCache, ScrapeLog, ScrapeJob, ProductMatch,
+    VariantPriceComparison
 )
+from . import price_comparison
 
 
 class ProductVariantInline(admin.TabularInline):
@@ -53,6 +55,13 @@ class ProductImageAdmin(admin.ModelAdmin):
     search_fields = ['product__name', 'alt_text']
 
 
+@admin.register(ImageAsset)
+class ImageAssetAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'content_hash', 'width', 'height', 'format', 'created_at']
+    search_fields = ['file_name', 'content_hash']
+    readonly_fields = ['content_hash', 'created_at']
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -111,6 +120,21 @@ class ContactMessageAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(AdminEvent)
+class AdminEventAdmin(admin.ModelAdmin):
+    list_display = ['id', 'topic', 'event_type', 'created_at']
+    list_filter = ['topic', 'event_type']
+    readonly_fields = ['topic', 'event_type', 'payload', 'created_at']
+
+
+@admin.register(EmailDeliveryLog)
+class EmailDeliveryLogAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'transport', 'status', 'attempts', 'latency_ms', 'created_at']
+    list_filter = ['status', 'transport']
+    search_fields = ['subject', 'recipients', 'error_message']
+    readonly_fields = [f.name for f in EmailDeliveryLog._meta.fields]
+
+
 # Scraping Admin
 
 @admin.register(CompetitorSite)
@@ -118,7 +142,7 @@ class CompetitorSiteAdmin(admin.ModelAdmin):
     list_display = ['name', 'url', 'is_active', 'last_scraped_at', 'last_scrape_status']
     list_filter = ['is_active', 'last_scrape_status']
     search_fields = ['name', 'url']
-    readonly_fields = ['last_scraped_at', 'last_scrape_status', 'last_error_message', 'created_at', 'updated_at']
+    readonly_fields = ['last_scraped_at', 'last_scrape_status', 'last_error_message', 'robots_txt', 'robots_fetched_at', 'created_at', 'updated_at']
 
 
 @admin.register(ScrapedProduct)
@@ -144,8 +168,68 @@ class PriceHistoryAdmin(admin.ModelAdmin):
     readonly_fields = ['recorded_at']
 
 
+@admin.register(PriceHistoryRollup)
+class PriceHistoryRollupAdmin(admin.ModelAdmin):
+    list_display = ['product', 'period', 'period_start', 'min_price', 'max_price', 'last_price', 'points']
+    list_filter = ['period', 'period_start']
+    search_fields = ['product__name']
+    raw_id_fields = ['product']
+
+
+@admin.register(PageFetchCache)
+class PageFetchCacheAdmin(admin.ModelAdmin):
+    list_display = ['url', 'site', 'etag', 'last_modified', 'checked_at']
+    list_filter = ['site']
+    search_fields = ['url']
+    readonly_fields = ['checked_at']
+
+
 @admin.register(ScrapeLog)
 class ScrapeLogAdmin(admin.ModelAdmin):
-    list_display = ['site', 'status', 'products_found', 'products_new', 'products_updated', 'started_at', 'duration_seconds']
+    list_display = ['site', 'status', 'products_found', 'products_new', 'products_updated', 'products_removed', 'started_at', 'duration_seconds', 'fetch_seconds', 'save_seconds']
+    list_filter = ['status', 'site', 'circuit_breaker_tripped']
+    readonly_fields = ['started_at', 'completed_at', 'duration_seconds', 'changes', 'pages_fetched', 'pages_not_modified', 'pages_disallowed', 'crawl_delay_seconds', 'request_attempts', 'request_retries', 'backoff_seconds', 'circuit_breaker_tripped', 'fetch_seconds', 'wait_seconds', 'save_seconds']
+
+
+@admin.register(ScrapeJob)
+class ScrapeJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'site', 'status', 'current_category', 'pages_fetched', 'pages_expected', 'products_parsed', 'eta_seconds', 'created_at', 'finished_at']
     list_filter = ['status', 'site']
-    readonly_fields = ['started_at', 'completed_at', 'duration_seconds']
+    readonly_fields = [
+        'worker', 'heartbeat_at', 'log', 'created_at', 'started_at', 'finished_at',
+        'pages_fetched', 'pages_expected', 'products_parsed', 'current_category', 'eta_seconds',
+    ]
+
+
+@admin.register(ProductMatch)
+class ProductMatchAdmin(admin.ModelAdmin):
+    list_display = ['scraped_product', 'product', 'variant', 'confidence', 'status', 'matched_at']
+    list_filter = ['status', 'scraped_product__site']
+    search_fields = ['source_name', 'product__name', 'variant__name']
+    raw_id_fields = ['scraped_product', 'product', 'variant']
+    readonly_fields = ['source_name', 'matched_at']
+
+    def save_model(self, request, obj, form, change):
+        # Editing a match in admin is a manual override
+        if form.has_changed() and obj.status == ProductMatch.STATUS_AUTO:
+            obj.status = ProductMatch.STATUS_CONFIRMED if obj.product_id else ProductMatch.STATUS_REJECTED
+            obj.confidence = 1.0 if obj.product_id else 0.0
+        if obj.variant_id:
+            obj.product_id = obj.variant.product_id
+        super().save_model(request, obj, form, change)
+        price_comparison.refresh({form.initial.get('variant'), obj.variant_id} - {None})
+
+
+@admin.register(VariantPriceComparison)
+class VariantPriceComparisonAdmin(admin.ModelAdmin):
+    list_display = ['variant', 'our_price', 'min_price', 'median_price', 'max_price', 'cheapest_site', 'competitor_count', 'price_position', 'price_index', 'updated_at']
+    list_filter = ['price_position', 'cheapest_site']
+    search_fields = ['variant__name', 'variant__product__name']
+    list_select_related = ['variant__product', 'cheapest_site']
+
+    # Computed by shop.price_comparison after every scrape
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
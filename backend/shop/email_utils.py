@@ -1,44 +1,247 @@
+"""
+Sloj za slanje emailova sa zamenjivim transportom.
+
+Transporti:
+- resend: Resend HTTP API preko deljene requests.Session (keep-alive konekcije)
+- smtp: Django SMTP backend
+
+Jedna poruka ide svim primaocima u jednom pozivu, sa timeout-om po pozivu
+i ponovnim pokušajima sa eksponencijalnim backoff-om. Svaka poruka se
+beleži u EmailDeliveryLog (trajanje, broj pokušaja, ishod).
+
+Iz view-ova se šalje sa deliver_email_after_commit(): sinhrono, posle
+commit-a, sa najviše EMAIL_REQUEST_MAX_RETRIES ponovnih pokušaja da bi
+najgori slučaj ostao ispod gunicorn timeout-a.
+"""
+import logging
 import os
-import resend
+import threading
+import time
+from html import escape
+
+import requests
 from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
 
-# Postavi Resend API key
-resend.api_key = os.environ.get('RESEND_API_KEY', '')
+logger = logging.getLogger(__name__)
 
+RESEND_API_URL = 'https://api.resend.com'
 
-def send_email_via_resend(subject, message, recipient_email, from_email=None):
+
+class DeliveryError(Exception):
+    """Trajna greška - ponovni pokušaj nema smisla (npr. 4xx od API-ja)"""
+
+
+class TransientDeliveryError(DeliveryError):
+    """Privremena greška - mreža, timeout, 429 ili 5xx; pokušaj ponovo"""
+
+
+class ResendTransport:
+    """Resend HTTP API. Session se deli između poziva da bi se konekcije ponovo koristile."""
+    name = 'resend'
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    def __init__(self, api_key=None, base_url=None):
+        self.api_key = api_key if api_key is not None else os.environ.get('RESEND_API_KEY', '')
+        self.base_url = (base_url or RESEND_API_URL).rstrip('/')
+
+    @classmethod
+    def get_session(cls):
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=10)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                cls._session = session
+            return cls._session
+
+    def send(self, subject, message, recipients, from_email, timeout):
+        if not self.api_key:
+            raise DeliveryError('RESEND_API_KEY nije postavljen')
+
+        params = {
+            "from": from_email,
+            "to": recipients,
+            "subject": subject,
+            "html": f"<pre>{escape(message)}</pre>",  # Plain text kao preformatirani HTML
+            "text": message,
+        }
+        try:
+            response = self.get_session().post(
+                f"{self.base_url}/emails",
+                json=params,
+                headers={'Authorization': f'Bearer {self.api_key}'},
+                timeout=timeout,
+            )
+        except requests.RequestException as e:
+            raise TransientDeliveryError(str(e)) from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TransientDeliveryError(f'HTTP {response.status_code}: {response.text[:200]}')
+        if response.status_code >= 400:
+            raise DeliveryError(f'HTTP {response.status_code}: {response.text[:200]}')
+
+        try:
+            return response.json().get('id', '')
+        except ValueError:
+            return ''
+
+
+class SMTPTransport:
+    """Django SMTP backend (EMAIL_HOST, EMAIL_PORT, ...) sa timeout-om po pozivu"""
+    name = 'smtp'
+
+    def send(self, subject, message, recipients, from_email, timeout):
+        import smtplib
+        import socket
+
+        connection = get_connection(
+            backend='django.core.mail.backends.smtp.EmailBackend',
+            timeout=timeout,
+            fail_silently=False,
+        )
+        email = EmailMessage(subject, message, from_email, recipients, connection=connection)
+        try:
+            email.send()
+        # SMTPException nasleđuje OSError - trajne SMTP greške moraju biti uhvaćene pre OSError
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+            raise TransientDeliveryError(str(e)) from e
+        except (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused) as e:
+            raise DeliveryError(str(e)) from e
+        except smtplib.SMTPResponseException as e:
+            # 4xx je privremena greška servera, 5xx trajna (npr. SMTPDataError)
+            if 400 <= e.smtp_code < 500:
+                raise TransientDeliveryError(str(e)) from e
+            raise DeliveryError(str(e)) from e
+        except smtplib.SMTPException as e:
+            raise DeliveryError(str(e)) from e
+        except (socket.timeout, OSError) as e:
+            raise TransientDeliveryError(str(e)) from e
+        return ''
+
+
+def get_transport(name=None):
+    """Vrati transport po imenu (podrazumevano settings.EMAIL_TRANSPORT)"""
+    name = name or settings.EMAIL_TRANSPORT
+    if name == 'resend':
+        return ResendTransport()
+    if name == 'smtp':
+        return SMTPTransport()
+    raise ValueError(f'Nepoznat email transport: {name}')
+
+
+def deliver_email(subject, message, recipients, from_email=None, transport=None, max_retries=None):
     """
-    Šalje email preko Resend API-ja.
+    Pošalji jednu poruku svim primaocima u jednom pozivu.
 
     Args:
         subject (str): Naslov emaila
         message (str): Sadržaj emaila (plain text)
-        recipient_email (str): Email primaoca
-        from_email (str, optional): Email pošiljaoca. Defaults to settings.DEFAULT_FROM_EMAIL
+        recipients (list | str): Email adrese primalaca
+        from_email (str, optional): Pošiljalac. Defaults to settings.DEFAULT_FROM_EMAIL
+        transport (optional): Instanca transporta. Defaults to get_transport()
+        max_retries (int, optional): Ponovni pokušaji posle privremene greške.
+            Defaults to settings.EMAIL_MAX_RETRIES
 
     Returns:
         bool: True ako je uspešno poslat, False ako ne
     """
-    if not resend.api_key:
-        print('[RESEND] API key nije postavljen!')
+    from .models import EmailDeliveryLog
+
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    recipients = [r.strip() for r in recipients if r and r.strip()]
+    if not recipients:
         return False
 
-    if not from_email:
-        from_email = settings.DEFAULT_FROM_EMAIL
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    transport = transport or get_transport()
+    max_retries = settings.EMAIL_MAX_RETRIES if max_retries is None else max_retries
 
-    try:
-        params = {
-            "from": from_email,
-            "to": [recipient_email],
-            "subject": subject,
-            "html": f"<pre>{message}</pre>",  # Konvertuj plain text u HTML sa preformatiranim tekstom
-        }
+    attempts = 0
+    provider_id = ''
+    error = ''
+    started = time.monotonic()
+
+    while True:
+        attempts += 1
+        try:
+            provider_id = transport.send(subject, message, recipients, from_email, settings.EMAIL_TIMEOUT)
+            error = ''
+            break
+        except TransientDeliveryError as e:
+            error = str(e)
+            if attempts > max_retries:
+                break
+            delay = settings.EMAIL_RETRY_BACKOFF * (2 ** (attempts - 1))
+            logger.warning(f'Email "{subject}" attempt {attempts} failed ({error}), retrying in {delay:.1f}s')
+            time.sleep(delay)
+        except DeliveryError as e:
+            error = str(e)
+            break
 
-        print(f'[RESEND] Sending email to {recipient_email}...')
-        response = resend.Emails.send(params)
-        print(f'[RESEND] Email sent successfully! ID: {response}')
-        return True
+    latency_ms = int((time.monotonic() - started) * 1000)
+    succeeded = not error
 
+    if succeeded:
+        logger.info(f'Email "{subject}" sent to {len(recipients)} recipient(s) via {transport.name} in {latency_ms}ms')
+    else:
+        logger.error(f'Email "{subject}" failed via {transport.name} after {attempts} attempt(s): {error}')
+
+    try:
+        EmailDeliveryLog.objects.create(
+            subject=subject[:255],
+            recipients=', '.join(recipients),
+            transport=transport.name,
+            status='sent' if succeeded else 'failed',
+            attempts=attempts,
+            latency_ms=latency_ms,
+            provider_message_id=provider_id or '',
+            error_message=error,
+        )
     except Exception as e:
-        print(f'[RESEND] Error sending email: {e}')
-        return False
+        logger.error(f'Error saving email delivery log: {e}')
+
+    return succeeded
+
+
+def deliver_email_after_commit(subject, message, recipients, from_email=None, on_sent=None):
+    """
+    deliver_email() sinhrono, posle commit-a trenutne transakcije (poruka ne
+    odlazi za narudžbinu koja je vraćena). Greška se samo loguje.
+
+    Args:
+        on_sent (callable, optional): Poziva se ako je poruka poslata
+    """
+    def send():
+        try:
+            sent = deliver_email(
+                subject, message, recipients, from_email=from_email,
+                max_retries=settings.EMAIL_REQUEST_MAX_RETRIES,
+            )
+            if sent and on_sent:
+                on_sent()
+        except Exception as e:
+            logger.error(f'Email "{subject}" failed: {e}', exc_info=True)
+
+    transaction.on_commit(send)
+
+
+def send_email_via_resend(subject, message, recipient_email, from_email=None):
+    """
+    Zadržano zbog kompatibilnosti - šalje kroz deliver_email().
+
+    Args:
+        subject (str): Naslov emaila
+        message (str): Sadržaj emaila (plain text)
+        recipient_email (str | list): Email primaoca (ili lista primalaca)
+        from_email (str, optional): Email pošiljaoca. Defaults to settings.DEFAULT_FROM_EMAIL
+
+    Returns:
+        bool: True ako je uspešno poslat, False ako ne
+    """
+    return deliver_email(subject, message, recipient_email, from_email=from_email)
@@ -0,0 +1,70 @@
+"""
+Admin event bus - jedan tip događaja po temi, čitaju ga SSE konekcije admin panela
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_last_prune = None
+_prune_lock = threading.Lock()
+
+
+def publish_event(topic, event_type, **payload):
+    """
+    Upiši događaj u AdminEvent tabelu.
+
+    Greška pri upisu se samo loguje - događaj nikada ne sme da obori
+    operaciju koja ga je izazvala (npr. kreiranje narudžbine). Upis ide u
+    savepoint: neuspeli INSERT unutar transakcije pozivaoca (na PostgreSQL-u
+    prekida celu transakciju) vraća se samo do savepoint-a.
+    """
+    from .models import AdminEvent
+
+    try:
+        with transaction.atomic():
+            return AdminEvent.objects.create(topic=topic, event_type=event_type, payload=payload)
+    except Exception as e:
+        logger.error(f"Error publishing admin event {topic}:{event_type}: {e}", exc_info=True)
+        return None
+
+
+def parse_topics(value):
+    """
+    Parsira query parametar ?topics=orders,stock u listu validnih tema.
+    Prazna vrednost znači sve teme.
+    """
+    from .models import AdminEvent
+
+    valid = [choice[0] for choice in AdminEvent.TOPIC_CHOICES]
+    if not value:
+        return valid
+    topics = [t.strip() for t in value.split(',') if t.strip() in valid]
+    return topics or valid
+
+
+def prune_old_events():
+    """
+    Obriši događaje starije od ADMIN_EVENTS_RETENTION_DAYS.
+
+    Poziva se pri otvaranju SSE konekcije, ali DELETE ide najviše jednom na
+    ADMIN_EVENTS_PRUNE_INTERVAL_SECONDS po procesu - ponovna povezivanja
+    (reconnect posle svakog prekida) ne smeju svaki put da brišu.
+    """
+    global _last_prune
+    from .models import AdminEvent
+
+    with _prune_lock:
+        now = time.monotonic()
+        if _last_prune is not None and now - _last_prune < settings.ADMIN_EVENTS_PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = now
+
+    cutoff = timezone.now() - timedelta(days=settings.ADMIN_EVENTS_RETENTION_DAYS)
+    AdminEvent.objects.filter(created_at__lt=cutoff).delete()
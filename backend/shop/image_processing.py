@@ -0,0 +1,154 @@
+"""
+Obrada slika proizvoda pri upload-u (Pillow):
+- auto-orijentacija po EXIF-u, uklanjanje metapodataka (EXIF/GPS/ICC)
+- smanjivanje prevelikih fotografija sa telefona i kompresija
+- mali base64 placeholder (LQIP) i dominantna boja za instant prikaz na frontendu
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_QUALITY = 40
+
+
+def read_upload(file):
+    """
+    Pročitaj upload jednim prolazom u delovima i usput izračunaj SHA-256.
+
+    Returns:
+        (sadržaj kao bytes, SHA-256 hex)
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    file.seek(0)
+    for chunk in file.chunks() if hasattr(file, 'chunks') else iter(lambda: file.read(64 * 1024), b''):
+        digest.update(chunk)
+        chunks.append(chunk)
+    file.seek(0)
+    return b''.join(chunks), digest.hexdigest()
+
+
+def process_upload(file, name, data=None):
+    """
+    Obradi uploadovanu sliku. `data` je već pročitan sadržaj (read_upload),
+    pa se fajl ne čita ponovo.
+
+    Returns:
+        dict sa ključevima 'content' (ContentFile ili originalni fajl), 'name',
+        'placeholder' i 'dominant_color'; None ako fajl nije slika koju Pillow čita
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        file.seek(0)
+        original_bytes = data if data is not None else file.read()
+        with Image.open(io.BytesIO(original_bytes)) as source:
+            source_format = (source.format or '').upper()
+            has_metadata = bool(source.info.get('exif') or source.info.get('icc_profile') or source.getexif())
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except Exception as e:
+        logger.warning(f"Image processing skipped for {name}: {e}")
+        file.seek(0)
+        return None
+
+    max_dimension = settings.IMAGE_MAX_DIMENSION
+    oversized = max(image.size) > max_dimension
+    if oversized:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    # Mala, već kompresovana slika bez metapodataka ostaje netaknuta
+    needs_reencode = oversized or has_metadata or len(original_bytes) > settings.IMAGE_RECOMPRESS_MIN_BYTES
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if needs_reencode:
+        content, extension = _encode(image, source_format)
+        name = f'{stem}.{extension}'
+    else:
+        content = ContentFile(original_bytes)
+
+    return {
+        'content': content,
+        'name': name,
+        'placeholder': build_placeholder(image),
+        'dominant_color': dominant_color(image),
+    }
+
+
+def _encode(image, source_format):
+    """Ponovo enkoduj bez metapodataka; providne slike ostaju PNG, ostalo JPEG"""
+    buffer = io.BytesIO()
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+    if source_format == 'PNG' and has_alpha:
+        image.save(buffer, 'PNG', optimize=True)
+        extension = 'png'
+    elif source_format == 'WEBP':
+        image.save(buffer, 'WEBP', quality=settings.IMAGE_JPEG_QUALITY, method=4)
+        extension = 'webp'
+    else:
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=settings.IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+        extension = 'jpg'
+
+    return ContentFile(buffer.getvalue()), extension
+
+
+def build_placeholder(image):
+    """Sićušna JPEG verzija slike kao data URI (~0.5 KB), frontend je prikazuje zamućenu"""
+    from PIL import Image
+
+    small = image.copy()
+    small.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH), Image.BILINEAR)
+    if small.mode not in ('RGB', 'L'):
+        small = small.convert('RGB')
+
+    buffer = io.BytesIO()
+    small.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def dominant_color(image):
+    """Prosečna boja slike kao #rrggbb"""
+    from PIL import Image
+
+    pixel = image.convert('RGB').resize((1, 1), Image.BOX).getpixel((0, 0))
+    return '#{:02x}{:02x}{:02x}'.format(*pixel)
+
+
+def analyze_stored_image(product_image):
+    """
+    Placeholder i dominantna boja za već sačuvanu sliku (backfill).
+    Cloudinary storage ne vraća sadržaj fajla, pa se skida mala 'thumb' varijanta.
+    """
+    from PIL import Image
+    from shop.storage import CloudinaryMediaStorage
+
+    try:
+        if isinstance(product_image.image.storage, CloudinaryMediaStorage):
+            import requests
+
+            thumb = (product_image.renditions or {}).get('thumb', {})
+            url = thumb.get('fallback') or product_image.delivery_url
+            response = requests.get(url, timeout=15)
+            response.raise_for_status()
+            data = response.content
+        else:
+            with product_image.image.storage.open(product_image.image.name, 'rb') as f:
+                data = f.read()
+
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            return build_placeholder(image), dominant_color(image)
+    except Exception as e:
+        logger.warning(f"Could not analyze image {product_image.image.name}: {e}")
+        return '', ''
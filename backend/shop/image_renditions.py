@@ -0,0 +1,120 @@
+"""
+Responsive varijante slika proizvoda (thumb/card/detail/zoom), svaka u WebP
+i fallback formatu.
+
+Produkcija (Cloudinary): transformacioni URL-ovi, bez dodatnog upload-a.
+DEBUG/offline (lokalni storage): Pillow generiše fajlove pod MEDIA_ROOT/renditions/.
+
+Rezultat se računa jednom pri upload-u i čuva u ProductImage.renditions:
+    {'thumb': {'width': 160, 'webp': url, 'fallback': url}, ...}
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# Ime -> maksimalna širina u pikselima
+RENDITIONS = {
+    'thumb': 160,
+    'card': 400,
+    'detail': 800,
+    'zoom': 1600,
+}
+
+WEBP_QUALITY = 80
+FALLBACK_QUALITY = 82
+
+
+def fallback_format_for(source_format):
+    """PNG ostaje PNG (providnost), sve ostalo ide u JPG"""
+    return 'png' if (source_format or '').lower() == 'png' else 'jpg'
+
+
+def build_renditions(storage, name, source_width=None, source_format=''):
+    """Vrati rečnik varijanti za sliku; prazan rečnik ako generisanje ne uspe"""
+    from shop.storage import CloudinaryMediaStorage
+
+    try:
+        if isinstance(storage, CloudinaryMediaStorage):
+            return _cloudinary_renditions(name, source_width, source_format)
+        return _local_renditions(storage, name, source_format)
+    except Exception as e:
+        logger.warning(f"Could not build renditions for {name}: {e}")
+        return {}
+
+
+def _target_width(width, source_width):
+    # Ne uvećavaj sliku preko originalne širine
+    return min(width, source_width) if source_width else width
+
+
+def _cloudinary_renditions(public_id, source_width, source_format):
+    import cloudinary
+
+    fallback = fallback_format_for(source_format)
+    renditions = {}
+    for rendition_name, width in RENDITIONS.items():
+        transformation = [{'width': width, 'crop': 'limit', 'quality': 'auto'}]
+        image = cloudinary.CloudinaryImage(public_id)
+        renditions[rendition_name] = {
+            'width': _target_width(width, source_width),
+            'webp': image.build_url(secure=True, transformation=transformation, format='webp'),
+            'fallback': image.build_url(secure=True, transformation=transformation, format=fallback),
+        }
+    return renditions
+
+
+def _local_renditions(storage, name, source_format):
+    from PIL import Image, ImageOps
+
+    fallback = fallback_format_for(source_format)
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+
+    with storage.open(name, 'rb') as f:
+        with Image.open(f) as source:
+            source = ImageOps.exif_transpose(source)
+            source.load()
+
+    renditions = {}
+    for rendition_name, width in RENDITIONS.items():
+        resized = source.copy()
+        resized.thumbnail((width, width * 10), Image.LANCZOS)
+
+        urls = {}
+        for key, fmt in (('webp', 'webp'), ('fallback', fallback)):
+            target = os.path.join('renditions', directory, f'{stem}_{rendition_name}.{fmt}')
+            urls[key] = storage.url(_save_local(storage, target, resized, fmt))
+
+        renditions[rendition_name] = {'width': resized.width, **urls}
+    return renditions
+
+
+def _save_local(storage, target, image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif fmt == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=FALLBACK_QUALITY, optimize=True, progressive=True)
+
+    if storage.exists(target):
+        storage.delete(target)
+    return storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def build_srcset(renditions):
+    """{'webp': 'url 160w, url 400w, ...', 'fallback': '...'} za <picture>/<img srcset>"""
+    if not renditions:
+        return None
+    ordered = sorted(renditions.values(), key=lambda r: r['width'])
+    return {
+        key: ', '.join(f"{r[key]} {r['width']}w" for r in ordered)
+        for key in ('webp', 'fallback')
+    }
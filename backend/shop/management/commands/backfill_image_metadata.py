@@ -0,0 +1,63 @@
+"""
+Popunjava delivery_url, width, height, format, renditions, placeholder i
+dominant_color za postojeće slike proizvoda
+
+Usage:
+    python manage.py backfill_image_metadata
+    python manage.py backfill_image_metadata --all --batch-size 200
+"""
+from django.core.management.base import BaseCommand
+from django.db import models
+from shop.models import ProductImage
+from shop.image_processing import analyze_stored_image
+
+
+class Command(BaseCommand):
+    help = 'Izračunaj i sačuvaj URL, dimenzije, varijante i placeholder za postojeće slike proizvoda'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Ponovo izračunaj i za slike koje već imaju delivery_url',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Broj redova po bulk_update-u (default 100)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = ProductImage.objects.exclude(image='').order_by('id')
+        if not options['all']:
+            queryset = queryset.filter(
+                models.Q(delivery_url='') | models.Q(renditions={}) | models.Q(placeholder='')
+            )
+
+        total = queryset.count()
+        self.stdout.write(f'🖼️  Slika za obradu: {total}')
+
+        fields = ['delivery_url', 'width', 'height', 'format', 'renditions', 'placeholder', 'dominant_color']
+        batch = []
+        updated = 0
+
+        for image in queryset.iterator(chunk_size=batch_size):
+            # fetch=True - za Cloudinary slike dimenzije dolaze iz Admin API-ja
+            image.apply_image_metadata(fetch=True)
+            image.apply_renditions()
+            image.placeholder, image.dominant_color = analyze_stored_image(image)
+            batch.append(image)
+
+            if len(batch) >= batch_size:
+                ProductImage.objects.bulk_update(batch, fields)
+                updated += len(batch)
+                batch = []
+                self.stdout.write(f'   {updated}/{total}')
+
+        if batch:
+            ProductImage.objects.bulk_update(batch, fields)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Ažurirano {updated} slika'))
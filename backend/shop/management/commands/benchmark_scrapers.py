@@ -0,0 +1,188 @@
+"""
+Benchmark HTML extraction of competitor scrapers over saved pages
+
+Compares parsing the whole page (full BeautifulSoup tree) with parsing only
+the product containers (each scraper's product_strainer), and checks that
+both give the same products.
+
+Fixtures are plain or gzipped HTML files grouped by scraper name:
+    scrape_fixtures/joilart/kovani-vrhovi.html
+    scrape_fixtures/hanan/page-1.html.gz
+
+A corpus recorded with `scrape_competitors --record DIR` can be used instead
+(--corpus DIR); then the full crawl of every site is also replayed offline to
+report pages/s and products/s of scrape_products().
+
+Usage:
+    python manage.py benchmark_scrapers --download     # save first page of every category (slow, crawl delay)
+    python manage.py benchmark_scrapers
+    python manage.py benchmark_scrapers --fixtures /path/to/pages --repeat 20
+    python manage.py benchmark_scrapers --fixtures shop/tests/fixtures/scrape_fixtures   # sanitized pages in the repo
+    python manage.py benchmark_scrapers --corpus scrape_corpus/
+"""
+import contextlib
+import gzip
+import io
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from shop.scrapers import SCRAPERS, replay
+
+
+class Command(BaseCommand):
+    help = 'Measure per-page parse + extract time of scrapers (full tree vs product strainer)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fixtures',
+            type=str,
+            default=str(settings.BASE_DIR / 'scrape_fixtures'),
+            help='Directory with <scraper>/<page>.html[.gz] files',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Runs per page, best time is reported (default 10)',
+        )
+        parser.add_argument(
+            '--corpus',
+            type=str,
+            help='Directory with recorded <site>.json.gz corpora (scrape_competitors --record)',
+        )
+        parser.add_argument(
+            '--download',
+            action='store_true',
+            help='Fetch the first page of every scraper category into --fixtures first',
+        )
+
+    def handle(self, *args, **options):
+        fixtures_dir = options['fixtures']
+        if options['download']:
+            self.download(fixtures_dir)
+
+        if options['corpus']:
+            pages = list(self.iter_corpus_pages(options['corpus']))
+        else:
+            pages = list(self.iter_fixtures(fixtures_dir))
+        if not pages:
+            self.stdout.write(self.style.WARNING(f'No fixtures in {options["corpus"] or fixtures_dir} (use --download)'))
+            return
+
+        self.stdout.write(f'📄 {len(pages)} page(s), best of {options["repeat"]} runs\n')
+        self.stdout.write(f'{"page":<45} {"KB":>6} {"full ms":>9} {"strained ms":>12} {"speedup":>8} {"products":>9}')
+
+        totals = {'full': 0.0, 'strained': 0.0}
+        mismatches = 0
+        for scraper_name, file_name, content in pages:
+            scraper = SCRAPERS[scraper_name]()
+            full_time, full_products = self.measure(scraper, content, True, options['repeat'])
+            strained_time, strained_products = self.measure(scraper, content, False, options['repeat'])
+            totals['full'] += full_time
+            totals['strained'] += strained_time
+
+            same = full_products == strained_products
+            mismatches += not same
+            self.stdout.write(
+                f'{scraper_name + "/" + file_name:<45.45} {len(content) / 1024:>6.0f} '
+                f'{full_time * 1000:>9.2f} {strained_time * 1000:>12.2f} '
+                f'{full_time / strained_time if strained_time else 0:>7.1f}x {len(strained_products):>9}'
+                + ('' if same else '  ❌ different products')
+            )
+
+        self.stdout.write(
+            f'\n⏱️  Total: {totals["full"] * 1000:.1f} ms full, {totals["strained"] * 1000:.1f} ms strained '
+            f'({totals["full"] / totals["strained"] if totals["strained"] else 0:.1f}x)'
+        )
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'❌ {mismatches} page(s) extract different products with the strainer'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Strained extraction matches full-tree extraction on all pages'))
+
+        if options['corpus']:
+            self.benchmark_crawl(options['corpus'])
+
+    def benchmark_crawl(self, corpus_dir):
+        """Replay each site's whole crawl (scrape_products) with zero delay"""
+        self.stdout.write(f'\n{"site":<15} {"pages":>6} {"products":>9} {"seconds":>8} {"pages/s":>8} {"products/s":>11}')
+        for scraper_name in sorted(SCRAPERS):
+            path = replay.ScrapeCorpus.for_site(corpus_dir, scraper_name).path
+            if not os.path.exists(path):
+                continue
+            scraper = SCRAPERS[scraper_name]()
+            replay.replay(scraper, replay.ScrapeCorpus(path).load())
+
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                products = scraper.scrape_products()
+            elapsed = time.perf_counter() - started
+
+            pages = scraper.stats['pages_fetched']
+            self.stdout.write(
+                f'{scraper_name:<15} {pages:>6} {len(products):>9} {elapsed:>8.2f} '
+                f'{pages / elapsed if elapsed else 0:>8.1f} {len(products) / elapsed if elapsed else 0:>11.1f}'
+            )
+
+    def measure(self, scraper, content, full, repeat):
+        """Best parse + extract time and the extracted products"""
+        best = None
+        products = []
+        # Scrapers print per-item warnings; keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                soup = scraper.parse_html(content, full=full)
+                products = scraper.extract_products(soup, 'benchmark')
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+        return best, products
+
+    def iter_fixtures(self, fixtures_dir):
+        if not os.path.isdir(fixtures_dir):
+            return
+        for scraper_name in sorted(os.listdir(fixtures_dir)):
+            directory = os.path.join(fixtures_dir, scraper_name)
+            if scraper_name not in SCRAPERS or not os.path.isdir(directory):
+                continue
+            for file_name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, file_name)
+                if file_name.endswith('.html.gz'):
+                    with gzip.open(path, 'rb') as f:
+                        yield scraper_name, file_name, f.read()
+                elif file_name.endswith('.html'):
+                    with open(path, 'rb') as f:
+                        yield scraper_name, file_name, f.read()
+
+    def iter_corpus_pages(self, corpus_dir):
+        if not os.path.isdir(corpus_dir):
+            return
+        for scraper_name in sorted(SCRAPERS):
+            path = replay.ScrapeCorpus.for_site(corpus_dir, scraper_name).path
+            if os.path.exists(path):
+                for url, content in replay.ScrapeCorpus(path).load().pages():
+                    yield scraper_name, url.split('://', 1)[-1], content
+
+    def download(self, fixtures_dir):
+        """Save the first page of every category, respecting each scraper's crawl delay"""
+        for scraper_name, scraper_class in SCRAPERS.items():
+            scraper = scraper_class()
+            directory = os.path.join(fixtures_dir, scraper_name)
+            os.makedirs(directory, exist_ok=True)
+
+            for category in scraper.categories:
+                url = f"{scraper.base_url}{category['url']}"
+                scraper.rate_limiter.wait(url, scraper.crawl_delay)
+                try:
+                    response = scraper.session.get(url, timeout=30)
+                    response.raise_for_status()
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f'⚠️  {url}: {e}'))
+                    continue
+
+                slug = re.sub(r'[^a-z0-9]+', '-', category['url'].lower()).strip('-')
+                with gzip.open(os.path.join(directory, f'{slug}.html.gz'), 'wb') as f:
+                    f.write(response.content)
+                self.stdout.write(f'💾 {scraper_name}/{slug}.html.gz ({len(response.content) / 1024:.0f} KB)')
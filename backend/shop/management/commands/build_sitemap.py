@@ -0,0 +1,27 @@
+"""
+Generiše statične gzip sitemap fajlove (pokreće se pri deploy-u)
+
+Usage:
+    python manage.py build_sitemap
+    python manage.py build_sitemap --if-stale   # cron: samo ako je katalog menjan
+"""
+from django.core.management.base import BaseCommand
+from shop.sitemap_builder import build_sitemaps, is_stale, sitemap_root
+
+
+class Command(BaseCommand):
+    help = 'Generiši sitemap.xml.gz (i sitemap index kada ima mnogo proizvoda)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-stale',
+            action='store_true',
+            help='Generiši samo ako je sitemap označen kao zastareo',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_stale'] and not is_stale():
+            self.stdout.write('⏭️  Sitemap je ažuran')
+            return
+        written = build_sitemaps()
+        self.stdout.write(self.style.SUCCESS(f'✅ Sitemap generisan u {sitemap_root()}: {", ".join(written)}'))
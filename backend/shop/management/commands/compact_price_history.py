@@ -0,0 +1,77 @@
+"""
+Collapse consecutive identical PriceHistory rows
+
+Older scrapes wrote a history row for every product on every run. Only the
+first row of each run of identical (price, on_sale, sale_price, in_stock)
+states is kept - the same rows change-only recording would have written.
+
+Usage:
+    python manage.py compact_price_history
+    python manage.py compact_price_history --dry-run
+    python manage.py compact_price_history --batch-size 200
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from shop.models_scraping import ScrapedProduct, PriceHistory
+
+
+class Command(BaseCommand):
+    help = 'Remove price history rows that repeat the previous state of the same product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Products processed per batch (default 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count rows that would be removed',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        product_ids = list(
+            ScrapedProduct.objects.filter(price_history__isnull=False)
+            .distinct().order_by('id').values_list('id', flat=True)
+        )
+        total_before = PriceHistory.objects.count()
+        self.stdout.write(f'🗜️  Compacting history of {len(product_ids)} products ({total_before} rows)...')
+
+        removed = 0
+        for start in range(0, len(product_ids), batch_size):
+            batch = product_ids[start:start + batch_size]
+            duplicate_ids = self.find_duplicates(batch)
+
+            if duplicate_ids and not dry_run:
+                with transaction.atomic():
+                    for chunk_start in range(0, len(duplicate_ids), 900):
+                        PriceHistory.objects.filter(
+                            id__in=duplicate_ids[chunk_start:chunk_start + 900]
+                        ).delete()
+
+            removed += len(duplicate_ids)
+            self.stdout.write(f'   {min(start + batch_size, len(product_ids))}/{len(product_ids)} products, {removed} duplicate rows')
+
+        verb = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'✅ {verb} {removed} of {total_before} rows'))
+
+    def find_duplicates(self, product_ids):
+        """IDs of rows identical to the previous row of the same product"""
+        rows = (
+            PriceHistory.objects.filter(product_id__in=product_ids)
+            .order_by('product_id', 'recorded_at', 'id')
+            .values_list('id', 'product_id', 'price', 'on_sale', 'sale_price', 'in_stock')
+        )
+
+        duplicate_ids = []
+        previous_product = previous_state = None
+        for row_id, product_id, *state in rows.iterator(chunk_size=2000):
+            if product_id == previous_product and state == previous_state:
+                duplicate_ids.append(row_id)
+            previous_product, previous_state = product_id, state
+        return duplicate_ids
@@ -0,0 +1,65 @@
+"""
+Link competitor products to our variants (shop.product_matching)
+
+scrape_competitors already matches new/renamed products after every run;
+this command is for the first run, after a bulk catalog import, or to
+inspect how a name is normalized.
+
+Usage:
+    python manage.py match_products
+    python manage.py match_products --site joilart
+    python manage.py match_products --rebuild             # recompute all automatic matches
+    python manage.py match_products --explain "Kutija 40x40x2,8mm"
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from shop import product_matching
+from shop.models_scraping import ScrapedProduct
+
+
+class Command(BaseCommand):
+    help = 'Match scraped competitor products to our products/variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site', type=str, help='Only products of this competitor site')
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute every automatic match, not only new/renamed products',
+        )
+        parser.add_argument(
+            '--explain',
+            type=str,
+            metavar='NAME',
+            help='Print the tokens and best match for a product name and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['explain']:
+            self.explain(options['explain'])
+            return
+
+        queryset = ScrapedProduct.objects.all()
+        if options['site']:
+            queryset = queryset.filter(site__name__iexact=options['site'])
+
+        started = time.monotonic()
+        result = product_matching.match_scraped_products(queryset, rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Matched {result["matched"]}, unmatched {result["unmatched"]}'
+            f'{" (full rebuild)" if result["rebuilt"] else ""} in {time.monotonic() - started:.2f}s'
+        ))
+
+    def explain(self, name):
+        from shop.models import Product, ProductVariant
+
+        self.stdout.write(f'Tokens: {sorted(product_matching.normalize(name))}')
+        product_id, variant_id, confidence = product_matching.CatalogIndex.build().best_match(name)
+        if variant_id:
+            target = ProductVariant.objects.select_related('product').get(pk=variant_id)
+        elif product_id:
+            target = Product.objects.get(pk=product_id)
+        else:
+            target = None
+        self.stdout.write(f'Best match: {target or "-"} (confidence {confidence:.3f})')
@@ -0,0 +1,91 @@
+"""
+Roll up old competitor price history (shop.price_history)
+
+Raw PriceHistory rows older than --keep-days are summarized into daily or
+weekly PriceHistoryRollup rows (min/max/last price) and deleted; the last raw
+row of each product before the cutoff is kept. Safe to re-run; run it daily
+(e.g. a cron job) after scraping.
+
+On PostgreSQL, where migration 0043 partitions the table, it also creates
+upcoming monthly partitions and drops old ones that are empty.
+
+Usage:
+    python manage.py rollup_price_history
+    python manage.py rollup_price_history --keep-days 30 --period week
+    python manage.py rollup_price_history --dry-run
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from shop import price_history
+from shop.models_scraping import PriceHistory, PriceHistoryRollup
+
+
+class Command(BaseCommand):
+    help = 'Summarize PriceHistory rows older than the retention period into daily/weekly rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-days',
+            type=int,
+            default=settings.PRICE_HISTORY_RAW_DAYS,
+            help=f'Days of raw history to keep (default {settings.PRICE_HISTORY_RAW_DAYS})',
+        )
+        parser.add_argument(
+            '--period',
+            choices=[PriceHistoryRollup.PERIOD_DAY, PriceHistoryRollup.PERIOD_WEEK],
+            default=settings.PRICE_HISTORY_ROLLUP_PERIOD,
+            help=f'Rollup bucket (default {settings.PRICE_HISTORY_ROLLUP_PERIOD})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Products processed per batch (default 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count rows that would be rolled up',
+        )
+
+    def handle(self, *args, **options):
+        if options['keep_days'] < 1:
+            raise CommandError('--keep-days must be at least 1')
+
+        period = options['period']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        cutoff = price_history.retention_cutoff(options['keep_days'], period)
+
+        started = time.monotonic()
+        product_ids = price_history.products_to_roll_up(cutoff)
+        total_before = PriceHistory.objects.count()
+        self.stdout.write(
+            f'🗜️  Rolling up history before {cutoff:%Y-%m-%d} into {period} buckets: '
+            f'{len(product_ids)} products ({total_before} raw rows)...'
+        )
+
+        totals = {'rollups': 0, 'deleted': 0}
+        for start in range(0, len(product_ids), batch_size):
+            result = price_history.roll_up_products(
+                product_ids[start:start + batch_size], cutoff, period, dry_run=dry_run
+            )
+            totals['rollups'] += result['rollups']
+            totals['deleted'] += result['deleted']
+            self.stdout.write(
+                f'   {min(start + batch_size, len(product_ids))}/{len(product_ids)} products, '
+                f'{totals["rollups"]} rollups, {totals["deleted"]} raw rows'
+            )
+
+        verb = 'Would roll up' if dry_run else 'Rolled up'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {verb} {totals["deleted"]} of {total_before} raw rows into {totals["rollups"]} {period} rollups '
+            f'({time.monotonic() - started:.1f}s)'
+        ))
+
+        if not dry_run and price_history.is_partitioned():
+            created = price_history.ensure_partitions()
+            dropped = price_history.drop_empty_partitions(cutoff)
+            self.stdout.write(f'🧩 Partitions up to {created[-1]}, dropped {len(dropped)} empty')
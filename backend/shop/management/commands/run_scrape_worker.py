@@ -0,0 +1,77 @@
+"""
+Worker process for queued competitor scrape jobs (shop.scrape_jobs)
+
+Runs jobs one at a time; start more processes for parallelism, a job is
+never claimed twice. SIGTERM/SIGINT stops the worker after the current job.
+
+Usage:
+    python manage.py run_scrape_worker
+    python manage.py run_scrape_worker --schedule   # also queue sites that are due
+    python manage.py run_scrape_worker --once       # drain the queue and exit
+"""
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from shop import scrape_jobs
+from shop.management.commands.scrape_competitors import Command as ScrapeCommand
+
+
+class Command(BaseCommand):
+    help = 'Process queued competitor scrape jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling',
+        )
+        parser.add_argument(
+            '--schedule',
+            action='store_true',
+            help='Queue active sites whose scrape interval has passed',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=settings.SCRAPE_WORKER_POLL_SECONDS,
+            help=f'Seconds between queue checks (default {settings.SCRAPE_WORKER_POLL_SECONDS})',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        worker = scrape_jobs.worker_name()
+        self.stdout.write(f'👷 Scrape worker {worker} started')
+
+        while not self.stopping:
+            close_old_connections()
+            scrape_jobs.fail_stale_jobs()
+            if options['schedule']:
+                for job in scrape_jobs.enqueue_due_sites():
+                    self.stdout.write(f'🗓️  Queued {job.site.name} (job #{job.pk})')
+
+            job = scrape_jobs.claim_next(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'\n▶️  Job #{job.pk}: {job.site.name}')
+            scrape_command = ScrapeCommand(stdout=self.stdout._out, stderr=self.stderr._out)
+            job = scrape_jobs.run_job(job, scrape_command)
+            style = self.style.SUCCESS if job.status == job.STATUS_SUCCESS else self.style.ERROR
+            self.stdout.write(style(f'Job #{job.pk} {job.status}'))
+
+        self.stdout.write('👋 Scrape worker stopped')
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            raise KeyboardInterrupt
+        self.stdout.write('⏹️  Stopping after the current job (signal again to abort)')
+        self.stopping = True
@@ -1,20 +1,36 @@
 """
 Django management command to scrape competitor websites
 
+Sites on different hosts are scraped concurrently (thread pool); the per-host
+crawl delay is enforced by BaseScraper, so a full run takes roughly as long as
+the slowest single site instead of the sum of all of them.
+
 Usage:
     python manage.py scrape_competitors
     python manage.py scrape_competitors --site joilart
+    python manage.py scrape_competitors --workers 1
+    python manage.py scrape_competitors --full   # ignore the page fetch cache
+    python manage.py scrape_competitors --force --record scrape_corpus/   # save responses
+    python manage.py scrape_competitors --force --replay scrape_corpus/   # offline, no delay, dry run
+    python manage.py scrape_competitors --force --replay scrape_corpus/ --write   # keep the results
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 from django.utils import timezone
-from shop.models_scraping import CompetitorSite, ScrapedProduct, PriceHistory, ScrapeLog
-from shop.scrapers import (
-    JoilArtScraper,
-    JeepCommerceScraper,
-    HananScraper,
-    VelogScraper,
-    IronWorksScraper
-)
+from shop.models_scraping import CompetitorSite, ScrapedProduct, PriceHistory, PageFetchCache, ScrapeLog
+from shop import price_comparison, product_matching
+from shop.scrape_diff import TRACKED_FIELDS, diff_scrape, scraped_values
+from shop.scrapers import ScrapeCancelled, get_scraper, replay
+from shop.scrapers.politeness import CircuitBreaker, RobotsRules, fetch_robots_txt, robots_url
+
+
+# Crawling runs in parallel, DB writes one site at a time (SQLite allows a single writer)
+_db_write_lock = threading.Lock()
 
 
 class Command(BaseCommand):
@@ -31,10 +47,49 @@ class Command(BaseCommand):
             action='store_true',
             help='Force scrape even if not due',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of sites scraped concurrently (default SCRAPE_MAX_CONCURRENT_SITES)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Fetch and parse every page, ignoring ETag/Last-Modified/content hash cache',
+        )
+        parser.add_argument(
+            '--record',
+            type=str,
+            metavar='DIR',
+            help='Save every fetched response to DIR/<site>.json.gz',
+        )
+        parser.add_argument(
+            '--replay',
+            type=str,
+            metavar='DIR',
+            help='Serve responses from a recorded corpus instead of the network (no crawl delay)',
+        )
+        parser.add_argument(
+            '--write',
+            action='store_true',
+            help='With --replay: keep the products, history and matches written by the run '
+                 '(by default they are rolled back and only the scrape log is kept)',
+        )
 
     def handle(self, *args, **options):
         site_name = options.get('site')
         force = options.get('force', False)
+        self.use_page_cache = not options.get('full', False)
+        self.record_dir = options.get('record')
+        self.replay_dir = options.get('replay')
+        self.replay_write = options.get('write', False)
+        if self.record_dir and self.replay_dir:
+            self.stdout.write(self.style.ERROR('--record and --replay are mutually exclusive'))
+            return
+        if self.replay_write and not self.replay_dir:
+            self.stdout.write(self.style.ERROR('--write only applies to --replay'))
+            return
 
         if site_name:
             # Scrape specific site
@@ -54,13 +109,40 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS('No sites need scraping'))
                 return
 
-            self.stdout.write(f'Scraping {len(sites)} site(s)...')
+            workers = max(1, min(options.get('workers') or settings.SCRAPE_MAX_CONCURRENT_SITES, len(sites)))
+            self.stdout.write(f'Scraping {len(sites)} site(s), {workers} at a time...')
+            started = time.monotonic()
 
-            for site in sites:
-                self.scrape_site(site, force)
+            if workers == 1:
+                for site in sites:
+                    self.scrape_site(site, force)
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    list(pool.map(lambda site: self._scrape_site_in_thread(site, force), sites))
+
+            self.stdout.write(f'⏱️  Total time: {time.monotonic() - started:.1f}s')
+
+    def _scrape_site_in_thread(self, site: CompetitorSite, force: bool):
+        try:
+            self.scrape_site(site, force)
+        finally:
+            # Each worker thread has its own DB connection
+            connection.close()
+
+    def scrape_site(self, site: CompetitorSite, force: bool = False, monitor=None):
+        """
+        Scrape a single competitor site, returns its ScrapeLog (None if skipped)
 
-    def scrape_site(self, site: CompetitorSite, force: bool = False):
-        """Scrape a single competitor site"""
+        monitor (shop.scrape_jobs.JobMonitor) receives the scraper to publish
+        progress and may cancel the run, which interrupts the scraper's waits
+        and stops it before the next fetch; a cancelled run writes nothing but
+        its log.
+
+        A replayed run (--replay) is a dry run: products, history, matches and
+        the price comparison are written and then rolled back, the site and
+        the page fetch cache aren't touched. --write keeps everything but the
+        page fetch cache, whose validators belong to the corpus, not the live site.
+        """
 
         if not force and not site.needs_scraping:
             self.stdout.write(
@@ -76,6 +158,11 @@ class Command(BaseCommand):
             status='started'
         )
 
+        scraper = None
+        fetch_started = time.monotonic()
+        replaying = bool(getattr(self, 'replay_dir', None))
+        dry_run = replaying and not getattr(self, 'replay_write', False)
+
         try:
             # Get appropriate scraper
             scraper = self.get_scraper(site.name)
@@ -83,95 +170,336 @@ class Command(BaseCommand):
             if not scraper:
                 raise ValueError(f'No scraper found for {site.name}')
 
+            if getattr(self, 'use_page_cache', True):
+                scraper.page_cache = self.load_page_cache(site)
+            if monitor is not None:
+                monitor.attach(scraper)
+
+            corpus = replay_corpus = None
+            if getattr(self, 'replay_dir', None):
+                replay_corpus = replay.ScrapeCorpus.for_site(self.replay_dir, site.name).load()
+                replay.replay(scraper, replay_corpus)
+            elif getattr(self, 'record_dir', None):
+                corpus = replay.ScrapeCorpus.for_site(self.record_dir, site.name)
+                replay.record(scraper, corpus)
+
+            self.apply_crawl_policy(site, scraper, replay_corpus=replay_corpus)
+            self.apply_retry_policy(scraper)
+            if getattr(self, 'replay_dir', None):
+                # robots.txt rules still apply, the delay doesn't (nothing hits the network)
+                scraper.crawl_delay = 0
+            log.crawl_delay_seconds = scraper.crawl_delay
+
             # Perform scraping
-            products_data = scraper.scrape_products()
-
-            # Update database
-            products_new = 0
-            products_updated = 0
-
-            for product_data in products_data:
-                product, created = ScrapedProduct.objects.update_or_create(
-                    site=site,
-                    external_id=product_data['external_id'],
-                    defaults={
-                        'name': product_data['name'],
-                        'category': product_data.get('category', ''),
-                        'description': product_data.get('description', ''),
-                        'current_price': product_data['current_price'],
-                        'on_sale': product_data.get('on_sale', False),
-                        'sale_price': product_data.get('sale_price'),
-                        'original_price': product_data.get('original_price'),
-                        'product_url': product_data['product_url'],
-                        'image_url': product_data.get('image_url', ''),
-                        'in_stock': product_data.get('in_stock', True),
-                        'is_active': True,
-                    }
-                )
+            try:
+                products_data = scraper.scrape_products()
+            finally:
+                if corpus is not None:
+                    corpus.save()
+            log.fetch_seconds = time.monotonic() - fetch_started
+            self._apply_scraper_stats(log, scraper)
 
-                if created:
-                    products_new += 1
-                else:
-                    products_updated += 1
-
-                # Record price history
-                PriceHistory.objects.create(
-                    product=product,
-                    price=product_data['current_price'],
-                    on_sale=product_data.get('on_sale', False),
-                    sale_price=product_data.get('sale_price'),
-                    in_stock=product_data.get('in_stock', True)
+            with _db_write_lock, transaction.atomic():
+                save_started = time.monotonic()
+                diff = self.save_products(
+                    site,
+                    products_data,
+                    seen_unchanged=scraper.unchanged_external_ids,
+                    allow_removal=self.removal_allowed(site, scraper, products_data),
                 )
+                if not replaying:
+                    self.save_page_cache(site, scraper)
+                log.save_seconds = time.monotonic() - save_started
+                self.match_products(site)
+                self.refresh_price_comparison(site)
+                if dry_run:
+                    transaction.set_rollback(True)
 
             # Update site and log
-            site.last_scraped_at = timezone.now()
-            site.last_scrape_status = 'success'
-            site.last_error_message = ''
-            site.save()
+            if not dry_run:
+                site.last_scraped_at = timezone.now()
+                site.last_scrape_status = 'success'
+                site.last_error_message = ''
+                site.save()
 
             log.status = 'success'
-            log.products_found = len(products_data)
-            log.products_new = products_new
-            log.products_updated = products_updated
+            log.products_found = len(diff['new']) + len(diff['changed']) + len(diff['unchanged'])
+            log.apply_diff(diff)
             log.completed_at = timezone.now()
             log.duration_seconds = (log.completed_at - log.started_at).total_seconds()
             log.save()
 
+            if dry_run:
+                self.stdout.write(f'🧪 {site.name}: replay dry run, changes rolled back (use --write to keep them)')
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'✅ {site.name}: Found {len(products_data)}, New: {products_new}, Updated: {products_updated}'
+                    f'✅ {site.name}: Found {log.products_found}, New: {log.products_new}, Changed: {log.products_updated}, '
+                    f'Unchanged: {log.products_unchanged}, Removed: {log.products_removed} '
+                    f'({log.duration_seconds:.1f}s, {log.pages_fetched} pages, {log.pages_not_modified} not modified, '
+                    f'{log.request_retries} retries)'
                 )
             )
 
+        except ScrapeCancelled as e:
+            # Partial crawl - keep stored products and page cache as they were
+            self._apply_scraper_stats(log, scraper)
+            log.fetch_seconds = time.monotonic() - fetch_started
+            log.status = 'cancelled'
+            log.error_message = str(e)
+            log.completed_at = timezone.now()
+            log.duration_seconds = (log.completed_at - log.started_at).total_seconds()
+            log.save()
+
+            self.stdout.write(self.style.WARNING(f'⏹️  {site.name}: cancelled after {log.pages_fetched} pages'))
+
         except Exception as e:
             # Handle errors
             error_msg = str(e)
 
-            site.last_scrape_status = 'failed'
-            site.last_error_message = error_msg
-            site.save()
+            if not dry_run:
+                site.last_scrape_status = 'failed'
+                site.last_error_message = error_msg
+                site.save()
 
+            if log.fetch_seconds is None:
+                log.fetch_seconds = time.monotonic() - fetch_started
+            if scraper is not None:
+                self._apply_scraper_stats(log, scraper)
             log.status = 'failed'
             log.error_message = error_msg
             log.completed_at = timezone.now()
+            log.duration_seconds = (log.completed_at - log.started_at).total_seconds()
             log.save()
 
             self.stdout.write(
                 self.style.ERROR(f'❌ {site.name}: {error_msg}')
             )
 
-    def get_scraper(self, site_name: str):
-        """Return appropriate scraper for site"""
-        scrapers = {
-            'joilart': JoilArtScraper,
-            'jeepcommerce': JeepCommerceScraper,
-            'hanan': HananScraper,
-            'velog': VelogScraper,
-            'ironworks': IronWorksScraper,
+        return log
+
+    def _apply_scraper_stats(self, log: ScrapeLog, scraper):
+        stats = getattr(scraper, 'stats', {})
+        log.pages_fetched = stats.get('pages_fetched', 0)
+        log.pages_not_modified = stats.get('pages_not_modified', 0)
+        log.pages_disallowed = stats.get('pages_disallowed', 0)
+        log.request_attempts = stats.get('attempts', 0)
+        log.request_retries = stats.get('retries', 0)
+        log.backoff_seconds = stats.get('backoff_seconds')
+        breaker = getattr(scraper, 'circuit_breaker', None)
+        log.circuit_breaker_tripped = bool(breaker and breaker.tripped)
+        log.wait_seconds = stats.get('wait_seconds')
+
+    # Columns refreshed on upsert (first_seen_at is kept from the first insert)
+    UPSERT_FIELDS = TRACKED_FIELDS + ['is_active', 'last_seen_at']
+
+    def save_products(self, site: CompetitorSite, products_data, seen_unchanged=(), allow_removal=True):
+        """
+        Diff this run against the stored rows and write the result in one transaction.
+
+        - new + changed rows: one bulk upsert (INSERT ... ON CONFLICT (site, external_id) DO UPDATE)
+        - unchanged rows: only last_seen_at, one UPDATE per SCRAPE_BULK_BATCH_SIZE rows
+        - removed rows: is_active=False, one UPDATE (skipped when allow_removal is False)
+        - history: one bulk insert, only for new products and changed price/sale/stock state
+
+        Returns the diff dict from shop.scrape_diff.diff_scrape.
+        """
+        # Same product listed in several categories - keep the last occurrence,
+        # ON CONFLICT can't touch one row twice in a single statement
+        by_external_id = {data['external_id']: data for data in products_data}
+
+        with transaction.atomic():
+            stored = {}
+            for row in ScrapedProduct.objects.filter(site=site).values_list('id', 'external_id', 'is_active', *TRACKED_FIELDS):
+                values = dict(zip(TRACKED_FIELDS, row[3:]))
+                stored[row[1]] = {
+                    'id': row[0],
+                    'is_active': row[2],
+                    'values': tuple(row[3:]),
+                    'price_state': (values['current_price'], values['on_sale'], values['sale_price'], values['in_stock']),
+                }
+            diff = diff_scrape(stored, by_external_id, seen_unchanged)
+            if not allow_removal:
+                diff['removed'] = []
+
+            to_write = diff['new'] + diff['changed']
+            products = ScrapedProduct.objects.bulk_create(
+                [
+                    ScrapedProduct(
+                        site=site,
+                        external_id=external_id,
+                        is_active=True,
+                        **dict(zip(TRACKED_FIELDS, scraped_values(by_external_id[external_id]))),
+                    )
+                    for external_id in to_write
+                ],
+                update_conflicts=True,
+                unique_fields=['site', 'external_id'],
+                update_fields=self.UPSERT_FIELDS,
+                batch_size=settings.SCRAPE_BULK_BATCH_SIZE,
+            )
+
+            # PostgreSQL/SQLite return ids for upserted rows; other backends need a lookup
+            if any(product.pk is None for product in products):
+                ids = dict(
+                    ScrapedProduct.objects.filter(site=site).values_list('external_id', 'id')
+                )
+                for product in products:
+                    product.pk = ids[product.external_id]
+
+            PriceHistory.objects.bulk_create(
+                [
+                    PriceHistory(
+                        product=product,
+                        price=product.current_price,
+                        on_sale=product.on_sale,
+                        sale_price=product.sale_price,
+                        in_stock=product.in_stock,
+                    )
+                    for product in products
+                    if product.external_id not in stored
+                    or stored[product.external_id]['price_state'] != product.price_state
+                ],
+                batch_size=settings.SCRAPE_BULK_BATCH_SIZE,
+            )
+
+            removed_ids = [stored[external_id]['id'] for external_id in diff['removed']]
+            if removed_ids:
+                ScrapedProduct.objects.filter(id__in=removed_ids).update(is_active=False)
+
+            # Unchanged rows (parsed or listed on a not-modified page) were seen in this run;
+            # new/changed rows got last_seen_at from the upsert. Rows not seen keep theirs,
+            # also when removal is skipped for an incomplete crawl.
+            unchanged_ids = [stored[external_id]['id'] for external_id in diff['unchanged']]
+            now = timezone.now()
+            for start in range(0, len(unchanged_ids), settings.SCRAPE_BULK_BATCH_SIZE):
+                ScrapedProduct.objects.filter(
+                    id__in=unchanged_ids[start:start + settings.SCRAPE_BULK_BATCH_SIZE], is_active=True
+                ).update(last_seen_at=now)
+
+        return diff
+
+    def apply_crawl_policy(self, site: CompetitorSite, scraper, replay_corpus=None):
+        """
+        Set the scraper's robots.txt rules and crawl delay.
+
+        robots.txt is cached on the site for SCRAPE_ROBOTS_TTL_SECONDS; when a
+        refresh fails the previous copy keeps being used. The delay is the
+        strictest of the scraper's own delay (its floor), the site's
+        Crawl-delay/Request-rate and CompetitorSite.crawl_delay_seconds, so a
+        missing or unreadable robots.txt never makes the crawl faster.
+
+        When replaying a corpus the recorded robots.txt is used if there is one,
+        otherwise the cached copy; neither is written back to the site.
+        """
+        fresh = (
+            site.robots_fetched_at is not None
+            and (timezone.now() - site.robots_fetched_at).total_seconds() < settings.SCRAPE_ROBOTS_TTL_SECONDS
+        )
+        robots_txt = site.robots_txt
+        if replay_corpus is not None:
+            if replay_corpus.get(robots_url(scraper.base_url)) is not None:
+                # Served by the replay adapter, nothing hits the network
+                text = fetch_robots_txt(scraper.session, scraper.base_url)
+                if text is not None:
+                    robots_txt = text
+        elif not fresh:
+            url = robots_url(scraper.base_url)
+            scraper.stats['wait_seconds'] += scraper.rate_limiter.wait(url, scraper.crawl_delay, scraper.cancel_event)
+            text = fetch_robots_txt(scraper.session, scraper.base_url)
+            if text is None:
+                self.stdout.write(self.style.WARNING(f'⚠️  {site.name}: could not fetch robots.txt, using cached copy'))
+            else:
+                robots_txt = site.robots_txt = text
+                site.robots_fetched_at = timezone.now()
+                CompetitorSite.objects.filter(pk=site.pk).update(
+                    robots_txt=site.robots_txt, robots_fetched_at=site.robots_fetched_at
+                )
+
+        scraper.robots = RobotsRules(robots_txt, scraper.session.headers.get('User-Agent', '*'))
+        robots_delay = scraper.robots.crawl_delay
+        scraper_delay = scraper.crawl_delay
+        scraper.crawl_delay = max(scraper_delay, site.crawl_delay_seconds, robots_delay or 0)
+        self.stdout.write(
+            f'🤖 {site.name}: crawl delay {scraper.crawl_delay:g}s '
+            f'(robots.txt: {"none" if robots_delay is None else f"{robots_delay:g}s"}, '
+            f'scraper: {scraper_delay:g}s, site setting: {site.crawl_delay_seconds}s)'
+        )
+
+    def match_products(self, site: CompetitorSite):
+        """Link new/renamed products to our catalog; a failure here doesn't fail the scrape"""
+        try:
+            with transaction.atomic():
+                result = product_matching.match_scraped_products(ScrapedProduct.objects.filter(site=site))
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'⚠️  {site.name}: product matching failed: {e}'))
+            return
+        if result['matched'] or result['unmatched']:
+            self.stdout.write(f'🔗 {site.name}: matched {result["matched"]}, unmatched {result["unmatched"]}')
+
+    def refresh_price_comparison(self, site: CompetitorSite):
+        """Rebuild the per-variant competitor price table; a failure here doesn't fail the scrape"""
+        try:
+            with transaction.atomic():
+                result = price_comparison.refresh()
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f'⚠️  {site.name}: price comparison refresh failed: {e}'))
+            return
+        self.stdout.write(f'📊 Price comparison: {result["updated"]} variant(s) updated, {result["deleted"]} removed')
+
+    def apply_retry_policy(self, scraper):
+        """Retry/backoff limits and a fresh circuit breaker from settings"""
+        scraper.max_retries = settings.SCRAPE_MAX_RETRIES
+        scraper.backoff_base_seconds = settings.SCRAPE_BACKOFF_BASE_SECONDS
+        scraper.backoff_max_seconds = settings.SCRAPE_BACKOFF_MAX_SECONDS
+        scraper.circuit_breaker = CircuitBreaker(
+            error_rate=settings.SCRAPE_BREAKER_ERROR_RATE,
+            window=settings.SCRAPE_BREAKER_WINDOW,
+            min_requests=settings.SCRAPE_BREAKER_MIN_REQUESTS,
+        )
+
+    def removal_allowed(self, site: CompetitorSite, scraper, products_data):
+        """
+        Only a complete crawl can tell that a product disappeared - a failed
+        page or an empty result (site down, layout change) must not deactivate
+        the whole catalog.
+        """
+        if scraper.stats.get('pages_failed'):
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {site.name}: {scraper.stats["pages_failed"]} page(s) failed, not marking products as removed'
+            ))
+            return False
+        return bool(products_data or scraper.unchanged_external_ids)
+
+    def load_page_cache(self, site: CompetitorSite):
+        """Conditional fetch state from the previous run, url -> dict"""
+        return {
+            entry['url']: entry
+            for entry in PageFetchCache.objects.filter(site=site).values(
+                'url', 'etag', 'last_modified', 'content_hash', 'external_ids'
+            )
         }
 
-        scraper_class = scrapers.get(site_name.lower())
-        if scraper_class:
-            return scraper_class()
+    def save_page_cache(self, site: CompetitorSite, scraper):
+        """Persist validators for pages that were parsed (or confirmed unchanged) this run"""
+        entries = [
+            PageFetchCache(
+                site=site,
+                url=url,
+                etag=page['etag'][:255],
+                last_modified=page['last_modified'][:64],
+                content_hash=page['content_hash'],
+                external_ids=page['external_ids'],
+            )
+            for url, page in scraper.fetched_pages.items()
+            if page['external_ids'] is not None
+        ]
+        PageFetchCache.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['url'],
+            update_fields=['site', 'etag', 'last_modified', 'content_hash', 'external_ids', 'checked_at'],
+        )
 
-        return None
+    def get_scraper(self, site_name: str):
+        """Return appropriate scraper for site"""
+        return get_scraper(site_name)
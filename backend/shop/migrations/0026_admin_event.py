@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0025_alter_product_options_product_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(choices=[('orders', 'Narudžbine'), ('stock', 'Zalihe'), ('messages', 'Kontakt poruke'), ('scraping', 'Scraping')], max_length=20)),
+                ('event_type', models.CharField(help_text='Npr: new_order, order_status, low_stock', max_length=50)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Admin događaj',
+                'verbose_name_plural': 'Admin događaji',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['topic', 'id'], name='shop_admine_topic_84efda_idx')],
+            },
+        ),
+    ]
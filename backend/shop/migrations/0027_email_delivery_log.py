@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0026_admin_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDeliveryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('recipients', models.TextField(help_text='Primaoci odvojeni zarezom')),
+                ('transport', models.CharField(max_length=20)),
+                ('status', models.CharField(choices=[('sent', 'Poslat'), ('failed', 'Neuspešan')], max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=1)),
+                ('latency_ms', models.PositiveIntegerField(default=0, help_text='Ukupno trajanje slanja uključujući ponovne pokušaje')),
+                ('provider_message_id', models.CharField(blank=True, max_length=100)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Email log',
+                'verbose_name_plural': 'Email logovi',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
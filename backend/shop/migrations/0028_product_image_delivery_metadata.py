@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0027_email_delivery_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='delivery_url',
+            field=models.CharField(blank=True, help_text='Konačan URL slike (Cloudinary ili /media/)', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='format',
+            field=models.CharField(blank=True, help_text='Npr: jpg, png, webp', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0028_product_image_delivery_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='Responsive varijante (thumb/card/detail/zoom)'),
+        ),
+    ]
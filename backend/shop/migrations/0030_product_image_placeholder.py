@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0029_product_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='dominant_color',
+            field=models.CharField(blank=True, help_text='Dominantna boja, npr. #a1b2c3', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='placeholder',
+            field=models.TextField(blank=True, help_text='Mali base64 placeholder (LQIP) za instant prikaz'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0030_product_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True)),
+                ('file_name', models.CharField(help_text='Ime fajla u storage-u (Cloudinary public_id ili putanja)', max_length=500)),
+                ('delivery_url', models.CharField(blank=True, max_length=500)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('format', models.CharField(blank=True, max_length=10)),
+                ('renditions', models.JSONField(blank=True, default=dict)),
+                ('placeholder', models.TextField(blank=True)),
+                ('dominant_color', models.CharField(blank=True, max_length=7)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Image asset',
+                'verbose_name_plural': 'Image assets',
+            },
+        ),
+    ]
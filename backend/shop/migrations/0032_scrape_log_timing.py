@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0031_image_asset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapelog',
+            name='fetch_seconds',
+            field=models.FloatField(blank=True, help_text='Crawl time incl. politeness delays', null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='pages_fetched',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='save_seconds',
+            field=models.FloatField(blank=True, help_text='Time spent writing results to the database', null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='wait_seconds',
+            field=models.FloatField(blank=True, help_text='Time spent waiting for the per-host crawl delay', null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0032_scrape_log_timing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapelog',
+            name='pages_not_modified',
+            field=models.IntegerField(default=0, help_text='Pages skipped (304 or unchanged body)'),
+        ),
+        migrations.CreateModel(
+            name='PageFetchCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, help_text='Last-Modified header as sent by the server', max_length=64)),
+                ('content_hash', models.CharField(blank=True, help_text='SHA-256 of the response body', max_length=64)),
+                ('external_ids', models.JSONField(blank=True, default=list, help_text='Products found on the page when it was last parsed')),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='page_cache', to='shop.competitorsite')),
+            ],
+            options={
+                'verbose_name': 'Page fetch cache',
+                'verbose_name_plural': 'Page fetch cache',
+                'ordering': ['site', 'url'],
+            },
+        ),
+    ]
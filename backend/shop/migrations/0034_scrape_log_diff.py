@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0033_page_fetch_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapelog',
+            name='changes',
+            field=models.JSONField(blank=True, default=dict, help_text="external_ids per class: {'new': [...], 'changed': [...], 'removed': [...]}"),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='products_removed',
+            field=models.IntegerField(default=0, help_text='Products no longer listed (deactivated)'),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='products_unchanged',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='scrapelog',
+            name='products_updated',
+            field=models.IntegerField(default=0, help_text='Existing products with changed data'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0035_scrape_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapejob',
+            name='cancel_requested',
+            field=models.BooleanField(default=False, help_text='Stop the running scrape before the next page fetch'),
+        ),
+        migrations.AddField(
+            model_name='scrapejob',
+            name='current_category',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='scrapejob',
+            name='eta_seconds',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapejob',
+            name='pages_expected',
+            field=models.IntegerField(blank=True, help_text='Estimate from the last successful run', null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapejob',
+            name='pages_fetched',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scrapejob',
+            name='products_parsed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='scrapejob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], db_index=True, default='queued', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='scrapelog',
+            name='status',
+            field=models.CharField(choices=[('started', 'Started'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0036_scrape_job_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='competitorsite',
+            name='robots_fetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='competitorsite',
+            name='robots_txt',
+            field=models.TextField(blank=True, help_text='Cached robots.txt of the site'),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='crawl_delay_seconds',
+            field=models.FloatField(blank=True, help_text='Delay used (stricter of robots.txt and site setting)', null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='pages_disallowed',
+            field=models.IntegerField(default=0, help_text='Pages not requested because robots.txt disallows them'),
+        ),
+        migrations.AlterField(
+            model_name='competitorsite',
+            name='crawl_delay_seconds',
+            field=models.IntegerField(default=3, help_text='Minimum delay between requests; a stricter robots.txt Crawl-delay takes precedence'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0037_crawl_policy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapelog',
+            name='backoff_seconds',
+            field=models.FloatField(blank=True, help_text='Time spent in retry backoff', null=True),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='circuit_breaker_tripped',
+            field=models.BooleanField(default=False, help_text='Run aborted because too many requests failed'),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='request_attempts',
+            field=models.IntegerField(default=0, help_text='HTTP requests made, retries included'),
+        ),
+        migrations.AddField(
+            model_name='scrapelog',
+            name='request_retries',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0038_scrape_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('confidence', models.FloatField(default=0, help_text='0-1, 1 for manual matches')),
+                ('status', models.CharField(choices=[('auto', 'Automatic'), ('confirmed', 'Confirmed (manual)'), ('rejected', 'Rejected (manual)')], default='auto', max_length=20)),
+                ('source_name', models.CharField(help_text='Scraped name the match was computed for', max_length=300)),
+                ('matched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='competitor_matches', to='shop.product')),
+                ('scraped_product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match', to='shop.scrapedproduct')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='competitor_matches', to='shop.productvariant')),
+            ],
+            options={
+                'verbose_name': 'Product match',
+                'verbose_name_plural': 'Product matches',
+                'ordering': ['-confidence'],
+                'indexes': [models.Index(fields=['status', 'confidence'], name='shop_produc_status_e5def8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0039_product_match'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantPriceComparison',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('competitor_count', models.IntegerField(default=0, help_text='Matched active competitor products')),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('median_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('our_price', models.DecimalField(decimal_places=2, help_text='Our current price at refresh time', max_digits=10)),
+                ('price_position', models.CharField(choices=[('cheapest', 'Cheapest'), ('below_median', 'Below median'), ('above_median', 'Above median'), ('most_expensive', 'Most expensive')], max_length=20)),
+                ('price_index', models.FloatField(help_text='Our price as % of the competitor median (100 = median)')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cheapest_product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.scrapedproduct')),
+                ('cheapest_site', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='shop.competitorsite')),
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_comparison', to='shop.productvariant')),
+            ],
+            options={
+                'verbose_name': 'Variant price comparison',
+                'verbose_name_plural': 'Variant price comparisons',
+                'ordering': ['-price_index'],
+                'indexes': [models.Index(fields=['price_position', 'price_index'], name='shop_varian_price_p_0760c9_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0040_variant_price_comparison'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=10)),
+                ('period_start', models.DateField(help_text='First day of the day/week (weeks start on Monday)')),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('last_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('last_on_sale', models.BooleanField(default=False)),
+                ('last_in_stock', models.BooleanField(default=True)),
+                ('points', models.IntegerField(default=0, help_text='Raw rows summarized')),
+                ('last_recorded_at', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_rollups', to='shop.scrapedproduct')),
+            ],
+            options={
+                'verbose_name': 'Price history rollup',
+                'verbose_name_plural': 'Price history rollups',
+                'ordering': ['-period_start'],
+                'indexes': [models.Index(fields=['product', 'period', '-period_start'], name='shop_priceh_product_60f0ee_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'period', 'period_start'), name='unique_price_rollup_bucket')],
+            },
+        ),
+    ]
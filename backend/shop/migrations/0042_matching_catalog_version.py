@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:36
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0041_price_history_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingCatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Matching catalog version',
+            },
+        ),
+    ]
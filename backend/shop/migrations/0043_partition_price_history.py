@@ -0,0 +1,110 @@
+# PriceHistory as monthly range partitions on recorded_at (PostgreSQL only)
+
+from django.db import migrations
+
+# Future monthly partitions created here; rollup_price_history keeps
+# PRICE_HISTORY_PARTITIONS_AHEAD of them from then on
+PARTITIONS_AHEAD = 3
+
+# Shared by both directions: rebuild shop_pricehistory from a renamed copy,
+# keeping rows, the id sequence, indexes and foreign keys
+REBUILD_SQL = """
+DO $$
+DECLARE
+    tbl text := 'shop_pricehistory';
+    old text := 'shop_pricehistory_old';
+    seq text := 'shop_pricehistory_id_seq';
+    index_defs text[];
+    fk_defs text[];
+    max_id bigint;
+    definition text;
+    part_month date;
+BEGIN
+    IF {skip_condition} THEN
+        RETURN;
+    END IF;
+
+    SELECT array_agg(replace(indexdef, ' ON ONLY ', ' ON ')) INTO index_defs FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = tbl AND indexname NOT LIKE '%\\_pkey';
+    SELECT array_agg(format('ALTER TABLE %I ADD CONSTRAINT %I %s', tbl, conname, pg_get_constraintdef(oid)))
+        INTO fk_defs FROM pg_constraint WHERE conrelid = tbl::regclass AND contype = 'f';
+    EXECUTE format('SELECT date_trunc(''month'', MIN(recorded_at))::date, MAX(id) FROM %I', tbl) INTO part_month, max_id;
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', tbl, old);
+    {create_table}
+
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I', tbl, old);
+    -- Drops the old id sequence (and partitions), whose names are reused below
+    EXECUTE format('DROP TABLE %I', old);
+    EXECUTE format('CREATE SEQUENCE %I OWNED BY %I.id', seq, tbl);
+    PERFORM setval(seq, COALESCE(max_id, 1), max_id IS NOT NULL);
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN id SET DEFAULT nextval(%L)', tbl, seq);
+
+    FOREACH definition IN ARRAY COALESCE(index_defs, '{{}}') LOOP
+        EXECUTE definition;
+    END LOOP;
+    FOREACH definition IN ARRAY COALESCE(fk_defs, '{{}}') LOOP
+        EXECUTE definition;
+    END LOOP;
+END
+$$;
+"""
+
+IS_PARTITIONED = (
+    "EXISTS (SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+    "WHERE c.relname = tbl AND pg_table_is_visible(c.oid))"
+)
+
+# PostgreSQL requires the partition key in the primary key: (id, recorded_at).
+# Django keeps treating id as the primary key, ids still come from one sequence.
+PARTITION_SQL = REBUILD_SQL.format(
+    skip_condition=IS_PARTITIONED,
+    create_table=f"""EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                   'PARTITION BY RANGE (recorded_at)', tbl, old);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, recorded_at)', tbl);
+    part_month := COALESCE(part_month, date_trunc('month', now())::date);
+    WHILE part_month <= (date_trunc('month', now()) + interval '{PARTITIONS_AHEAD} months')::date LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       tbl || '_' || to_char(part_month, 'YYYYMM'), tbl,
+                       part_month, (part_month + interval '1 month')::date);
+        part_month := (part_month + interval '1 month')::date;
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', tbl || '_default', tbl);""",
+)
+
+UNPARTITION_SQL = REBUILD_SQL.format(
+    skip_condition=f'NOT {IS_PARTITIONED}',
+    create_table="""EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', tbl, old);
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id)', tbl);""",
+)
+
+
+class PostgreSQLRunSQL(migrations.RunSQL):
+    """RunSQL that is a no-op on other databases (SQLite in development and tests)"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0042_matching_catalog_version'),
+    ]
+
+    operations = [
+        # The table is locked while rows are copied. The model is unchanged:
+        # id stays Django's primary key and the composite database key is an
+        # implementation detail of the partitioning, so there is no state change.
+        # One statement each (lists are not split on ';' like a script)
+        PostgreSQLRunSQL(
+            sql=[PARTITION_SQL],
+            reverse_sql=[UNPARTITION_SQL],
+            state_operations=[],
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
+from django.core.files.images import ImageFile
 from django.core.validators import RegexValidator
 from django.conf import settings
 from django.utils.text import slugify
 import re
+from .pricing import effective_price
 
 
 class Category(models.Model):
@@ -138,9 +140,7 @@ class Product(models.Model):
     @property
     def current_price(self):
         """Trenutna cena proizvoda (akcijska ako je na akciji, inače osnovna)"""
-        if self.on_sale and self.sale_price:
-            return self.sale_price
-        return self.price
+        return effective_price(self.price, self.on_sale, self.sale_price)
 
     @property
     def min_price(self):
@@ -254,9 +254,7 @@ class ProductVariant(models.Model):
     @property
     def current_price(self):
         """Trenutna cena varijante (akcijska ako je na akciji, inače osnovna)"""
-        if self.on_sale and self.sale_price:
-            return self.sale_price
-        return self.price
+        return effective_price(self.price, self.on_sale, self.sale_price)
 
     @property
     def final_price(self):
@@ -278,8 +276,9 @@ def get_image_storage():
     """Get the appropriate storage backend for images"""
     from django.conf import settings
 
-    # Direktno vraćaj instancu CloudinaryMediaStorage ako je produkcija
-    if not settings.DEBUG:
+    # Direktno vraćaj instancu CloudinaryMediaStorage ako je produkcija (Cloudinary
+    # podešen u settings) - ne po settings.DEBUG, koji test runner gasi u hodu
+    if hasattr(settings, 'CLOUDINARY_STORAGE'):
         from shop.storage import CloudinaryMediaStorage
         print("[MODELS] Returning CloudinaryMediaStorage instance")
         return CloudinaryMediaStorage()
@@ -289,6 +288,36 @@ def get_image_storage():
         return default_storage
 
 
+class ImageAsset(models.Model):
+    """
+    Indeks sadržaja upload-ovanih slika (SHA-256 originalnog fajla -> sačuvan fajl).
+    Ista fotografija upload-ovana više puta koristi postojeći fajl bez ponovnog upload-a.
+    """
+    content_hash = models.CharField(max_length=64, unique=True)
+    file_name = models.CharField(max_length=500, help_text="Ime fajla u storage-u (Cloudinary public_id ili putanja)")
+
+    # Izvedena polja, kopiraju se u ProductImage pri ponovnoj upotrebi
+    delivery_url = models.CharField(max_length=500, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    format = models.CharField(max_length=10, blank=True)
+    renditions = models.JSONField(default=dict, blank=True)
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Polja koja se prenose između ImageAsset i ProductImage
+    SHARED_FIELDS = ['delivery_url', 'width', 'height', 'format', 'renditions', 'placeholder', 'dominant_color']
+
+    class Meta:
+        verbose_name = 'Image asset'
+        verbose_name_plural = 'Image assets'
+
+    def __str__(self):
+        return f"{self.file_name} ({self.content_hash[:12]})"
+
+
 class ProductImage(models.Model):
     """
     Slike proizvoda - više slika po proizvodu
@@ -306,6 +335,15 @@ class ProductImage(models.Model):
     is_primary = models.BooleanField(default=False, help_text="Glavna slika")
     order = models.IntegerField(default=0, help_text="Redosled prikaza")
 
+    # Izračunato jednom pri upload-u (serializer samo čita kolone)
+    delivery_url = models.CharField(max_length=500, blank=True, help_text="Konačan URL slike (Cloudinary ili /media/)")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    format = models.CharField(max_length=10, blank=True, help_text="Npr: jpg, png, webp")
+    renditions = models.JSONField(default=dict, blank=True, help_text="Responsive varijante (thumb/card/detail/zoom)")
+    placeholder = models.TextField(blank=True, help_text="Mali base64 placeholder (LQIP) za instant prikaz")
+    dominant_color = models.CharField(max_length=7, blank=True, help_text="Dominantna boja, npr. #a1b2c3")
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -314,7 +352,81 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"{self.product.name} - Image {self.id}"
 
+    def process_uploaded_image(self, data=None):
+        """
+        Orijentacija, uklanjanje metapodataka, smanjivanje i kompresija nove slike
+        pre upload-a; usput računa placeholder i dominantnu boju
+        """
+        from shop.image_processing import process_upload
+
+        result = process_upload(self.image.file, self.image.name, data)
+        if result is None:
+            return
+        self.image = ImageFile(result['content'], name=result['name'])
+        self.placeholder = result['placeholder']
+        self.dominant_color = result['dominant_color']
+
+    def apply_image_metadata(self, fetch=False):
+        """Popuni delivery_url, width, height i format iz storage-a"""
+        from shop.storage import get_image_metadata
+
+        metadata = get_image_metadata(self.image.storage, self.image.name, fetch=fetch)
+        self.delivery_url = metadata['url'] or ''
+        self.width = metadata['width']
+        self.height = metadata['height']
+        self.format = metadata['format'] or ''
+
+    def apply_renditions(self):
+        """Generiši responsive varijante (Cloudinary URL-ovi ili lokalni Pillow fajlovi)"""
+        from shop.image_renditions import build_renditions
+
+        self.renditions = build_renditions(self.image.storage, self.image.name, self.width, self.format)
+
+    def use_stored_image(self, source):
+        """Preuzmi već sačuvan fajl i izvedena polja iz ImageAsset-a ili druge ProductImage"""
+        self.image = source.file_name if isinstance(source, ImageAsset) else source.image.name
+        for field in ImageAsset.SHARED_FIELDS:
+            setattr(self, field, getattr(source, field))
+
+    def prepare_upload(self, upload=None):
+        """
+        Obradi i upload-uj novu sliku i popuni izvedena polja, bez upisa u bazu.
+        Koristi je save(), a bulk upload je poziva paralelno iz thread pool-a.
+
+        Args:
+            upload (tuple, optional): (sadržaj, SHA-256) iz read_upload() ako je
+                fajl već pročitan; inače se čita ovde, jednim prolazom
+        """
+        if self.image and not self.image._committed:
+            from shop.image_processing import read_upload
+
+            data, digest = upload or read_upload(self.image.file)
+            asset = ImageAsset.objects.filter(content_hash=digest).first()
+            if asset is not None:
+                # Isti sadržaj već postoji - bez obrade i upload-a
+                self.use_stored_image(asset)
+                return
+
+            self.process_uploaded_image(data)
+            self.image.save(self.image.name, self.image.file, save=False)
+            self.apply_image_metadata()
+            self.apply_renditions()
+
+            ImageAsset.objects.get_or_create(
+                content_hash=digest,
+                defaults={
+                    'file_name': self.image.name,
+                    **{field: getattr(self, field) for field in ImageAsset.SHARED_FIELDS},
+                },
+            )
+        elif self.image and not self.delivery_url:
+            self.apply_image_metadata()
+            self.apply_renditions()
+
     def save(self, *args, **kwargs):
+        # Nova slika - sačuvaj fajl pre modela da bi URL i dimenzije ušli u isti INSERT/UPDATE
+        self.prepare_upload()
+
         # Ako je ova slika primary, ostale za isti proizvod više nisu
         if self.is_primary:
             ProductImage.objects.filter(
@@ -467,5 +579,69 @@ class ContactMessage(models.Model):
         return f"{self.name} - {self.created_at.strftime('%d.%m.%Y %H:%M')}"
 
 
+
+class EmailDeliveryLog(models.Model):
+    """
+    Zapis o svakoj poslatoj (ili neuspešnoj) email poruci
+    """
+    STATUS_CHOICES = [
+        ('sent', 'Poslat'),
+        ('failed', 'Neuspešan'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    recipients = models.TextField(help_text="Primaoci odvojeni zarezom")
+    transport = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    attempts = models.PositiveSmallIntegerField(default=1)
+    latency_ms = models.PositiveIntegerField(default=0, help_text="Ukupno trajanje slanja uključujući ponovne pokušaje")
+    provider_message_id = models.CharField(max_length=100, blank=True)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Email log'
+        verbose_name_plural = 'Email logovi'
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients} ({self.status})"
+
+
+class AdminEvent(models.Model):
+    """
+    Događaji za admin panel (SSE stream) - nove narudžbine, promene statusa,
+    niske zalihe, kontakt poruke i završeni scraping
+    """
+    TOPIC_ORDERS = 'orders'
+    TOPIC_STOCK = 'stock'
+    TOPIC_MESSAGES = 'messages'
+    TOPIC_SCRAPING = 'scraping'
+
+    TOPIC_CHOICES = [
+        (TOPIC_ORDERS, 'Narudžbine'),
+        (TOPIC_STOCK, 'Zalihe'),
+        (TOPIC_MESSAGES, 'Kontakt poruke'),
+        (TOPIC_SCRAPING, 'Scraping'),
+    ]
+
+    topic = models.CharField(max_length=20, choices=TOPIC_CHOICES)
+    event_type = models.CharField(max_length=50, help_text="Npr: new_order, order_status, low_stock")
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Admin događaj'
+        verbose_name_plural = 'Admin događaji'
+        indexes = [
+            models.Index(fields=['topic', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic}:{self.event_type} #{self.id}"
+
+
 # Import scraping models
-from .models_scraping import CompetitorSite, ScrapedProduct, PriceHistory, ScrapeLog
+from .models_scraping import CompetitorSite, ScrapedProduct, PriceHistory, PriceHistoryRollup, PageFetchCache, ScrapeLog, ScrapeJob, ProductMatch, MatchingCatalogVersion, VariantPriceComparison
@@ -1,9 +1,12 @@
 """
 Models for competitor price scraping and monitoring
 """
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .pricing import effective_price
+
 
 class CompetitorSite(models.Model):
     """
@@ -15,7 +18,12 @@ class CompetitorSite(models.Model):
 
     # Scraping configuration
     scrape_interval_hours = models.IntegerField(default=24, help_text="How often to scrape (in hours)")
-    crawl_delay_seconds = models.IntegerField(default=3, help_text="Delay between requests (respect robots.txt)")
+    crawl_delay_seconds = models.IntegerField(
+        default=3,
+        help_text="Minimum delay between requests; a stricter robots.txt Crawl-delay takes precedence"
+    )
+    robots_txt = models.TextField(blank=True, help_text="Cached robots.txt of the site")
+    robots_fetched_at = models.DateTimeField(null=True, blank=True)
 
     # Metadata
     last_scraped_at = models.DateTimeField(null=True, blank=True)
@@ -124,9 +132,12 @@ class ScrapedProduct(models.Model):
     @property
     def effective_price(self):
         """Get the actual selling price (sale price if on sale, otherwise current price)"""
-        if self.on_sale and self.sale_price:
-            return self.sale_price
-        return self.current_price
+        return effective_price(self.current_price, self.on_sale, self.sale_price)
+
+    @property
+    def price_state(self):
+        """(price, on_sale, sale_price, in_stock) - a PriceHistory row is written when this changes"""
+        return (self.current_price, self.on_sale, self.sale_price, self.in_stock)
 
     @property
     def discount_percentage(self):
@@ -147,7 +158,8 @@ class PriceHistory(models.Model):
         related_name='price_history'
     )
 
-    # Price at this point in time
+    # Price at this point in time (rows are written only when the state changes,
+    # so each row is valid until the next one for the same product)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     on_sale = models.BooleanField(default=False)
     sale_price = models.DecimalField(
@@ -173,6 +185,86 @@ class PriceHistory(models.Model):
     def __str__(self):
         return f"{self.product.name} - {self.price} RSD @ {self.recorded_at.strftime('%Y-%m-%d %H:%M')}"
 
+    @property
+    def price_state(self):
+        """Same tuple as ScrapedProduct.price_state"""
+        return (self.price, self.on_sale, self.sale_price, self.in_stock)
+
+
+class PriceHistoryRollup(models.Model):
+    """
+    Daily or weekly summary of PriceHistory rows older than the raw retention
+    period (PRICE_HISTORY_RAW_DAYS), built by `manage.py rollup_price_history`.
+    Prices are effective prices (sale price when on sale).
+    """
+    PERIOD_DAY = 'day'
+    PERIOD_WEEK = 'week'
+
+    product = models.ForeignKey(
+        ScrapedProduct,
+        on_delete=models.CASCADE,
+        related_name='price_rollups'
+    )
+    period = models.CharField(
+        max_length=10,
+        choices=[
+            (PERIOD_DAY, 'Day'),
+            (PERIOD_WEEK, 'Week'),
+        ]
+    )
+    period_start = models.DateField(help_text="First day of the day/week (weeks start on Monday)")
+
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    last_price = models.DecimalField(max_digits=10, decimal_places=2)
+    last_on_sale = models.BooleanField(default=False)
+    last_in_stock = models.BooleanField(default=True)
+    points = models.IntegerField(default=0, help_text="Raw rows summarized")
+    last_recorded_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-period_start']
+        verbose_name = 'Price history rollup'
+        verbose_name_plural = 'Price history rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'period', 'period_start'], name='unique_price_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'period', '-period_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.period} {self.period_start}: {self.min_price}-{self.max_price}"
+
+
+class PageFetchCache(models.Model):
+    """
+    Conditional fetch state per scraped page (category/listing URL).
+    Lets the next run send If-None-Match / If-Modified-Since and skip
+    parsing when the body hash has not changed.
+    """
+    site = models.ForeignKey(
+        CompetitorSite,
+        on_delete=models.CASCADE,
+        related_name='page_cache'
+    )
+    url = models.URLField(max_length=500, unique=True)
+
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True, help_text="Last-Modified header as sent by the server")
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the response body")
+    external_ids = models.JSONField(default=list, blank=True, help_text="Products found on the page when it was last parsed")
+
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['site', 'url']
+        verbose_name = 'Page fetch cache'
+        verbose_name_plural = 'Page fetch cache'
+
+    def __str__(self):
+        return self.url
+
 
 class ScrapeLog(models.Model):
     """
@@ -189,17 +281,38 @@ class ScrapeLog(models.Model):
         choices=[
             ('started', 'Started'),
             ('success', 'Success'),
-            ('failed', 'Failed')
+            ('failed', 'Failed'),
+            ('cancelled', 'Cancelled')
         ]
     )
 
     products_found = models.IntegerField(default=0)
-    products_updated = models.IntegerField(default=0)
+    products_updated = models.IntegerField(default=0, help_text="Existing products with changed data")
     products_new = models.IntegerField(default=0)
+    products_unchanged = models.IntegerField(default=0)
+    products_removed = models.IntegerField(default=0, help_text="Products no longer listed (deactivated)")
+    changes = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="external_ids per class: {'new': [...], 'changed': [...], 'removed': [...]}"
+    )
 
     error_message = models.TextField(blank=True)
     duration_seconds = models.FloatField(null=True, blank=True)
 
+    # Per-site timing (sites are scraped concurrently, so these don't add up to the run time)
+    pages_fetched = models.IntegerField(default=0)
+    pages_not_modified = models.IntegerField(default=0, help_text="Pages skipped (304 or unchanged body)")
+    pages_disallowed = models.IntegerField(default=0, help_text="Pages not requested because robots.txt disallows them")
+    crawl_delay_seconds = models.FloatField(null=True, blank=True, help_text="Delay used (stricter of robots.txt and site setting)")
+    request_attempts = models.IntegerField(default=0, help_text="HTTP requests made, retries included")
+    request_retries = models.IntegerField(default=0)
+    backoff_seconds = models.FloatField(null=True, blank=True, help_text="Time spent in retry backoff")
+    circuit_breaker_tripped = models.BooleanField(default=False, help_text="Run aborted because too many requests failed")
+    fetch_seconds = models.FloatField(null=True, blank=True, help_text="Crawl time incl. politeness delays")
+    wait_seconds = models.FloatField(null=True, blank=True, help_text="Time spent waiting for the per-host crawl delay")
+    save_seconds = models.FloatField(null=True, blank=True, help_text="Time spent writing results to the database")
+
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
 
@@ -210,3 +323,242 @@ class ScrapeLog(models.Model):
 
     def __str__(self):
         return f"{self.site.name} - {self.status} @ {self.started_at.strftime('%Y-%m-%d %H:%M')}"
+
+    # Cap on external_ids stored per class in `changes`
+    MAX_CHANGE_IDS = 1000
+
+    def apply_diff(self, diff):
+        """Copy counts and (capped) ids from a scrape_diff result"""
+        self.products_new = len(diff['new'])
+        self.products_updated = len(diff['changed'])
+        self.products_unchanged = len(diff['unchanged'])
+        self.products_removed = len(diff['removed'])
+        self.changes = {
+            key: sorted(diff[key])[:self.MAX_CHANGE_IDS]
+            for key in ('new', 'changed', 'removed')
+        }
+
+
+class ScrapeJob(models.Model):
+    """
+    Queued scrape of one site, executed by the run_scrape_worker process.
+    At most one queued/running job per site (enforced by the database).
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCESS = 'success'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    site = models.ForeignKey(
+        CompetitorSite,
+        on_delete=models.CASCADE,
+        related_name='scrape_jobs'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (STATUS_QUEUED, 'Queued'),
+            (STATUS_RUNNING, 'Running'),
+            (STATUS_SUCCESS, 'Success'),
+            (STATUS_FAILED, 'Failed'),
+            (STATUS_CANCELLED, 'Cancelled'),
+        ],
+        default=STATUS_QUEUED,
+        db_index=True
+    )
+    force = models.BooleanField(default=True, help_text="Scrape even if the site is not due yet")
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    worker = models.CharField(max_length=100, blank=True, help_text="host:pid of the worker that claimed the job")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the worker")
+    log = models.ForeignKey(
+        ScrapeLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    error_message = models.TextField(blank=True)
+    cancel_requested = models.BooleanField(default=False, help_text="Stop the running scrape before the next page fetch")
+
+    # Progress, published by the worker every SCRAPE_JOB_HEARTBEAT_SECONDS
+    pages_fetched = models.IntegerField(default=0)
+    pages_expected = models.IntegerField(null=True, blank=True, help_text="Estimate from the last successful run")
+    products_parsed = models.IntegerField(default=0)
+    current_category = models.CharField(max_length=200, blank=True)
+    eta_seconds = models.FloatField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Scrape job'
+        verbose_name_plural = 'Scrape jobs'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['site'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_scrape_job_per_site',
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.site.name} - {self.status}"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def pages_remaining(self):
+        if self.pages_expected is None:
+            return None
+        return max(self.pages_expected - self.pages_fetched, 0)
+
+
+class ProductMatch(models.Model):
+    """
+    Link between a competitor product and our variant (or product without
+    variants). Computed by shop.product_matching; an admin can confirm a
+    different target or reject the match, after which it is kept as is.
+    """
+    STATUS_AUTO = 'auto'
+    STATUS_CONFIRMED = 'confirmed'
+    STATUS_REJECTED = 'rejected'
+    MANUAL_STATUSES = [STATUS_CONFIRMED, STATUS_REJECTED]
+
+    scraped_product = models.OneToOneField(
+        ScrapedProduct,
+        on_delete=models.CASCADE,
+        related_name='match'
+    )
+    product = models.ForeignKey(
+        'shop.Product',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='competitor_matches'
+    )
+    variant = models.ForeignKey(
+        'shop.ProductVariant',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='competitor_matches'
+    )
+    confidence = models.FloatField(default=0, help_text="0-1, 1 for manual matches")
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (STATUS_AUTO, 'Automatic'),
+            (STATUS_CONFIRMED, 'Confirmed (manual)'),
+            (STATUS_REJECTED, 'Rejected (manual)'),
+        ],
+        default=STATUS_AUTO
+    )
+    source_name = models.CharField(max_length=300, help_text="Scraped name the match was computed for")
+    matched_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-confidence']
+        verbose_name = 'Product match'
+        verbose_name_plural = 'Product matches'
+        indexes = [
+            models.Index(fields=['status', 'confidence']),
+        ]
+
+    def __str__(self):
+        target = self.variant or self.product or '-'
+        return f"{self.scraped_product} -> {target} ({self.confidence:.2f})"
+
+
+class MatchingCatalogVersion(models.Model):
+    """
+    Single row (pk=1): when our catalog last changed in a way that affects
+    product matching - a product or variant created, deleted or renamed.
+    Automatic matches computed before it are stale (shop.product_matching);
+    price, stock and other edits don't touch it.
+    """
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Matching catalog version'
+
+    def __str__(self):
+        return f"Catalog changed at {self.changed_at}"
+
+
+class VariantPriceComparison(models.Model):
+    """
+    Competitor prices of one of our variants, aggregated over its matched
+    ScrapedProducts (shop.price_comparison). Refreshed in bulk after every
+    scrape run, so dashboards read one row instead of aggregating scraped data.
+    """
+    POSITION_CHEAPEST = 'cheapest'
+    POSITION_BELOW_MEDIAN = 'below_median'
+    POSITION_ABOVE_MEDIAN = 'above_median'
+    POSITION_MOST_EXPENSIVE = 'most_expensive'
+
+    variant = models.OneToOneField(
+        'shop.ProductVariant',
+        on_delete=models.CASCADE,
+        related_name='price_comparison'
+    )
+    competitor_count = models.IntegerField(default=0, help_text="Matched active competitor products")
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    median_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    cheapest_site = models.ForeignKey(
+        CompetitorSite,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    cheapest_product = models.ForeignKey(
+        ScrapedProduct,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    our_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Our current price at refresh time")
+    price_position = models.CharField(
+        max_length=20,
+        choices=[
+            (POSITION_CHEAPEST, 'Cheapest'),
+            (POSITION_BELOW_MEDIAN, 'Below median'),
+            (POSITION_ABOVE_MEDIAN, 'Above median'),
+            (POSITION_MOST_EXPENSIVE, 'Most expensive'),
+        ]
+    )
+    price_index = models.FloatField(help_text="Our price as % of the competitor median (100 = median)")
+
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-price_index']
+        verbose_name = 'Variant price comparison'
+        verbose_name_plural = 'Variant price comparisons'
+        indexes = [
+            models.Index(fields=['price_position', 'price_index']),
+        ]
+
+    def __str__(self):
+        return f"{self.variant}: {self.our_price} vs {self.min_price}-{self.max_price} ({self.price_position})"
+
+    @property
+    def difference_from_cheapest(self):
+        """Our price minus the cheapest competitor price"""
+        return self.our_price - self.min_price
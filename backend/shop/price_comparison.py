@@ -0,0 +1,126 @@
+"""
+Materialized competitor price comparison per variant (VariantPriceComparison).
+
+For every variant with matched, active competitor products the table holds
+the min/median/max effective competitor price (sale price when on sale),
+the cheapest site and where our price stands. refresh() recomputes it from
+ProductMatch in a few queries and writes it with one bulk upsert; it runs at
+the end of every scrape, after a manual match and when a variant's price
+changes, so readers never aggregate ScrapedProduct themselves.
+
+Only usable matches count: automatic matches (stored only above
+PRODUCT_MATCH_MIN_CONFIDENCE) and confirmed manual ones.
+"""
+import logging
+import statistics
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models_scraping import ProductMatch, VariantPriceComparison
+from .pricing import effective_price
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+
+def price_position(our_price: Decimal, min_price: Decimal, median_price: Decimal, max_price: Decimal) -> str:
+    if our_price <= min_price:
+        return VariantPriceComparison.POSITION_CHEAPEST
+    if our_price >= max_price:
+        return VariantPriceComparison.POSITION_MOST_EXPENSIVE
+    if our_price <= median_price:
+        return VariantPriceComparison.POSITION_BELOW_MEDIAN
+    return VariantPriceComparison.POSITION_ABOVE_MEDIAN
+
+
+def _competitor_prices(variant_ids: Optional[Iterable[int]]) -> Dict[int, list]:
+    """variant_id -> [(effective price, site_id, scraped_product_id), ...]"""
+    matches = ProductMatch.objects.filter(
+        variant__isnull=False,
+        status__in=[ProductMatch.STATUS_AUTO, ProductMatch.STATUS_CONFIRMED],
+        scraped_product__is_active=True,
+    )
+    if variant_ids is not None:
+        matches = matches.filter(variant_id__in=variant_ids)
+
+    prices = defaultdict(list)
+    for variant_id, scraped_id, site_id, price, on_sale, sale_price in matches.values_list(
+        'variant_id', 'scraped_product_id', 'scraped_product__site_id',
+        'scraped_product__current_price', 'scraped_product__on_sale', 'scraped_product__sale_price',
+    ).iterator(chunk_size=settings.SCRAPE_BULK_BATCH_SIZE):
+        prices[variant_id].append((effective_price(price, on_sale, sale_price), site_id, scraped_id))
+    return prices
+
+
+def refresh(variant_ids: Optional[Iterable[int]] = None) -> Dict:
+    """
+    Recompute comparison rows for `variant_ids` (default: all variants).
+    Rows of variants that lost all their matches are deleted.
+
+    Returns:
+        {'updated': n, 'deleted': n}
+    """
+    from .models import ProductVariant
+
+    if variant_ids is not None:
+        variant_ids = set(variant_ids)
+        if not variant_ids:
+            return {'updated': 0, 'deleted': 0}
+
+    prices = _competitor_prices(variant_ids)
+    variants = ProductVariant.objects.all()
+    if variant_ids is not None:
+        variants = variants.filter(id__in=variant_ids)
+    our_prices = {
+        variant_id: effective_price(price, on_sale, sale_price)
+        for variant_id, price, on_sale, sale_price in variants.values_list('id', 'price', 'on_sale', 'sale_price')
+    }
+
+    now = timezone.now()
+    rows = []
+    for variant_id, competitors in prices.items():
+        if variant_id not in our_prices:
+            continue
+        cheapest_price, cheapest_site, cheapest_product = min(competitors)
+        values = [price for price, _, _ in competitors]
+        median_price = Decimal(statistics.median(values)).quantize(CENT)
+        max_price = max(values)
+        our_price = our_prices[variant_id]
+        rows.append(VariantPriceComparison(
+            variant_id=variant_id,
+            competitor_count=len(competitors),
+            min_price=cheapest_price,
+            median_price=median_price,
+            max_price=max_price,
+            cheapest_site_id=cheapest_site,
+            cheapest_product_id=cheapest_product,
+            our_price=our_price,
+            price_position=price_position(our_price, cheapest_price, median_price, max_price),
+            price_index=round(float(our_price / median_price) * 100, 1) if median_price else 0.0,
+            updated_at=now,
+        ))
+
+    VariantPriceComparison.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['variant'],
+        update_fields=[
+            'competitor_count', 'min_price', 'median_price', 'max_price', 'cheapest_site',
+            'cheapest_product', 'our_price', 'price_position', 'price_index', 'updated_at',
+        ],
+        batch_size=settings.SCRAPE_BULK_BATCH_SIZE,
+    )
+
+    # Every row still backed by matches was just written with updated_at=now
+    stale = VariantPriceComparison.objects.filter(updated_at__lt=now)
+    if variant_ids is not None:
+        stale = stale.filter(variant_id__in=variant_ids)
+    deleted, _ = stale.delete()
+
+    logger.info(f"Price comparison: {len(rows)} variant(s) updated, {deleted} removed")
+    return {'updated': len(rows), 'deleted': deleted}
@@ -0,0 +1,180 @@
+"""
+Price drop detection over PriceHistory.
+
+History rows are written only when a product's price state changes, so a
+product's last two rows are its current and previous price. A drop is a
+latest row whose effective price (shop.pricing.effective_price) is lower than
+the row before it.
+
+- PostgreSQL: one query; LEAD() and ROW_NUMBER() over
+  (PARTITION BY product ORDER BY recorded_at DESC), the order of the
+  (product, -recorded_at) index, filtered to the latest row per product
+- other backends (SQLite): products with a recent row are read in batches,
+  only their rows inside the lookback window, each batch ordered by that same
+  index; the first two rows per product are compared in Python, and a
+  product with a single recent row gets its previous row from one subquery
+
+Results are cached in the process until the next successful scrape finishes
+(CACHES is a DummyCache, so the Django cache can't be used for this).
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Max, OuterRef, Subquery, Window
+from django.db.models.functions import Lead, RowNumber
+from django.utils import timezone
+
+from .models_scraping import PriceHistory, ScrapedProduct, ScrapeLog
+from .pricing import effective_price, effective_price_expression
+
+logger = logging.getLogger(__name__)
+
+# Cached results are dropped once the cache holds this many filter combinations
+MAX_CACHED_QUERIES = 100
+
+_cache = {'generation': None, 'results': {}}
+_cache_lock = threading.Lock()
+
+
+def _drop(product_id, previous, current, recorded_at, min_percent) -> Optional[Dict]:
+    if not previous or current >= previous:
+        return None
+    percent = float((previous - current) / previous * 100)
+    if percent < min_percent:
+        return None
+    return {
+        'product_id': product_id,
+        'previous_price': previous,
+        'current_price': current,
+        'drop_amount': previous - current,
+        'drop_percent': round(percent, 1),
+        'dropped_at': recorded_at,
+    }
+
+
+def _history(site_id: Optional[int]):
+    history = PriceHistory.objects.filter(product__is_active=True)
+    if site_id is not None:
+        history = history.filter(product__site_id=site_id)
+    return history
+
+
+def _recent_product_ids(site_id: Optional[int], since):
+    """Products with a history row inside the window - only their latest row can be a drop"""
+    return _history(site_id).filter(recorded_at__gte=since).values('product_id')
+
+
+def _drops_window(min_percent: float, site_id: Optional[int], since) -> List[Dict]:
+    window = {
+        'partition_by': [F('product_id')],
+        'order_by': [F('recorded_at').desc(), F('id').desc()],
+    }
+    # The base filter restricts whole partitions (products), never rows within
+    # them, so LEAD still sees the row before the window start
+    rows = (
+        _history(site_id)
+        .filter(product_id__in=_recent_product_ids(site_id, since))
+        .annotate(
+            effective=effective_price_expression(),
+            previous=Window(Lead(effective_price_expression()), **window),
+            position=Window(RowNumber(), **window),
+        )
+        .filter(position=1, previous__gt=F('effective'))
+        .values_list('product_id', 'previous', 'effective', 'recorded_at')
+    )
+    drops = []
+    for product_id, previous, current, recorded_at in rows:
+        drop = _drop(product_id, previous, current, recorded_at, min_percent)
+        if drop:
+            drops.append(drop)
+    return drops
+
+
+def _drops_batched(min_percent: float, site_id: Optional[int], since) -> List[Dict]:
+    product_ids = sorted(set(_recent_product_ids(site_id, since).values_list('product_id', flat=True)))
+    batch_size = settings.SCRAPE_BULK_BATCH_SIZE
+
+    drops = []
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        # Only rows inside the window; the latest row is always one of them
+        rows = (
+            PriceHistory.objects.filter(product_id__in=batch, recorded_at__gte=since)
+            .order_by('product_id', '-recorded_at', '-id')
+            .values_list('product_id', 'price', 'on_sale', 'sale_price', 'recorded_at')
+        )
+        latest = {}
+        for product_id, price, on_sale, sale_price, recorded_at in rows.iterator(chunk_size=2000):
+            price = effective_price(price, on_sale, sale_price)
+            if product_id not in latest:
+                latest[product_id] = (price, recorded_at, None)
+            elif latest[product_id][2] is None:
+                current, current_at, _ = latest[product_id]
+                latest[product_id] = (current, current_at, price)
+
+        # One row in the window: the previous price is the last row before it
+        # (one index lookup per product)
+        single = [product_id for product_id, (_, _, previous) in latest.items() if previous is None]
+        if single:
+            before = PriceHistory.objects.filter(
+                product=OuterRef('pk'), recorded_at__lt=since
+            ).order_by('-recorded_at', '-id')
+            for product_id, previous in ScrapedProduct.objects.filter(id__in=single).annotate(
+                previous=Subquery(before.annotate(effective=effective_price_expression()).values('effective')[:1]),
+            ).values_list('id', 'previous'):
+                current, recorded_at, _ = latest[product_id]
+                latest[product_id] = (current, recorded_at, previous)
+
+        for product_id, (current, recorded_at, previous) in latest.items():
+            drop = _drop(product_id, previous, current, recorded_at, min_percent)
+            if drop:
+                drops.append(drop)
+    return drops
+
+
+def _generation():
+    """Changes when a scrape run finishes, which is the only time history grows"""
+    return ScrapeLog.objects.filter(status='success').aggregate(latest=Max('completed_at'))['latest']
+
+
+def find_price_drops(min_percent: float = 0, site_id: Optional[int] = None, days: Optional[int] = None) -> List[Dict]:
+    """
+    Products whose latest price is lower than their previous one, biggest drop first.
+
+    Args:
+        min_percent: only drops of at least this many percent
+        site_id: only products of this competitor site
+        days: only drops recorded in the last `days` days (default PRICE_DROP_DEFAULT_DAYS)
+
+    Returns:
+        [{'product_id', 'previous_price', 'current_price', 'drop_amount',
+          'drop_percent', 'dropped_at'}, ...]
+    """
+    days = settings.PRICE_DROP_DEFAULT_DAYS if days is None else days
+    key = (float(min_percent), site_id, days)
+    generation = _generation()
+
+    with _cache_lock:
+        if _cache['generation'] != generation or len(_cache['results']) >= MAX_CACHED_QUERIES:
+            _cache['generation'] = generation
+            _cache['results'] = {}
+        cached = _cache['results'].get(key)
+    if cached is not None:
+        return cached
+
+    since = timezone.now() - timedelta(days=days)
+    if connection.vendor == 'postgresql':
+        drops = _drops_window(min_percent, site_id, since)
+    else:
+        drops = _drops_batched(min_percent, site_id, since)
+    drops.sort(key=lambda drop: (-drop['drop_percent'], drop['product_id']))
+    logger.debug(f"Found {len(drops)} price drop(s) (min {min_percent}%, site {site_id}, {days} days)")
+
+    with _cache_lock:
+        if _cache['generation'] == generation:
+            _cache['results'][key] = drops
+    return drops
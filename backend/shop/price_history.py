@@ -0,0 +1,207 @@
+"""
+Retention of competitor price history.
+
+Raw PriceHistory rows are kept for PRICE_HISTORY_RAW_DAYS; older rows are
+summarized into PriceHistoryRollup (one row per product and day or week:
+min/max/last effective price) and deleted by `manage.py rollup_price_history`.
+Per product the last raw row before the cutoff is kept, because it holds the
+price still valid at the cutoff (rows are written only on change) and is the
+"previous price" for price drop detection.
+
+The cutoff is aligned to the start of a day/week, so a bucket is summarized in
+one run. Rows at or before a bucket's last_recorded_at are already in it,
+which makes re-runs (and the kept carry-over row) safe.
+
+On PostgreSQL migration 0043 turns the raw table into monthly range
+partitions on recorded_at; rollup_price_history then creates upcoming
+partitions and drops empty ones past the cutoff.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models_scraping import PriceHistory, PriceHistoryRollup
+from .pricing import effective_price
+
+logger = logging.getLogger(__name__)
+
+# Rows per DELETE ... WHERE id IN (...) (SQLite variable limit)
+DELETE_CHUNK_SIZE = 900
+
+
+def bucket_start(moment: datetime, period: str) -> date:
+    day = timezone.localtime(moment).date()
+    if period == PriceHistoryRollup.PERIOD_WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def retention_cutoff(raw_days: int, period: str, now: datetime = None) -> datetime:
+    """Start of the day/week containing now - raw_days; older rows are rolled up"""
+    start = bucket_start((now or timezone.now()) - timedelta(days=raw_days), period)
+    return timezone.make_aware(datetime.combine(start, time.min))
+
+
+def products_to_roll_up(cutoff: datetime) -> List[int]:
+    """Products with more than one raw row before the cutoff (one is always kept)"""
+    return list(
+        PriceHistory.objects.filter(recorded_at__lt=cutoff)
+        .values('product_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by('product_id')
+        .values_list('product_id', flat=True)
+    )
+
+
+def roll_up_products(product_ids: List[int], cutoff: datetime, period: str, dry_run: bool = False) -> Dict:
+    """
+    Summarize and delete the raw rows of `product_ids` older than `cutoff`.
+
+    Returns:
+        {'rollups': n, 'deleted': n}
+    """
+    rows = (
+        PriceHistory.objects.filter(product_id__in=product_ids, recorded_at__lt=cutoff)
+        .order_by('product_id', 'recorded_at', 'id')
+        .values_list('id', 'product_id', 'price', 'on_sale', 'sale_price', 'in_stock', 'recorded_at')
+    )
+    existing = {
+        (rollup.product_id, rollup.period_start): rollup
+        for rollup in PriceHistoryRollup.objects.filter(
+            product_id__in=product_ids, period=period, period_start__lt=cutoff.date()
+        )
+    }
+
+    buckets = {}
+    ids_by_product = defaultdict(list)
+    for row_id, product_id, price, on_sale, sale_price, in_stock, recorded_at in rows.iterator(chunk_size=2000):
+        ids_by_product[product_id].append(row_id)
+        key = (product_id, bucket_start(recorded_at, period))
+        rollup = buckets.get(key) or existing.get(key)
+        if rollup is not None and recorded_at <= rollup.last_recorded_at:
+            # Already summarized by an earlier run
+            continue
+
+        effective = effective_price(price, on_sale, sale_price)
+        if rollup is None:
+            rollup = PriceHistoryRollup(
+                product_id=product_id,
+                period=period,
+                period_start=key[1],
+                min_price=effective,
+                max_price=effective,
+                points=0,
+            )
+        rollup.min_price = min(rollup.min_price, effective)
+        rollup.max_price = max(rollup.max_price, effective)
+        rollup.last_price = effective
+        rollup.last_on_sale = on_sale
+        rollup.last_in_stock = in_stock
+        rollup.last_recorded_at = recorded_at
+        rollup.points += 1
+        buckets[key] = rollup
+
+    # Keep each product's last row before the cutoff
+    delete_ids = [row_id for ids in ids_by_product.values() for row_id in ids[:-1]]
+    if dry_run:
+        return {'rollups': len(buckets), 'deleted': len(delete_ids)}
+
+    with transaction.atomic():
+        PriceHistoryRollup.objects.bulk_create(
+            list(buckets.values()),
+            update_conflicts=True,
+            unique_fields=['product', 'period', 'period_start'],
+            update_fields=[
+                'min_price', 'max_price', 'last_price', 'last_on_sale', 'last_in_stock',
+                'points', 'last_recorded_at',
+            ],
+            batch_size=settings.SCRAPE_BULK_BATCH_SIZE,
+        )
+        for start in range(0, len(delete_ids), DELETE_CHUNK_SIZE):
+            PriceHistory.objects.filter(id__in=delete_ids[start:start + DELETE_CHUNK_SIZE]).delete()
+    return {'rollups': len(buckets), 'deleted': len(delete_ids)}
+
+
+# ============================================
+# PostgreSQL: mesečne particije sirove tabele
+# ============================================
+
+def _table():
+    return PriceHistory._meta.db_table
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f'{_table()}_{month:%Y%m}'
+
+
+def is_partitioned() -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def _create_partition(cursor, month: date):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{_table()}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    )
+
+
+def ensure_partitions(months_ahead: int = None) -> List[str]:
+    """Create partitions from the current month to `months_ahead` months ahead"""
+    months_ahead = settings.PRICE_HISTORY_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    month = _month_start(timezone.now().date())
+    names = []
+    with connection.cursor() as cursor:
+        for _ in range(months_ahead + 1):
+            _create_partition(cursor, month)
+            names.append(partition_name(month))
+            month = _next_month(month)
+    return names
+
+
+def drop_empty_partitions(before: datetime) -> List[str]:
+    """Drop monthly partitions that end before `before` and hold no rows"""
+    dropped = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [_table()],
+        )
+        prefix = f'{_table()}_'
+        for (name,) in cursor.fetchall():
+            suffix = name[len(prefix):]
+            if not (name.startswith(prefix) and suffix.isdigit() and len(suffix) == 6):
+                continue
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            if timezone.make_aware(datetime.combine(_next_month(month), time.min)) > before:
+                continue
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{name}")')
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'DROP TABLE "{name}"')
+                dropped.append(name)
+    return dropped
+
@@ -0,0 +1,163 @@
+"""
+Downsampled competitor price series for charts.
+
+A product's series is its PriceHistory rows in the requested range (plus the
+row before the range, which holds the price valid at its start) and, where
+raw rows were already rolled up (shop.price_history), the last price of each
+rollup bucket. Rows are change points, so the last price is repeated at the
+end of the range to draw the step up to it.
+
+The series is reduced to a fixed number of points with NumPy:
+- lttb: Largest-Triangle-Three-Buckets, keeps the visual shape
+- minmax: the lowest and highest price of equal time buckets, keeps every
+  spike (best for price charts with short sales)
+
+All products of a request are loaded with three queries (price at the start,
+raw rows, rollups), independent of their number.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models_scraping import PriceHistory, PriceHistoryRollup, ScrapedProduct
+from .pricing import effective_price_expression
+
+METHOD_LTTB = 'lttb'
+METHOD_MINMAX = 'minmax'
+METHODS = [METHOD_LTTB, METHOD_MINMAX]
+
+# Fewer points can't keep the first and last point plus one bucket
+MIN_POINTS = 3
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps"""
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    # First and last point are fixed, the rest is split into threshold - 2 buckets
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, count - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[stop:edges[bucket + 2]].mean()
+            next_y = y[stop:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        # Triangle area (doubled) of previous point, candidate and next bucket's average
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the first/last point and the lowest and highest point of equal time buckets"""
+    count = len(x)
+    if threshold >= count:
+        return np.arange(count)
+
+    buckets = max((threshold - 2) // 2, 1)
+    span = x[-1] - x[0]
+    if span <= 0:
+        return np.array([0, count - 1])
+    bucket_ids = np.minimum(((x - x[0]) / span * buckets).astype(int), buckets - 1)
+
+    # Sorted by (bucket, price): the first row of a bucket is its minimum, the last its maximum
+    order = np.lexsort((y, bucket_ids))
+    sorted_ids = bucket_ids[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    lasts = np.r_[firsts[1:] - 1, count - 1]
+    return np.unique(np.concatenate([order[firsts], order[lasts], [0, count - 1]]))
+
+
+DOWNSAMPLERS = {
+    METHOD_LTTB: lttb,
+    METHOD_MINMAX: minmax,
+}
+
+
+def load_points(product_ids: List[int], start: datetime, end: datetime) -> Dict[int, List]:
+    """product_id -> [(recorded_at, effective price), ...] in time order"""
+    carried = {}
+    raw = defaultdict(list)
+
+    # Price valid at `start`: the last row before it (one index lookup per product)
+    before = PriceHistory.objects.filter(product=OuterRef('pk'), recorded_at__lt=start).order_by('-recorded_at', '-id')
+    for product_id, recorded_at, price in ScrapedProduct.objects.filter(id__in=product_ids).annotate(
+        carried_at=Subquery(before.values('recorded_at')[:1]),
+        carried_price=Subquery(before.annotate(effective=effective_price_expression()).values('effective')[:1]),
+    ).values_list('id', 'carried_at', 'carried_price'):
+        if recorded_at is not None:
+            carried[product_id] = (start, price)
+
+    rows = (
+        PriceHistory.objects.filter(product_id__in=product_ids, recorded_at__gte=start, recorded_at__lte=end)
+        .annotate(effective=effective_price_expression())
+        .order_by('product_id', 'recorded_at', 'id')
+        .values_list('product_id', 'recorded_at', 'effective')
+    )
+    for product_id, recorded_at, price in rows.iterator(chunk_size=2000):
+        raw[product_id].append((recorded_at, price))
+
+    # Older part of the range that exists only as rollups
+    rolled = defaultdict(list)
+    for product_id, recorded_at, price in (
+        PriceHistoryRollup.objects.filter(
+            product_id__in=product_ids,
+            period=settings.PRICE_HISTORY_ROLLUP_PERIOD,
+            last_recorded_at__gte=start,
+            last_recorded_at__lte=end,
+        )
+        .order_by('product_id', 'last_recorded_at')
+        .values_list('product_id', 'last_recorded_at', 'last_price')
+    ):
+        rolled[product_id].append((recorded_at, price))
+
+    points = {}
+    for product_id in product_ids:
+        # Rollups cover what is older than the first raw row in the range (the
+        # carried row sits at `start`, so it can't be the boundary)
+        product_raw = raw.get(product_id, [])
+        first_raw = product_raw[0][0] if product_raw else None
+        older = [point for point in rolled.get(product_id, []) if first_raw is None or point[0] < first_raw]
+        points[product_id] = ([carried[product_id]] if product_id in carried else []) + older + product_raw
+    return points
+
+
+def downsample(points: List, end: datetime, threshold: int, method: str = METHOD_LTTB) -> Dict:
+    """
+    Reduce [(datetime, price), ...] to at most `threshold` points.
+
+    Returns:
+        {'t': [epoch ms, ...], 'price': [...], 'raw_points': n}
+    """
+    if not points:
+        return {'t': [], 'price': [], 'raw_points': 0}
+
+    x = np.fromiter((moment.timestamp() for moment, _ in points), dtype=np.float64, count=len(points))
+    y = np.fromiter((float(price) for _, price in points), dtype=np.float64, count=len(points))
+    if x[-1] < end.timestamp():
+        # Step function: the last price holds until the end of the range
+        x = np.append(x, end.timestamp())
+        y = np.append(y, y[-1])
+
+    keep = DOWNSAMPLERS[method](x, y, threshold)
+    return {
+        't': (x[keep] * 1000).astype(np.int64).tolist(),
+        'price': np.round(y[keep], 2).tolist(),
+        'raw_points': len(points),
+    }
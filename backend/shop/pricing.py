@@ -0,0 +1,21 @@
+"""
+Efektivna cena - jedno pravilo za naše proizvode/varijante i za konkurenciju.
+
+Akcijska cena važi kada je artikal na akciji i akcijska cena je zadata
+(nije prazna ni 0), inače važi osnovna cena. Isto pravilo u Python-u
+(effective_price) i u upitima (effective_price_expression), da se poređenja
+cena, istorija, padovi cena i grafikoni ne bi razilazili.
+"""
+from django.db.models import Case, F, Q, When
+
+
+def effective_price(price, on_sale, sale_price):
+    return sale_price if on_sale and sale_price else price
+
+
+def effective_price_expression(price_field: str = 'price'):
+    """Isto pravilo kao SQL izraz (PriceHistory: 'price', ScrapedProduct: 'current_price')"""
+    return Case(
+        When(Q(on_sale=True, sale_price__isnull=False) & ~Q(sale_price=0), then=F('sale_price')),
+        default=F(price_field),
+    )
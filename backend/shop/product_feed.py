@@ -0,0 +1,247 @@
+"""
+Product feed za agregatore cena i shopping platforme (XML i CSV).
+
+Feed se generiše prolazom kroz proizvode sa .iterator() (varijante i slike
+se učitavaju po delovima preko prefetch-a), a izlaz se strimuje klijentu red
+po red - ceo katalog nikad nije u memoriji i ne ide kroz ProductSerializer.
+
+Dok se strimuje, isti izlaz se upisuje u fajl pod PRODUCT_FEED_ROOT; sledeći
+zahtevi dobijaju gotov fajl sve dok se katalog ne promeni (signals -> invalidate).
+
+Jedan red feed-a = jedna varijanta (proizvod bez varijanti je jedan red).
+"""
+import csv
+import io
+import logging
+import os
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'xml': 'application/xml; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+CHANGED_MARKER = '.changed'
+MAX_ADDITIONAL_IMAGES = 10
+DESCRIPTION_MAX_LENGTH = 5000
+
+CSV_COLUMNS = [
+    'id', 'item_group_id', 'title', 'description', 'link', 'image_link',
+    'additional_image_link', 'availability', 'price', 'sale_price',
+    'product_type', 'mpn',
+]
+
+
+def feed_root():
+    return str(settings.PRODUCT_FEED_ROOT)
+
+
+def feed_path(fmt):
+    return os.path.join(feed_root(), f'products.{fmt}')
+
+
+# ============================================
+# PODACI
+# ============================================
+
+def _format_price(value):
+    return f'{value:.2f} {settings.PRODUCT_FEED_CURRENCY}'
+
+
+def _absolute_url(url):
+    # Lokalni storage (DEBUG) vraća /media/... putanje
+    if url and url.startswith('/'):
+        return settings.PRODUCT_FEED_MEDIA_BASE_URL.rstrip('/') + url
+    return url
+
+
+def _image_urls(product):
+    urls = []
+    for image in product.images.all():
+        url = image.delivery_url
+        if not url and image.image and image.image.name:
+            try:
+                url = image.image.url
+            except (ValueError, AttributeError):
+                url = ''
+        if url:
+            urls.append(_absolute_url(url))
+    return urls
+
+
+def _product_queryset():
+    from .models import Product, ProductVariant, ProductImage
+
+    images = ProductImage.objects.only(
+        'id', 'product_id', 'image', 'delivery_url', 'is_primary', 'order'
+    ).order_by('-is_primary', 'order', 'id')
+
+    return (
+        Product.objects
+        .select_related('category', 'subcategory')
+        .prefetch_related(
+            Prefetch('variants', queryset=ProductVariant.objects.order_by('dimension_value', 'name')),
+            Prefetch('images', queryset=images),
+        )
+        .order_by('id')
+    )
+
+
+def iter_feed_items():
+    """Redovi feed-a kao rečnici (jedan po varijanti)"""
+    site_url = settings.PRODUCT_FEED_SITE_URL.rstrip('/')
+
+    for product in _product_queryset().iterator(chunk_size=settings.PRODUCT_FEED_CHUNK_SIZE):
+        identifier = product.slug if product.slug else product.id
+        link = f'{site_url}/proizvod/{identifier}'
+        images = _image_urls(product)
+        product_type = product.category.name
+        if product.subcategory_id:
+            product_type = f'{product_type} > {product.subcategory.name}'
+
+        base = {
+            'item_group_id': str(product.id),
+            'description': (product.description or product.name)[:DESCRIPTION_MAX_LENGTH],
+            'link': link,
+            'image_link': images[0] if images else '',
+            'additional_image_link': images[1:MAX_ADDITIONAL_IMAGES + 1],
+            'product_type': product_type,
+        }
+
+        variants = list(product.variants.all())
+        if not variants:
+            yield {
+                **base,
+                'id': f'P{product.id}',
+                'title': product.name,
+                'availability': 'in_stock' if product.in_stock else 'out_of_stock',
+                'price': _format_price(product.price),
+                'sale_price': _format_price(product.sale_price) if product.on_sale and product.sale_price else '',
+                'mpn': '',
+            }
+            continue
+
+        for variant in variants:
+            yield {
+                **base,
+                'id': f'P{product.id}-V{variant.id}',
+                'title': f'{product.name} - {variant.name}',
+                'availability': 'in_stock' if product.in_stock and variant.in_stock else 'out_of_stock',
+                'price': _format_price(variant.price),
+                'sale_price': _format_price(variant.sale_price) if variant.on_sale and variant.sale_price else '',
+                'mpn': variant.sku,
+            }
+
+
+# ============================================
+# FORMATI
+# ============================================
+
+def _render_xml(items):
+    """Google Merchant RSS 2.0 format (prihvata ga većina agregatora)"""
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+    yield f'<title>Betapack</title>\n<link>{escape(settings.PRODUCT_FEED_SITE_URL)}</link>\n'
+    yield '<description>Betapack katalog proizvoda</description>\n'
+
+    for item in items:
+        parts = ['<item>']
+        for key in ('id', 'item_group_id', 'title', 'description', 'link', 'image_link'):
+            if item[key]:
+                parts.append(f'<g:{key}>{escape(item[key])}</g:{key}>')
+        for url in item['additional_image_link']:
+            parts.append(f'<g:additional_image_link>{escape(url)}</g:additional_image_link>')
+        parts.append(f"<g:availability>{item['availability']}</g:availability>")
+        parts.append(f"<g:price>{item['price']}</g:price>")
+        if item['sale_price']:
+            parts.append(f"<g:sale_price>{item['sale_price']}</g:sale_price>")
+        parts.append(f"<g:product_type>{escape(item['product_type'])}</g:product_type>")
+        if item['mpn']:
+            parts.append(f"<g:mpn>{escape(item['mpn'])}</g:mpn>")
+        parts.append('</item>\n')
+        yield ''.join(parts)
+
+    yield '</channel>\n</rss>\n'
+
+
+def _render_csv(items):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(CSV_COLUMNS)
+    yield flush()
+    for item in items:
+        row = dict(item, additional_image_link=','.join(item['additional_image_link']))
+        writer.writerow([row[column] for column in CSV_COLUMNS])
+        yield flush()
+
+
+RENDERERS = {
+    'xml': _render_xml,
+    'csv': _render_csv,
+}
+
+
+# ============================================
+# KEŠ
+# ============================================
+
+def get_cached_feed(fmt):
+    """Putanja do gotovog feed fajla ili None ako ga treba generisati"""
+    path = feed_path(fmt)
+    return path if os.path.exists(path) else None
+
+
+def stream_feed(fmt):
+    """
+    Generator koji strimuje feed i usput ga upisuje u keš fajl.
+    Fajl se zadržava samo ako je generisanje završeno i katalog se
+    u međuvremenu nije menjao.
+    """
+    root = feed_root()
+    os.makedirs(root, exist_ok=True)
+    started = time.time()
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix='.tmp')
+    completed = False
+
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as cache_file:
+            for chunk in RENDERERS[fmt](iter_feed_items()):
+                cache_file.write(chunk)
+                yield chunk.encode('utf-8')
+        completed = True
+    finally:
+        marker = os.path.join(root, CHANGED_MARKER)
+        if completed and not (os.path.exists(marker) and os.path.getmtime(marker) >= started):
+            os.replace(tmp_path, feed_path(fmt))
+            logger.info(f"Product feed ({fmt}) cached in {time.time() - started:.2f}s")
+        elif os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def invalidate():
+    """Katalog je promenjen - obriši keširane feed-ove"""
+    root = feed_root()
+    try:
+        os.makedirs(root, exist_ok=True)
+        marker = os.path.join(root, CHANGED_MARKER)
+        with open(marker, 'a'):
+            os.utime(marker, None)
+        for fmt in FORMATS:
+            if os.path.exists(feed_path(fmt)):
+                os.remove(feed_path(fmt))
+    except OSError as e:
+        logger.warning(f"Could not invalidate product feed: {e}")
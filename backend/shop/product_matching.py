@@ -0,0 +1,277 @@
+"""
+Matching of competitor products (ScrapedProduct) to our catalog
+(ProductVariant, or Product when it has no variants).
+
+Names are normalized into canonical tokens:
+- dimensions: "Kutija 40x40x2.8", "40×40×2,8mm", "40 X 40 X 2.80 mm" -> "dim:40x40x2.8",
+  diameters "Ø20" / "fi 20" -> "dim:d20"
+- words: lowercase, Cyrillic transliterated, diacritics stripped, prefix-stemmed
+  ("kutija"/"kutije" -> "kutij"), filler words dropped
+
+An inverted index (token -> catalog entries) gives the candidates for a
+scraped name; each is scored by shared IDF-weighted word tokens and
+agreement of dimensions. The best candidate is stored as a ProductMatch
+with its confidence.
+
+Matching is incremental: only scraped rows without a match, renamed since
+they were matched, or matched before our catalog last changed are scored.
+Only changes that can move a match count as a catalog change: a product or
+variant created, deleted or renamed (MatchingCatalogVersion, bumped from
+shop.signals) - not price or stock edits.
+Deleting a variant deletes its matches, so those rows are matched again.
+Manual matches (confirmed/rejected) are never touched.
+"""
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models_scraping import MatchingCatalogVersion, ProductMatch, ScrapedProduct
+
+logger = logging.getLogger(__name__)
+
+DIMENSION_PREFIX = 'dim:'
+
+CYRILLIC = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ђ': 'dj', 'е': 'e', 'ж': 'z',
+    'з': 'z', 'и': 'i', 'ј': 'j', 'к': 'k', 'л': 'l', 'љ': 'lj', 'м': 'm', 'н': 'n',
+    'њ': 'nj', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'ћ': 'c', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'c', 'џ': 'dz', 'ш': 's', 'đ': 'dj',
+}
+
+STOPWORDS = {'i', 'za', 'od', 'sa', 'na', 'u', 'mm', 'cm', 'm', 'kom', 'komad', 'cena', 'rsd', 'din'}
+
+NUMBER = r'\d+(?:[.,]\d+)?'
+UNIT = r'(?:\s*(?:mm|cm))?'
+DIMENSION_RE = re.compile(rf'({NUMBER}){UNIT}((?:\s*[x×*]\s*{NUMBER}{UNIT})+)')
+DIAMETER_RE = re.compile(rf'(?:ø|⌀|φ|\bfi)\s*({NUMBER})')
+WORD_RE = re.compile(r'[a-z0-9]+')
+CYRILLIC_TIMES_RE = re.compile(r'(?<=\d)\s*х\s*(?=\d)')
+
+STEM_LENGTH = 5
+
+
+def _number(text: str) -> str:
+    """'2,80' -> '2.8', '03' -> '3'"""
+    value = float(text.replace(',', '.'))
+    return f'{value:g}'
+
+
+def _plain(text: str) -> str:
+    # Cyrillic "х" between numbers is a dimension separator, not "h"
+    text = CYRILLIC_TIMES_RE.sub('x', text.lower())
+    text = ''.join(CYRILLIC.get(char, char) for char in text)
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def normalize(name: str) -> Set[str]:
+    """Canonical tokens of a product name (see module docstring)"""
+    text = _plain(name)
+    tokens = set()
+
+    def dimension(match):
+        numbers = [match.group(1)] + re.findall(NUMBER, match.group(2))
+        tokens.add(DIMENSION_PREFIX + 'x'.join(_number(n) for n in numbers))
+        return ' '
+
+    def diameter(match):
+        tokens.add(f'{DIMENSION_PREFIX}d{_number(match.group(1))}')
+        return ' '
+
+    text = DIMENSION_RE.sub(dimension, text)
+    text = DIAMETER_RE.sub(diameter, text)
+
+    for word in WORD_RE.findall(text):
+        if word in STOPWORDS:
+            continue
+        if word.isdigit():
+            tokens.add(_number(word))
+        elif len(word) > 1:
+            tokens.add(word[:STEM_LENGTH])
+    return tokens
+
+
+def _split(tokens: Set[str]) -> Tuple[Set[str], Set[str]]:
+    dimensions = {t for t in tokens if t.startswith(DIMENSION_PREFIX)}
+    return dimensions, tokens - dimensions
+
+
+class CatalogIndex:
+    """Inverted index over our variants (and products without variants)"""
+
+    def __init__(self, entries: List[Tuple[int, Optional[int], Set[str]]]):
+        # entries: (product_id, variant_id or None, tokens)
+        self.entries = entries
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for position, (_, _, tokens) in enumerate(entries):
+            for token in tokens:
+                self.postings[token].append(position)
+
+        count = len(entries) or 1
+        self.idf = {token: math.log(1 + count / len(positions)) for token, positions in self.postings.items()}
+        self._weights = [sum(self.idf[t] for t in _split(tokens)[1]) for _, _, tokens in entries]
+
+    @classmethod
+    def build(cls) -> 'CatalogIndex':
+        from .models import Product, ProductVariant
+
+        product_names = dict(Product.objects.values_list('id', 'name'))
+        entries = []
+        with_variants = set()
+        for variant_id, product_id, name in ProductVariant.objects.values_list('id', 'product_id', 'name'):
+            with_variants.add(product_id)
+            entries.append((product_id, variant_id, normalize(f'{product_names[product_id]} {name}')))
+        for product_id, name in product_names.items():
+            if product_id not in with_variants:
+                entries.append((product_id, None, normalize(name)))
+        return cls(entries)
+
+    def best_match(self, name: str) -> Tuple[Optional[int], Optional[int], float]:
+        """(product_id, variant_id, confidence) of the best candidate, (None, None, 0) if none"""
+        tokens = normalize(name)
+        dimensions, words = _split(tokens)
+        word_weight = sum(self.idf.get(t, 0) for t in words)
+
+        candidates = set()
+        for token in tokens:
+            candidates.update(self.postings.get(token, ()))
+
+        best = (None, None, 0.0)
+        for position in candidates:
+            product_id, variant_id, entry_tokens = self.entries[position]
+            entry_dimensions, entry_words = _split(entry_tokens)
+
+            shared = sum(self.idf[t] for t in words & entry_words)
+            denominator = math.sqrt(word_weight * self._weights[position])
+            word_score = shared / denominator if denominator else 0.0
+
+            if dimensions and entry_dimensions:
+                if dimensions & entry_dimensions:
+                    confidence = 0.5 + 0.5 * word_score
+                else:
+                    # Same kind of product, different size
+                    confidence = 0.3 * word_score
+            elif dimensions or entry_dimensions:
+                confidence = 0.7 * word_score
+            else:
+                confidence = word_score
+
+            if confidence > best[2]:
+                best = (product_id, variant_id, round(confidence, 3))
+        return best
+
+
+def catalog_updated_at():
+    """Last catalog change that affects matching (None if none was recorded)"""
+    return MatchingCatalogVersion.objects.filter(pk=1).values_list('changed_at', flat=True).first()
+
+
+def catalog_changed():
+    """Mark every automatic match as stale (a product/variant was created, deleted or renamed)"""
+    MatchingCatalogVersion.objects.update_or_create(pk=1, defaults={'changed_at': timezone.now()})
+
+
+def pending(queryset=None):
+    """
+    Scraped rows that need (re)matching: never matched, renamed since, or
+    matched automatically before the last change of our catalog
+    """
+    queryset = ScrapedProduct.objects.all() if queryset is None else queryset
+    auto = Q(match__status=ProductMatch.STATUS_AUTO)
+    stale = ~Q(match__source_name=F('name'))
+    catalog_changed = catalog_updated_at()
+    if catalog_changed is not None:
+        stale |= Q(match__matched_at__lt=catalog_changed)
+    return queryset.filter(Q(match__isnull=True) | (auto & stale))
+
+
+def match_scraped_products(queryset=None, rebuild: bool = False, index: CatalogIndex = None) -> Dict:
+    """
+    Match scraped products to our catalog and store the results.
+
+    Args:
+        queryset: ScrapedProduct rows to consider (default: all)
+        rebuild: recompute every automatic match, not only pending() rows
+
+    Returns:
+        {'matched': n, 'unmatched': n, 'rebuilt': bool}
+    """
+    base = ScrapedProduct.objects.all() if queryset is None else queryset
+    if rebuild:
+        rows = base.exclude(match__status__in=ProductMatch.MANUAL_STATUSES)
+    else:
+        rows = pending(base)
+    rows = list(rows.values_list('id', 'name'))
+
+    result = {'matched': 0, 'unmatched': 0, 'rebuilt': rebuild}
+    if not rows:
+        return result
+
+    # Taken before the catalog is read, so a change during the run leaves the rows stale
+    now = timezone.now()
+    index = index or CatalogIndex.build()
+    min_confidence = settings.PRODUCT_MATCH_MIN_CONFIDENCE
+
+    matches = []
+    for scraped_id, name in rows:
+        product_id, variant_id, confidence = index.best_match(name)
+        if confidence < min_confidence:
+            product_id, variant_id = None, None
+        result['matched' if product_id else 'unmatched'] += 1
+        matches.append(ProductMatch(
+            scraped_product_id=scraped_id,
+            product_id=product_id,
+            variant_id=variant_id,
+            confidence=confidence,
+            status=ProductMatch.STATUS_AUTO,
+            source_name=name,
+            matched_at=now,
+        ))
+
+    ProductMatch.objects.bulk_create(
+        matches,
+        update_conflicts=True,
+        unique_fields=['scraped_product'],
+        update_fields=['product', 'variant', 'confidence', 'status', 'source_name', 'matched_at'],
+        batch_size=settings.SCRAPE_BULK_BATCH_SIZE,
+    )
+    logger.info(f"Matched {result['matched']} of {len(rows)} scraped product(s) (rebuild={rebuild})")
+    return result
+
+
+def set_manual_match(scraped: ScrapedProduct, product_id: Optional[int] = None, variant_id: Optional[int] = None) -> ProductMatch:
+    """
+    Manual override: link to a variant/product (confirmed) or to nothing (rejected).
+    Automatic matching never changes it again until clear_manual_match().
+    """
+    from .models import ProductVariant
+
+    if variant_id is not None:
+        product_id = ProductVariant.objects.values_list('product_id', flat=True).get(pk=variant_id)
+
+    match, _ = ProductMatch.objects.update_or_create(
+        scraped_product=scraped,
+        defaults={
+            'product_id': product_id,
+            'variant_id': variant_id,
+            'confidence': 1.0 if product_id else 0.0,
+            'status': ProductMatch.STATUS_CONFIRMED if product_id else ProductMatch.STATUS_REJECTED,
+            'source_name': scraped.name,
+            'matched_at': timezone.now(),
+        },
+    )
+    return match
+
+
+def clear_manual_match(scraped: ScrapedProduct) -> Optional[ProductMatch]:
+    """Drop a manual override and match the product automatically again"""
+    ProductMatch.objects.filter(scraped_product=scraped).delete()
+    match_scraped_products(ScrapedProduct.objects.filter(pk=scraped.pk))
+    return ProductMatch.objects.filter(scraped_product=scraped).first()
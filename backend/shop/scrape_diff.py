@@ -0,0 +1,96 @@
+"""
+Scrape-run diff: compares what a run saw with what is stored for the site.
+
+Classification per external_id:
+- new:       scraped now, not stored yet
+- changed:   scraped now, stored, but a tracked field differs (or it was inactive)
+- unchanged: scraped now (or listed on a page that was not modified) and identical
+- removed:   stored as active but not seen in this run
+
+Everything is done on in-memory sets/dicts built from one query, so the
+command can write new/changed rows in bulk and deactivate removed ones with
+a single UPDATE.
+
+Scraped values are normalized to what the database returns for each field
+(None -> '' for text, floats/strings -> Decimal with the field's decimal
+places) before comparing, so equal values never look changed.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable
+
+from django.db import models
+
+from shop.models_scraping import ScrapedProduct
+
+# Fields whose change makes a product "changed"
+TRACKED_FIELDS = [
+    'name', 'category', 'description', 'current_price', 'on_sale', 'sale_price',
+    'original_price', 'product_url', 'image_url', 'in_stock',
+]
+
+# Defaults used by the scrapers for optional keys
+FIELD_DEFAULTS = {
+    'category': '',
+    'description': '',
+    'on_sale': False,
+    'sale_price': None,
+    'original_price': None,
+    'image_url': '',
+    'in_stock': True,
+}
+
+
+def normalize_value(field_name: str, value):
+    """Scraped value as ScrapedProduct stores and returns it"""
+    field = ScrapedProduct._meta.get_field(field_name)
+    if value is None:
+        if not field.null and isinstance(field, (models.CharField, models.TextField)):
+            return ''
+        return None
+    value = field.to_python(value)
+    if isinstance(field, models.DecimalField):
+        value = value.quantize(Decimal(1).scaleb(-field.decimal_places))
+    return value
+
+
+def scraped_values(data: Dict) -> tuple:
+    """Normalized tracked field values of a scraped product dict, in TRACKED_FIELDS order"""
+    return tuple(
+        normalize_value(field, data[field] if field not in FIELD_DEFAULTS else data.get(field, FIELD_DEFAULTS[field]))
+        for field in TRACKED_FIELDS
+    )
+
+
+def diff_scrape(stored: Dict[str, Dict], scraped: Dict[str, Dict], seen_unchanged: Iterable[str] = ()) -> Dict:
+    """
+    Args:
+        stored: external_id -> {'values': tuple in TRACKED_FIELDS order, 'is_active': bool, ...}
+        scraped: external_id -> scraped product dict (this run)
+        seen_unchanged: external_ids listed on pages skipped as not modified
+
+    Returns:
+        {'new': [...], 'changed': [...], 'unchanged': [...], 'removed': [...]} of external_ids
+    """
+    result = {'new': [], 'changed': [], 'unchanged': [], 'removed': []}
+
+    for external_id, data in scraped.items():
+        current = stored.get(external_id)
+        if current is None:
+            result['new'].append(external_id)
+        elif not current['is_active'] or current['values'] != scraped_values(data):
+            result['changed'].append(external_id)
+        else:
+            result['unchanged'].append(external_id)
+
+    seen = set(scraped)
+    for external_id in set(seen_unchanged) - seen:
+        if external_id in stored:
+            result['unchanged'].append(external_id)
+            seen.add(external_id)
+
+    result['removed'] = [
+        external_id
+        for external_id, current in stored.items()
+        if current['is_active'] and external_id not in seen
+    ]
+    return result
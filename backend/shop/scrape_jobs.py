@@ -0,0 +1,262 @@
+"""
+Database-backed queue of competitor scrape jobs.
+
+The API only enqueues (one ScrapeJob row per site); the work is done by a
+separate process, `python manage.py run_scrape_worker`, so scrapes survive
+web worker restarts and never compete with request handling.
+
+- dedup: a partial unique constraint allows one queued/running job per site,
+  enqueue() returns the existing job instead of creating a second one
+- locking: a worker claims a job with a conditional UPDATE
+  (status queued -> running), so several workers never run the same job
+- crash recovery: a running job whose heartbeat is older than
+  SCRAPE_JOB_STALE_SECONDS is failed, which frees the site for a new job.
+  The heartbeat comes from JobMonitor's own thread, not from page progress,
+  so a slow page never looks like a dead worker; a job that was reaped
+  anyway is stopped and never flipped back from failed
+- progress/cancellation: JobMonitor publishes pages fetched/expected,
+  products parsed, current category and ETA, and turns cancel_requested
+  into an event that ends the scraper's crawl delay/backoff waits and is
+  checked before each page fetch
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models_scraping import CompetitorSite, ScrapeJob, ScrapeLog
+
+logger = logging.getLogger(__name__)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(site: CompetitorSite, force: bool = True, user=None):
+    """
+    Queue a scrape of `site` unless one is already queued or running.
+
+    Returns:
+        (job, created)
+    """
+    existing = ScrapeJob.objects.filter(site=site, status__in=ScrapeJob.ACTIVE_STATUSES).first()
+    if existing:
+        return existing, False
+
+    try:
+        with transaction.atomic():
+            job = ScrapeJob.objects.create(site=site, force=force, requested_by=user)
+        return job, True
+    except IntegrityError:
+        # Another request queued the same site in the meantime
+        return ScrapeJob.objects.get(site=site, status__in=ScrapeJob.ACTIVE_STATUSES), False
+
+
+def claim_next(worker: str):
+    """Take the oldest queued job, or None if the queue is empty"""
+    while True:
+        job = ScrapeJob.objects.filter(status=ScrapeJob.STATUS_QUEUED).order_by('created_at', 'id').first()
+        if job is None:
+            return None
+
+        now = timezone.now()
+        claimed = ScrapeJob.objects.filter(pk=job.pk, status=ScrapeJob.STATUS_QUEUED).update(
+            status=ScrapeJob.STATUS_RUNNING,
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+        # Lost the race to another worker - try the next one
+
+
+def fail_stale_jobs():
+    """Fail running jobs whose worker stopped sending heartbeats"""
+    cutoff = timezone.now() - timedelta(seconds=settings.SCRAPE_JOB_STALE_SECONDS)
+    count = ScrapeJob.objects.filter(
+        status=ScrapeJob.STATUS_RUNNING,
+        heartbeat_at__lt=cutoff,
+    ).update(
+        status=ScrapeJob.STATUS_FAILED,
+        error_message='Worker stopped responding',
+        finished_at=timezone.now(),
+    )
+    if count:
+        logger.warning(f"Failed {count} stale scrape job(s)")
+    return count
+
+
+def enqueue_due_sites():
+    """Queue every active site whose scrape interval has passed"""
+    queued = []
+    for site in CompetitorSite.objects.filter(is_active=True):
+        if site.needs_scraping:
+            job, created = enqueue(site, force=False)
+            if created:
+                queued.append(job)
+    return queued
+
+
+class JobMonitor(threading.Thread):
+    """
+    Runs next to a job in the worker: every SCRAPE_JOB_HEARTBEAT_SECONDS it
+    writes the heartbeat, then the scraper's progress, and picks up cancel
+    requests, which interrupt the scraper's waits and stop it before its next
+    fetch. If the job is no longer running (reaped by fail_stale_jobs) the
+    scraper is stopped the same way.
+    """
+
+    def __init__(self, job: ScrapeJob):
+        super().__init__(daemon=True)
+        self.job_id = job.pk
+        self.site_id = job.site_id
+        self.scraper = None
+        self.pages_expected = None
+        self.started = time.monotonic()
+        self.cancel_event = threading.Event()
+        self.stopped = threading.Event()
+        self.reaped = False
+
+    def attach(self, scraper):
+        """Called by scrape_site once the scraper exists"""
+        scraper.cancel_event = self.cancel_event
+        self.pages_expected = self._expected_pages(scraper)
+        self.started = time.monotonic()
+        self.scraper = scraper
+
+    def _expected_pages(self, scraper):
+        # Listings paginate, so the last successful run is the best estimate
+        last_pages = ScrapeLog.objects.filter(
+            site_id=self.site_id, status='success', pages_fetched__gt=0
+        ).order_by('-started_at').values_list('pages_fetched', flat=True).first()
+        return last_pages or len(getattr(scraper, 'categories', [])) or None
+
+    def progress(self):
+        """Current progress as ScrapeJob field values"""
+        scraper = self.scraper
+        if scraper is None:
+            return {}
+
+        fetched = scraper.stats['pages_fetched']
+        expected = max(self.pages_expected, fetched) if self.pages_expected else None
+        eta = None
+        if expected is not None:
+            per_page = (time.monotonic() - self.started) / fetched if fetched else scraper.crawl_delay
+            eta = round((expected - fetched) * per_page, 1)
+
+        return {
+            'pages_fetched': fetched,
+            'pages_expected': expected,
+            'products_parsed': scraper.stats['products_parsed'],
+            'current_category': scraper.current_category[:200],
+            'eta_seconds': eta,
+        }
+
+    def heartbeat(self):
+        running = ScrapeJob.objects.filter(pk=self.job_id, status=ScrapeJob.STATUS_RUNNING)
+        if not running.update(heartbeat_at=timezone.now()):
+            logger.warning(f"Scrape job #{self.job_id} is no longer running, stopping the scraper")
+            self.reaped = True
+            self.cancel_event.set()
+            return
+        if running.filter(cancel_requested=True).exists():
+            self.cancel_event.set()
+
+    def publish(self):
+        ScrapeJob.objects.filter(pk=self.job_id, status=ScrapeJob.STATUS_RUNNING).update(**self.progress())
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.SCRAPE_JOB_HEARTBEAT_SECONDS):
+                # Separate steps: a failing progress update must not stop the heartbeat
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    logger.warning(f"Scrape job #{self.job_id} heartbeat failed: {e}")
+                try:
+                    self.publish()
+                except Exception as e:
+                    logger.warning(f"Scrape job #{self.job_id} progress update failed: {e}")
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def request_cancel(job: ScrapeJob) -> bool:
+    """
+    Cancel a queued job right away, or ask the worker to stop a running one.
+    Returns False if the job already finished.
+    """
+    now = timezone.now()
+    if ScrapeJob.objects.filter(pk=job.pk, status=ScrapeJob.STATUS_QUEUED).update(
+        status=ScrapeJob.STATUS_CANCELLED, cancel_requested=True, finished_at=now
+    ):
+        return True
+    return bool(ScrapeJob.objects.filter(pk=job.pk, status=ScrapeJob.STATUS_RUNNING).update(cancel_requested=True))
+
+
+def run_job(job: ScrapeJob, command):
+    """
+    Execute a claimed job with a scrape_competitors Command instance
+    (its stdout receives the progress output).
+
+    The result is written only while the job is still running; a job failed
+    by fail_stale_jobs in the meantime keeps its status and is returned as
+    stored.
+    """
+    monitor = JobMonitor(job)
+    monitor.start()
+    try:
+        log = command.scrape_site(job.site, force=job.force, monitor=monitor)
+    except Exception as e:
+        logger.error(f"Scrape job #{job.pk} crashed: {e}", exc_info=True)
+        job.status = ScrapeJob.STATUS_FAILED
+        job.error_message = str(e)
+    else:
+        job.log = log
+        if log is None:
+            # Not due for scraping (force=False)
+            job.status = ScrapeJob.STATUS_SUCCESS
+        elif log.status == 'success':
+            job.status = ScrapeJob.STATUS_SUCCESS
+        elif log.status == 'cancelled':
+            job.status = ScrapeJob.STATUS_CANCELLED
+        else:
+            job.status = ScrapeJob.STATUS_FAILED
+            job.error_message = log.error_message
+    finally:
+        monitor.stop()
+
+    result = monitor.progress()
+    if job.status == ScrapeJob.STATUS_SUCCESS:
+        result['pages_expected'] = result.get('pages_fetched', job.pages_fetched)
+        result['eta_seconds'] = 0
+    else:
+        result['eta_seconds'] = None
+    now = timezone.now()
+    # Conditional, so a reaped job (failed, site freed for a new job) is never
+    # flipped back; cancel_requested may have been set meanwhile and is kept
+    finished = ScrapeJob.objects.filter(pk=job.pk, status=ScrapeJob.STATUS_RUNNING).update(
+        status=job.status,
+        log=job.log,
+        error_message=job.error_message,
+        finished_at=now,
+        heartbeat_at=now,
+        **result,
+    )
+    if not finished:
+        logger.warning(f"Scrape job #{job.pk} was reaped while running, result discarded")
+    job.refresh_from_db()
+    return job
@@ -1,12 +1,34 @@
-from .base import BaseScraper
+from .base import BaseScraper, ScrapeCancelled, UnchangedPage
+from .politeness import CircuitOpen
 from .joilart_scraper import JoilArtScraper
 from .jeepcommerce_scraper import JeepCommerceScraper
 from .hanan_scraper import HananScraper
 from .velog_scraper import VelogScraper
 from .ironworks_scraper import IronWorksScraper
 
+# CompetitorSite.name (lowercase) -> scraper class
+SCRAPERS = {
+    'joilart': JoilArtScraper,
+    'jeepcommerce': JeepCommerceScraper,
+    'hanan': HananScraper,
+    'velog': VelogScraper,
+    'ironworks': IronWorksScraper,
+}
+
+
+def get_scraper(site_name: str):
+    """Return a scraper instance for a site name, or None"""
+    scraper_class = SCRAPERS.get(site_name.lower())
+    return scraper_class() if scraper_class else None
+
+
 __all__ = [
+    'SCRAPERS',
+    'get_scraper',
     'BaseScraper',
+    'ScrapeCancelled',
+    'CircuitOpen',
+    'UnchangedPage',
     'JoilArtScraper',
     'JeepCommerceScraper',
     'HananScraper',
@@ -1,21 +1,85 @@
 """
 Base scraper class with common functionality
 """
+import hashlib
+import random
 import time
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from typing import List, Dict, Optional
 from decimal import Decimal
 
+from .politeness import CircuitBreaker, host_rate_limiter, retry_after_seconds
+
+# Responses worth retrying (rate limited / temporary server trouble)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UnchangedPage:
+    """
+    Returned by fetch_page instead of a soup when the page is the same as on
+    the last run (304 Not Modified or identical body hash). Parsing and DB
+    writes are skipped; external_ids lists the products the page had then.
+    """
+
+    def __init__(self, url: str, external_ids: List[str]):
+        self.url = url
+        self.external_ids = external_ids
+
+
+class ScrapeCancelled(Exception):
+    """Raised by fetch_page when the run was cancelled (cancel_event is set)"""
+
+
+class ContainerStrainer(SoupStrainer):
+    """
+    Parse-time filter keeping elements that have any of `classes` (or are one
+    of `tags`), with all their descendants - the same elements a selector like
+    '.product, article' matches.
+
+    SoupStrainer(class_=...) is not used because while parsing the class
+    attribute is still one unsplit string ("product type-product ..."), so it
+    would only match elements whose class is exactly that value.
+    """
+
+    def __init__(self, classes=(), tags=()):
+        super().__init__()
+        self.classes = set(classes)
+        self.tags = set(tags)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        if name in self.tags:
+            return True
+        classes = (attrs or {}).get('class') or ''
+        if not isinstance(classes, str):
+            classes = ' '.join(classes)
+        return not self.classes.isdisjoint(classes.split())
+
 
 class BaseScraper:
     """Base class for all site-specific scrapers"""
 
+    # Limits HTML parsing to the product containers the scraper reads
+    # (None parses the whole page). Each scraper's extract_products() must
+    # give the same result on a strained tree as on the full one.
+    product_strainer: Optional[SoupStrainer] = None
+
+    # Retries of one page (connection errors, 429, 5xx); scrape_competitors
+    # overrides these from settings
+    max_retries = 3
+    backoff_base_seconds = 2.0
+    backoff_max_seconds = 60.0
+    # A longer Retry-After gives up on the page instead of sleeping
+    max_retry_after_seconds = 120.0
+
     def __init__(self, site_config: dict):
         self.site_name = site_config.get('name')
         self.base_url = site_config.get('url')
-        # Default 10s delay to respect strictest robots.txt (velog.rs)
+        # Minimum delay; scrape_competitors' crawl policy raises it to robots.txt
+        # Crawl-delay or CompetitorSite.crawl_delay_seconds when those are stricter
         self.crawl_delay = site_config.get('delay', 10)
+        # RobotsRules of the site (None = not checked)
+        self.robots = None
 
         # Realistic browser headers to avoid being blocked
         self.headers = {
@@ -31,23 +95,190 @@ class BaseScraper:
         self.session = requests.Session()
         self.session.headers.update(self.headers)
 
+        # Shared across scrapers so one host is never hit faster than crawl_delay
+        self.rate_limiter = host_rate_limiter
+
+        # Per-run timing, copied into ScrapeLog by scrape_competitors
+        self.stats = {
+            'pages_fetched': 0, 'pages_not_modified': 0, 'pages_failed': 0,
+            'pages_disallowed': 0, 'wait_seconds': 0.0, 'request_seconds': 0.0, 'products_parsed': 0,
+            'attempts': 0, 'retries': 0, 'backoff_seconds': 0.0,
+        }
+        # Aborts the run once too many requests to the site fail
+        self.circuit_breaker = CircuitBreaker()
+
+        # Progress/cancellation of the current run (used by scrape jobs)
+        self.current_category = ''
+        self.cancel_event = None  # threading.Event, checked before every fetch and ends waits early
+
+        # Conditional fetch cache: url -> {'etag', 'last_modified', 'content_hash', 'external_ids'}
+        # Loaded and persisted by scrape_competitors; empty means every page is parsed
+        self.page_cache = {}
+        # Pages fetched this run, url -> same dict as page_cache (ready to be persisted)
+        self.fetched_pages = {}
+        self.unchanged_pages = []
+
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
         """
         Fetch a page and return BeautifulSoup object
-        Respects crawl delay
+        Respects crawl delay per host (first request to a host goes out immediately)
+
+        Pages in page_cache are fetched conditionally (If-None-Match /
+        If-Modified-Since); an UnchangedPage is returned when the server answers
+        304 or the body hash matches the previous run.
+
+        Raises ScrapeCancelled when cancel_event is set, so a run stops at
+        the next fetch or in the middle of a crawl delay or retry backoff wait,
+        and CircuitOpen when the site keeps failing.
+        URLs disallowed by robots.txt are not requested (None is returned, as
+        for a failed page).
         """
+        self._check_cancelled()
+
+        if self.robots is not None and not self.robots.allowed(url):
+            print(f"Skipping {url}: disallowed by robots.txt")
+            self.stats['pages_disallowed'] += 1
+            return None
+
+        cached = self.page_cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
         try:
-            time.sleep(self.crawl_delay)  # Respect crawl delay
+            response = self._request(url, headers)
+            self.stats['pages_fetched'] += 1
+
+            if cached and response.status_code == 304:
+                return self._unchanged(url, cached, response)
 
-            response = self.session.get(url, timeout=30)
             response.raise_for_status()
 
-            return BeautifulSoup(response.content, 'lxml')
+            content_hash = hashlib.sha256(response.content).hexdigest()
+            if cached and cached.get('content_hash') == content_hash:
+                return self._unchanged(url, cached, response)
+
+            # external_ids are filled in by page_parsed() once products are extracted
+            self.fetched_pages[url] = {
+                'etag': response.headers.get('ETag', ''),
+                'last_modified': response.headers.get('Last-Modified', ''),
+                'content_hash': content_hash,
+                'external_ids': None,
+            }
+            return self.parse_html(response.content)
 
         except requests.RequestException as e:
             print(f"Error fetching {url}: {e}")
+            # 404 is how paginated listings end (Hanan); anything else means an incomplete crawl
+            if getattr(e.response, 'status_code', None) != 404:
+                self.stats['pages_failed'] += 1
             return None
 
+    def _request(self, url: str, headers: dict) -> requests.Response:
+        """
+        GET with bounded retries on connection errors, 429 and 5xx
+        (jittered exponential backoff, at least as long as Retry-After).
+
+        Every attempt is reported to the circuit breaker, which raises
+        CircuitOpen once the site's error rate is too high. Returns the last
+        response; raises the last RequestException if no response came back.
+        """
+        attempt = 0
+        while True:
+            self._check_cancelled()
+            self.stats['wait_seconds'] += self.rate_limiter.wait(url, self.crawl_delay, self.cancel_event)
+            # The crawl delay wait ends early on cancel
+            self._check_cancelled()
+
+            response = error = None
+            started = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=30, headers=headers)
+            except requests.RequestException as e:
+                error = e
+            finally:
+                self.stats['request_seconds'] += time.monotonic() - started
+            self.stats['attempts'] += 1
+
+            status = response.status_code if response is not None else None
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record(error is not None or (status >= 400 and status != 404))
+
+            retryable = error is not None or status in RETRY_STATUSES
+            delay = self._retry_delay(attempt, response) if retryable and attempt < self.max_retries else None
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            attempt += 1
+            self.stats['retries'] += 1
+            print(f"   ↻ {url}: {error or status}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            self._sleep(delay)
+
+    def _retry_delay(self, attempt: int, response) -> Optional[float]:
+        """Backoff before retry number attempt+1, None if Retry-After asks for too long"""
+        backoff = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt)
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        retry_after = retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            if retry_after > self.max_retry_after_seconds:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    def _sleep(self, seconds: float):
+        self.stats['backoff_seconds'] += seconds
+        # Waiting on the cancel event lets a cancelled run stop mid-backoff
+        if self.cancel_event is not None:
+            self.cancel_event.wait(seconds)
+        else:
+            time.sleep(seconds)
+
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ScrapeCancelled(f'{self.site_name}: scrape cancelled')
+
+    def parse_html(self, content: bytes, full: bool = False) -> BeautifulSoup:
+        """Parse a fetched page; only product containers unless full=True"""
+        return BeautifulSoup(content, 'lxml', parse_only=None if full else self.product_strainer)
+
+    def _unchanged(self, url: str, cached: dict, response) -> UnchangedPage:
+        self.stats['pages_not_modified'] += 1
+        self.unchanged_pages.append(url)
+        self.fetched_pages[url] = {
+            **cached,
+            'etag': response.headers.get('ETag') or cached.get('etag', ''),
+            'last_modified': response.headers.get('Last-Modified') or cached.get('last_modified', ''),
+        }
+        return UnchangedPage(url, list(cached.get('external_ids') or []))
+
+    def page_parsed(self, url: str, products: List[Dict]):
+        """
+        Record which products a freshly fetched page contained.
+        Only pages reported here are stored in the fetch cache, so a page whose
+        parsing failed is fetched and parsed again on the next run.
+        """
+        self.stats['products_parsed'] += len(products)
+        if url in self.fetched_pages:
+            self.fetched_pages[url]['external_ids'] = [p['external_id'] for p in products]
+
+    def start_category(self, name: str):
+        """Report the category being crawled (shown in scrape job progress)"""
+        self.current_category = name
+
+    @property
+    def unchanged_external_ids(self) -> List[str]:
+        """Products on pages skipped this run (still present on the site)"""
+        return [
+            external_id
+            for url in self.unchanged_pages
+            for external_id in self.fetched_pages[url]['external_ids'] or []
+        ]
+
     def parse_price(self, price_text: str) -> Optional[Decimal]:
         """
         Parse price text to Decimal
@@ -81,6 +312,13 @@ class BaseScraper:
         except:
             return None
 
+    def extract_products(self, soup: BeautifulSoup, category_name: str) -> List[Dict]:
+        """
+        Extract product dicts from one parsed listing page
+        Must be implemented by child classes
+        """
+        raise NotImplementedError("Each scraper must implement extract_products()")
+
     def scrape_products(self) -> List[Dict]:
         """
         Scrape products from the site
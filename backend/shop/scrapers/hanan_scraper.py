@@ -2,10 +2,12 @@
 Scraper for Hanan.rs
 """
 from typing import List, Dict
-from .base import BaseScraper
+from .base import BaseScraper, ContainerStrainer, UnchangedPage
 import re
 
 class HananScraper(BaseScraper):
+    product_strainer = ContainerStrainer(classes=['product'])
+
     def __init__(self):
         config = {'name': 'Hanan', 'url': 'https://hanan.rs', 'delay': 10}
         super().__init__(config)
@@ -19,6 +21,7 @@ class HananScraper(BaseScraper):
 
         for category in self.categories:
             print(f"\n📁 {category['name']}")
+            self.start_category(category['name'])
 
             # Scrape all pages for this category
             page_num = 1
@@ -38,44 +41,64 @@ class HananScraper(BaseScraper):
                     print(f"   ⚠️  Failed to fetch page {page_num}")
                     break
 
+                if isinstance(soup, UnchangedPage):
+                    if not soup.external_ids:
+                        print(f"   ℹ️  No products found on page {page_num}, stopping")
+                        break
+                    print(f"   ♻️  Page {page_num} not modified ({len(soup.external_ids)} products), skipping")
+                    page_num += 1
+                    continue
+
                 # Find products on this page
                 products_on_page = soup.select('.product')
 
                 if not products_on_page:
                     print(f"   ℹ️  No products found on page {page_num}, stopping")
+                    self.page_parsed(page_url, [])
                     break
 
                 print(f"   📦 Found {len(products_on_page)} products on page {page_num}")
 
                 # Extract product data
-                for elem in products_on_page:
-                    try:
-                        link = elem.select_one('a.woocommerce-LoopProduct-link')
-                        if not link: continue
-                        url = link.get('href', '')
-                        id_match = re.search(r'/([^/]+)/?$', url)
-                        name_elem = elem.select_one('.woocommerce-loop-product__title') or elem.select_one('h2')
-                        price_elem = elem.select_one('.price ins .amount') or elem.select_one('.price .amount')
-                        price = self.parse_price(price_elem.get_text(strip=True) if price_elem else '')
-                        if not price: continue
-                        all_products.append({
-                            'external_id': id_match.group(1) if id_match else url.split('/')[-2],
-                            'name': name_elem.get_text(strip=True) if name_elem else 'Unknown',
-                            'category': category['name'],
-                            'description': '',
-                            'current_price': price,
-                            'on_sale': elem.select_one('.onsale') is not None,
-                            'sale_price': price if elem.select_one('.onsale') else None,
-                            'original_price': None,
-                            'product_url': url,
-                            'image_url': (elem.select_one('img').get('src', '') if elem.select_one('img') else ''),
-                            'in_stock': True
-                        })
-                        print(f"      ✅ {all_products[-1]['name'][:40]:<40} - {price} RSD")
-                    except Exception as e:
-                        print(f"      ⚠️  {e}")
+                products = self.extract_products(soup, category['name'])
+                for product in products:
+                    print(f"      ✅ {product['name'][:40]:<40} - {product['current_price']} RSD")
 
+                all_products.extend(products)
+                self.page_parsed(page_url, products)
                 page_num += 1
 
         print(f"\n📊 Total: {len(all_products)}")
         return all_products
+
+    def extract_products(self, soup, category_name: str) -> List[Dict]:
+        """Products from a parsed category page"""
+        products = []
+        for elem in soup.select('.product'):
+            try:
+                link = elem.select_one('a.woocommerce-LoopProduct-link')
+                if not link: continue
+                url = link.get('href', '')
+                id_match = re.search(r'/([^/]+)/?$', url)
+                name_elem = elem.select_one('.woocommerce-loop-product__title') or elem.select_one('h2')
+                price_elem = elem.select_one('.price ins .amount') or elem.select_one('.price .amount')
+                price = self.parse_price(price_elem.get_text(strip=True) if price_elem else '')
+                if not price: continue
+                on_sale = elem.select_one('.onsale') is not None
+                img = elem.select_one('img')
+                products.append({
+                    'external_id': id_match.group(1) if id_match else url.split('/')[-2],
+                    'name': name_elem.get_text(strip=True) if name_elem else 'Unknown',
+                    'category': category_name,
+                    'description': '',
+                    'current_price': price,
+                    'on_sale': on_sale,
+                    'sale_price': price if on_sale else None,
+                    'original_price': None,
+                    'product_url': url,
+                    'image_url': img.get('src', '') if img else '',
+                    'in_stock': True
+                })
+            except Exception as e:
+                print(f"      ⚠️  {e}")
+        return products
@@ -2,10 +2,16 @@
 Scraper for IronWorks.rs
 """
 from typing import List, Dict
-from .base import BaseScraper
+from .base import BaseScraper, ContainerStrainer, UnchangedPage
 import re
 
+ID_RE = re.compile(r'/(\d+)')
+
+
 class IronWorksScraper(BaseScraper):
+    # Same elements as the '.product, .item, article' selector
+    product_strainer = ContainerStrainer(classes=['product', 'item'], tags=['article'])
+
     def __init__(self):
         config = {'name': 'IronWorks', 'url': 'https://ironworks.rs', 'delay': 10}
         super().__init__(config)
@@ -43,33 +49,50 @@ class IronWorksScraper(BaseScraper):
         print(f"🕷️  {self.site_name} - Crawl delay: {self.crawl_delay}s")
         for category in self.categories:
             print(f"\n📁 {category['name']}")
-            soup = self.fetch_page(f"{self.base_url}{category['url']}")
+            self.start_category(category['name'])
+            page_url = f"{self.base_url}{category['url']}"
+            soup = self.fetch_page(page_url)
             if not soup: continue
-            for elem in soup.select('.product, .item, article'):
-                try:
-                    link = elem.select_one('a')
-                    if not link: continue
-                    url = link.get('href', '')
-                    if not url.startswith('http'): url = f"{self.base_url}{url}"
-                    id_match = re.search(r'/(\d+)', url)
-                    name_elem = elem.select_one('h2, h3, .title')
-                    price_elem = elem.select_one('.price, span')
-                    price = self.parse_price(price_elem.get_text(strip=True) if price_elem else '')
-                    if not price: continue
-                    all_products.append({
-                        'external_id': id_match.group(1) if id_match else url.split('/')[-1],
-                        'name': name_elem.get_text(strip=True) if name_elem else 'Unknown',
-                        'category': category['name'],
-                        'description': '',
-                        'current_price': price,
-                        'on_sale': False,
-                        'sale_price': None,
-                        'original_price': None,
-                        'product_url': url,
-                        'image_url': (elem.select_one('img').get('src', '') if elem.select_one('img') else ''),
-                        'in_stock': True
-                    })
-                    print(f"   ✅ {all_products[-1]['name'][:40]:<40} - {price} RSD")
-                except Exception as e: print(f"   ⚠️  {e}")
+            if isinstance(soup, UnchangedPage):
+                print(f"   ♻️  Not modified ({len(soup.external_ids)} products), skipping")
+                continue
+
+            products = self.extract_products(soup, category['name'])
+            for product in products:
+                print(f"   ✅ {product['name'][:40]:<40} - {product['current_price']} RSD")
+
+            all_products.extend(products)
+            self.page_parsed(page_url, products)
         print(f"\n📊 Total: {len(all_products)}")
         return all_products
+
+    def extract_products(self, soup, category_name: str) -> List[Dict]:
+        """Products from a parsed category page"""
+        products = []
+        for elem in soup.select('.product, .item, article'):
+            try:
+                link = elem.select_one('a')
+                if not link: continue
+                url = link.get('href', '')
+                if not url.startswith('http'): url = f"{self.base_url}{url}"
+                id_match = ID_RE.search(url)
+                name_elem = elem.select_one('h2, h3, .title')
+                price_elem = elem.select_one('.price, span')
+                price = self.parse_price(price_elem.get_text(strip=True) if price_elem else '')
+                if not price: continue
+                img = elem.select_one('img')
+                products.append({
+                    'external_id': id_match.group(1) if id_match else url.split('/')[-1],
+                    'name': name_elem.get_text(strip=True) if name_elem else 'Unknown',
+                    'category': category_name,
+                    'description': '',
+                    'current_price': price,
+                    'on_sale': False,
+                    'sale_price': None,
+                    'original_price': None,
+                    'product_url': url,
+                    'image_url': img.get('src', '') if img else '',
+                    'in_stock': True
+                })
+            except Exception as e: print(f"   ⚠️  {e}")
+        return products
@@ -2,7 +2,7 @@
 Scraper for JeepCommerce.rs (WooCommerce site)
 """
 from typing import List, Dict
-from .base import BaseScraper
+from .base import BaseScraper, ContainerStrainer, UnchangedPage
 import re
 
 
@@ -11,6 +11,8 @@ class JeepCommerceScraper(BaseScraper):
     Scraper for https://jeepcommerce.rs/
     """
 
+    product_strainer = ContainerStrainer(classes=['product'])
+
     def __init__(self):
         config = {
             'name': 'JeepCommerce',
@@ -33,6 +35,7 @@ class JeepCommerceScraper(BaseScraper):
 
         for category in self.categories:
             print(f"\n📁 Category: {category['name']}")
+            self.start_category(category['name'])
             
             category_url = f"{self.base_url}{category['url']}"
             soup = self.fetch_page(category_url)
@@ -41,24 +44,34 @@ class JeepCommerceScraper(BaseScraper):
                 print(f"⚠️  Failed to fetch {category['name']}")
                 continue
 
-            # WooCommerce structure
-            products = soup.select('.product')
+            if isinstance(soup, UnchangedPage):
+                print(f"   ♻️  Not modified ({len(soup.external_ids)} products), skipping")
+                continue
+
+            products = self.extract_products(soup, category['name'])
             print(f"   Found {len(products)} products")
+            for product in products:
+                status_icon = "🔥" if product['on_sale'] else "✅"
+                print(f"   {status_icon} {product['name'][:40]:<40} - {product['current_price']} RSD")
 
-            for product_elem in products:
-                try:
-                    product = self._extract_product_data(product_elem, category['name'])
-                    if product:
-                        all_products.append(product)
-                        status_icon = "🔥" if product['on_sale'] else "✅"
-                        print(f"   {status_icon} {product['name'][:40]:<40} - {product['current_price']} RSD")
-                except Exception as e:
-                    print(f"   ⚠️  Error: {e}")
-                    continue
+            all_products.extend(products)
+            self.page_parsed(category_url, products)
 
         print(f"\n📊 Total: {len(all_products)}")
         return all_products
 
+    def extract_products(self, soup, category_name: str) -> List[Dict]:
+        """Products from a parsed category page (WooCommerce structure)"""
+        products = []
+        for product_elem in soup.select('.product'):
+            try:
+                product = self._extract_product_data(product_elem, category_name)
+                if product:
+                    products.append(product)
+            except Exception as e:
+                print(f"   ⚠️  Error: {e}")
+        return products
+
     def _extract_product_data(self, elem, category_name: str) -> Dict:
         # Link i ID
         link_elem = elem.select_one('a.woocommerce-LoopProduct-link')
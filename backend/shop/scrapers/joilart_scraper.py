@@ -2,7 +2,7 @@
 Scraper for JoilArt.com
 """
 from typing import List, Dict
-from .base import BaseScraper
+from .base import BaseScraper, ContainerStrainer, UnchangedPage
 import re
 
 
@@ -16,6 +16,8 @@ class JoilArtScraper(BaseScraper):
     - URL pattern: /proizvod/{ID}_{name}/show
     """
 
+    product_strainer = ContainerStrainer(classes=['product-wrapper'])
+
     def __init__(self):
         config = {
             'name': 'JoilArt',
@@ -45,6 +47,7 @@ class JoilArtScraper(BaseScraper):
 
         for category in self.categories:
             print(f"\n📁 Category: {category['name']}")
+            self.start_category(category['name'])
 
             # Fetch category page
             category_url = f"{self.base_url}{category['url']}"
@@ -54,24 +57,34 @@ class JoilArtScraper(BaseScraper):
                 print(f"⚠️  Failed to fetch {category['name']}")
                 continue
 
-            # Find all products on the page
-            product_wrappers = soup.select('.product-wrapper')
-            print(f"   Found {len(product_wrappers)} products")
-
-            for wrapper in product_wrappers:
-                try:
-                    product = self._extract_product_data(wrapper, category['name'])
-                    if product:
-                        all_products.append(product)
-                        status_icon = "🔥" if product['on_sale'] else "✅"
-                        print(f"   {status_icon} {product['name'][:40]:<40} - {product['current_price']} RSD")
-                except Exception as e:
-                    print(f"   ⚠️  Error extracting product: {e}")
-                    continue
+            if isinstance(soup, UnchangedPage):
+                print(f"   ♻️  Not modified ({len(soup.external_ids)} products), skipping")
+                continue
+
+            products = self.extract_products(soup, category['name'])
+            print(f"   Found {len(products)} products")
+            for product in products:
+                status_icon = "🔥" if product['on_sale'] else "✅"
+                print(f"   {status_icon} {product['name'][:40]:<40} - {product['current_price']} RSD")
+
+            all_products.extend(products)
+            self.page_parsed(category_url, products)
 
         print(f"\n📊 Total products scraped: {len(all_products)}")
         return all_products
 
+    def extract_products(self, soup, category_name: str) -> List[Dict]:
+        """Products from a parsed category page"""
+        products = []
+        for wrapper in soup.select('.product-wrapper'):
+            try:
+                product = self._extract_product_data(wrapper, category_name)
+                if product:
+                    products.append(product)
+            except Exception as e:
+                print(f"   ⚠️  Error extracting product: {e}")
+        return products
+
     def _extract_product_data(self, wrapper, category_name: str) -> Dict:
         """
         Extract product data from a product wrapper element
@@ -0,0 +1,167 @@
+"""
+Crawl politeness: per-host delay shared by all scrapers in the process,
+robots.txt rules, Retry-After parsing and a per-site circuit breaker.
+
+Different competitor hosts can be scraped concurrently, but requests to the
+same host are always spaced at least `delay` seconds apart, no matter how
+many threads/scrapers target it.
+"""
+import math
+import re
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+# What robots.txt means when the server refuses to serve it (RFC 9309)
+DISALLOW_ALL = 'User-agent: *\nDisallow: /\n'
+
+
+class HostRateLimiter:
+    """Tracks the last request time per host and blocks until the next slot"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._host_locks = {}
+        self._last_request = {}
+
+    def _host_lock(self, host):
+        with self._lock:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.Lock()
+            return self._host_locks[host]
+
+    def wait(self, url: str, delay: float, cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Block until a request to url's host is allowed.
+        Returns the number of seconds spent waiting.
+
+        With cancel_event the wait ends as soon as the event is set; the slot
+        is then not taken, the caller is expected to check the event and stop.
+        """
+        host = urlsplit(url).netloc.lower()
+        # Held while sleeping so concurrent callers for one host queue up
+        with self._host_lock(host):
+            last = self._last_request.get(host)
+            waited = 0.0
+            if last is not None:
+                waited = max(0.0, last + delay - time.monotonic())
+                if waited:
+                    if cancel_event is None:
+                        time.sleep(waited)
+                    elif cancel_event.wait(waited):
+                        return max(0.0, waited - (last + delay - time.monotonic()))
+            self._last_request[host] = time.monotonic()
+            return waited
+
+
+host_rate_limiter = HostRateLimiter()
+
+
+# RobotFileParser only understands whole-second delays; "Crawl-delay: 0.5" would be ignored
+FRACTIONAL_DELAY_RE = re.compile(r'^(\s*crawl-delay\s*:\s*)(\d*\.\d+)', re.IGNORECASE | re.MULTILINE)
+
+
+def _round_up_delay(match):
+    return f'{match.group(1)}{math.ceil(float(match.group(2)))}'
+
+
+class RobotsRules:
+    """Parsed robots.txt of one site, for one user agent"""
+
+    def __init__(self, text: str, user_agent: str = '*'):
+        self.text = text
+        self.user_agent = user_agent
+        self._parser = RobotFileParser()
+        self._parser.parse(FRACTIONAL_DELAY_RE.sub(_round_up_delay, text).splitlines())
+
+    @property
+    def crawl_delay(self) -> Optional[float]:
+        """
+        Seconds between requests the site asks for: Crawl-delay, or
+        Request-rate converted to a delay, whichever is stricter
+        """
+        delays = []
+        crawl_delay = self._parser.crawl_delay(self.user_agent)
+        if crawl_delay is not None:
+            delays.append(float(crawl_delay))
+        rate = self._parser.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            delays.append(rate.seconds / rate.requests)
+        return max(delays) if delays else None
+
+    def allowed(self, url: str) -> bool:
+        return self._parser.can_fetch(self.user_agent, url)
+
+
+def robots_url(base_url: str) -> str:
+    return urljoin(base_url, '/robots.txt')
+
+
+def fetch_robots_txt(session: requests.Session, base_url: str, timeout: int = 15) -> Optional[str]:
+    """
+    robots.txt content of a site, '' when it has none (4xx) and a disallow-all
+    file on 401/403. None when it could not be fetched (network error, 5xx),
+    so the caller can fall back to a previously cached copy.
+    """
+    try:
+        response = session.get(robots_url(base_url), timeout=timeout)
+    except requests.RequestException:
+        return None
+
+    if response.status_code in (401, 403):
+        return DISALLOW_ALL
+    if 400 <= response.status_code < 500:
+        return ''
+    if response.status_code != 200:
+        return None
+    return response.text
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Retry-After header (delta-seconds or HTTP date) in seconds, None if absent/invalid"""
+    value = response.headers.get('Retry-After', '').strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpen(Exception):
+    """Raised when a site fails so often that continuing the run is pointless"""
+
+
+class CircuitBreaker:
+    """
+    Error rate over the last `window` requests of one site's run. Once at
+    least `min_requests` were made and more than `error_rate` of them failed,
+    record() raises CircuitOpen and keeps raising for the rest of the run.
+    """
+
+    def __init__(self, error_rate: float = 0.5, window: int = 20, min_requests: int = 6):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.outcomes = deque(maxlen=window)
+        self.tripped = False
+
+    def record(self, failed: bool):
+        self.outcomes.append(failed)
+        failures = sum(self.outcomes)
+        if self.tripped or (
+            len(self.outcomes) >= self.min_requests and failures / len(self.outcomes) > self.error_rate
+        ):
+            self.tripped = True
+            raise CircuitOpen(f'Circuit breaker open: {failures} of the last {len(self.outcomes)} requests failed')
@@ -0,0 +1,158 @@
+"""
+Offline record/replay of scraper HTTP traffic.
+
+Record mode saves every response a scraper's session receives (status,
+headers, body) into a gzip-compressed JSON corpus, one file per site.
+Replay mode mounts an adapter that serves those responses back with no
+network access and no crawl delay, so the whole scrape_competitors pipeline
+can be re-run deterministically and benchmarked. A replayed run is a dry
+run unless --write is given: its database writes are rolled back.
+
+    python manage.py scrape_competitors --force --record scrape_corpus/
+    python manage.py scrape_competitors --force --replay scrape_corpus/
+"""
+import base64
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CORPUS_VERSION = 1
+
+# The stored body is already decoded, so transfer headers would be wrong on replay
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class ScrapeCorpus:
+    """Recorded responses keyed by URL, stored as <path> (.json.gz)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_site(cls, directory: str, site_name: str) -> 'ScrapeCorpus':
+        return cls(os.path.join(directory, f'{site_name.lower()}.json.gz'))
+
+    def load(self) -> 'ScrapeCorpus':
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CORPUS_VERSION:
+            raise ValueError(f'Unsupported corpus version in {self.path}')
+        self.responses = data['responses']
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+            json.dump({
+                'version': CORPUS_VERSION,
+                'recorded_at': datetime.now(timezone.utc).isoformat(),
+                'responses': self.responses,
+            }, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def add(self, url: str, response: requests.Response):
+        with self._lock:
+            self.responses[url] = {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': {
+                    key: value for key, value in response.headers.items()
+                    if key.lower() not in DROPPED_HEADERS
+                },
+                'body': base64.b64encode(response.content).decode('ascii'),
+            }
+
+    def get(self, url: str):
+        return self.responses.get(url)
+
+    def pages(self):
+        """(url, body bytes) of recorded 200 responses"""
+        for url, entry in sorted(self.responses.items()):
+            if entry['status'] == 200:
+                yield url, base64.b64decode(entry['body'])
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Real HTTP adapter that copies every response into a corpus"""
+
+    def __init__(self, corpus: ScrapeCorpus, **kwargs):
+        super().__init__(**kwargs)
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        # 304s only make sense for the conditional request that produced them
+        if response.status_code != 304:
+            self.corpus.add(request.url, response)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves responses from a corpus; unknown URLs get a 404 so nothing ever
+    reaches the network. Conditional requests get a 304 when the recorded
+    ETag/Last-Modified matches, like the real server would.
+    """
+
+    def __init__(self, corpus: ScrapeCorpus):
+        super().__init__()
+        self.corpus = corpus
+
+    def send(self, request, **kwargs):
+        entry = self.corpus.get(request.url)
+        if entry is None:
+            entry = {'status': 404, 'reason': 'Not Found (not in corpus)', 'headers': {}, 'body': ''}
+
+        headers = CaseInsensitiveDict(entry['headers'])
+        status = entry['status']
+        body = base64.b64decode(entry['body'])
+
+        if status == 200 and self._not_modified(request, headers):
+            status, body = 304, b''
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = entry.get('reason') or ''
+        response.headers = headers
+        response._content = body
+        response.encoding = get_encoding_from_headers(headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    @staticmethod
+    def _not_modified(request, headers) -> bool:
+        etag = request.headers.get('If-None-Match')
+        if etag:
+            return etag == headers.get('ETag')
+        since = request.headers.get('If-Modified-Since')
+        return bool(since) and since == headers.get('Last-Modified')
+
+    def close(self):
+        pass
+
+
+def record(scraper, corpus: ScrapeCorpus):
+    """Route the scraper's traffic through a recording adapter (network still used)"""
+    adapter = RecordingAdapter(corpus)
+    scraper.session.mount('http://', adapter)
+    scraper.session.mount('https://', adapter)
+
+
+def replay(scraper, corpus: ScrapeCorpus):
+    """Serve the scraper's requests from a corpus with zero crawl delay"""
+    adapter = ReplayAdapter(corpus)
+    scraper.session.mount('http://', adapter)
+    scraper.session.mount('https://', adapter)
+    scraper.crawl_delay = 0
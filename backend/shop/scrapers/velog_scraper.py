@@ -2,10 +2,18 @@
 Scraper for Velog.rs - Crawl-delay: 10s (STRICT)
 """
 from typing import List, Dict
-from .base import BaseScraper
+from .base import BaseScraper, ContainerStrainer, UnchangedPage
 import re
 
+PRICE_RE = re.compile(r'([\d\s\.,]+)\s*RSD')
+ID_RE = re.compile(r'/(\w+)/?$')
+
+
 class VelogScraper(BaseScraper):
+    # Products are <li> items of the product list; navigation and footer are
+    # lists too, so the list container's class is what tells them apart
+    product_strainer = ContainerStrainer(classes=['products'])
+
     def __init__(self):
         config = {'name': 'Velog', 'url': 'https://www.velog.rs', 'delay': 10}
         super().__init__(config)
@@ -18,66 +26,81 @@ class VelogScraper(BaseScraper):
         print(f"🕷️  {self.site_name} - Crawl delay: {self.crawl_delay}s (STRICT)")
         for category in self.categories:
             print(f"\n📁 {category['name']}")
-            soup = self.fetch_page(f"{self.base_url}{category['url']}")
+            self.start_category(category['name'])
+            page_url = f"{self.base_url}{category['url']}"
+            soup = self.fetch_page(page_url)
             if not soup: continue
+            if isinstance(soup, UnchangedPage):
+                print(f"   ♻️  Not modified ({len(soup.external_ids)} products), skipping")
+                continue
+
+            products = self.extract_products(soup, category['name'])
+            for product in products:
+                print(f"   ✅ {product['name'][:40]:<40} - {product['current_price']} RSD")
 
-            # Velog uses <li> elements for products
-            for elem in soup.select('li'):
-                try:
-                    # Find link with product name
-                    link = elem.select_one('a[href]')
-                    if not link: continue
-
-                    url = link.get('href', '')
-                    if not url or url == '#': continue
-                    if not url.startswith('http'): url = f"{self.base_url}{url}"
-
-                    # Extract name from link text
-                    name = link.get_text(strip=True)
-                    if not name or len(name) < 3: continue
-
-                    # Extract ID from URL or generate from name
-                    id_match = re.search(r'/(\w+)/?$', url)
-                    external_id = id_match.group(1) if id_match else name.replace(' ', '_')[:50]
-
-                    # Find price - look for .price class or text with RSD
-                    price_elem = elem.select_one('.price')
-                    if price_elem:
-                        price = self.parse_price(price_elem.get_text(strip=True))
-                    else:
-                        # Try to find price in text
-                        text = elem.get_text()
-                        price_match = re.search(r'([\d\s\.,]+)\s*RSD', text)
-                        if price_match:
-                            price = self.parse_price(price_match.group(1))
-                        else:
-                            continue
-
-                    if not price: continue
-
-                    # Extract image
-                    img_elem = elem.select_one('img')
-                    image_url = ''
-                    if img_elem:
-                        img_src = img_elem.get('src', '') or img_elem.get('data-src', '')
-                        if img_src:
-                            image_url = f"{self.base_url}{img_src}" if not img_src.startswith('http') else img_src
-
-                    all_products.append({
-                        'external_id': external_id,
-                        'name': name,
-                        'category': category['name'],
-                        'description': '',
-                        'current_price': price,
-                        'on_sale': False,
-                        'sale_price': None,
-                        'original_price': None,
-                        'product_url': url,
-                        'image_url': image_url,
-                        'in_stock': True
-                    })
-                    print(f"   ✅ {all_products[-1]['name'][:40]:<40} - {price} RSD")
-                except Exception as e:
-                    pass  # Skip invalid items silently
+            all_products.extend(products)
+            self.page_parsed(page_url, products)
         print(f"\n📊 Total: {len(all_products)}")
         return all_products
+
+    def extract_products(self, soup, category_name: str) -> List[Dict]:
+        """Products from a parsed category page (Velog uses <li> elements of ul.products)"""
+        products = []
+        errors = 0
+        for elem in soup.select('.products li'):
+            try:
+                # Find link with product name
+                link = elem.select_one('a[href]')
+                if not link: continue
+
+                url = link.get('href', '')
+                if not url or url == '#': continue
+
+                # Extract name from link text
+                name = link.get_text(strip=True)
+                if not name or len(name) < 3: continue
+
+                # Find price - look for .price class or text with RSD
+                price_elem = elem.select_one('.price')
+                if price_elem:
+                    price = self.parse_price(price_elem.get_text(strip=True))
+                else:
+                    # Try to find price in text
+                    price_match = PRICE_RE.search(elem.get_text())
+                    if not price_match: continue
+                    price = self.parse_price(price_match.group(1))
+
+                if not price: continue
+
+                if not url.startswith('http'): url = f"{self.base_url}{url}"
+
+                # Extract ID from URL or generate from name
+                id_match = ID_RE.search(url)
+                external_id = id_match.group(1) if id_match else name.replace(' ', '_')[:50]
+
+                # Extract image
+                img_elem = elem.select_one('img')
+                image_url = ''
+                if img_elem:
+                    img_src = img_elem.get('src', '') or img_elem.get('data-src', '')
+                    if img_src:
+                        image_url = f"{self.base_url}{img_src}" if not img_src.startswith('http') else img_src
+
+                products.append({
+                    'external_id': external_id,
+                    'name': name,
+                    'category': category_name,
+                    'description': '',
+                    'current_price': price,
+                    'on_sale': False,
+                    'sale_price': None,
+                    'original_price': None,
+                    'product_url': url,
+                    'image_url': image_url,
+                    'in_stock': True
+                })
+            except Exception:
+                errors += 1
+        if errors:
+            print(f"   ⚠️  Skipped {errors} element(s) that failed to parse")
+        return products
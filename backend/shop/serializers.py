@@ -20,9 +20,18 @@ class CategorySerializer(serializers.ModelSerializer):
 class ProductImageSerializer(serializers.ModelSerializer):
     # Koristimo SerializerMethodField za read, ali dozvoljavamo write preko image field-a
     image_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
+    def get_srcset(self, obj):
+        # srcset stringovi za <picture> (webp + fallback), iz sačuvanih varijanti
+        from .image_renditions import build_srcset
+        return build_srcset(obj.renditions)
 
     def get_image_url(self, obj):
-        # Vrati URL slike - može biti Cloudinary ili lokalni /media/
+        # URL je izračunat pri upload-u - samo čitanje kolone
+        if obj.delivery_url:
+            return obj.delivery_url
+        # Fallback za slike koje još nisu backfill-ovane (Cloudinary ili lokalni /media/)
         if obj.image and obj.image.name:
             try:
                 url = obj.image.url
@@ -37,7 +46,12 @@ class ProductImageSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'product', 'image', 'image_url', 'alt_text', 'is_primary', 'order', 'created_at']
+        fields = [
+            'id', 'product', 'image', 'image_url', 'alt_text', 'is_primary', 'order',
+            'width', 'height', 'format', 'renditions', 'srcset',
+            'placeholder', 'dominant_color', 'created_at'
+        ]
+        read_only_fields = ['width', 'height', 'format', 'renditions', 'placeholder', 'dominant_color']
         extra_kwargs = {
             'image': {'write_only': True}  # image je samo za write
         }
@@ -57,18 +71,44 @@ class ProductVariantSerializer(serializers.ModelSerializer):
 
     effective_length_per_unit = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
+    # Opciono (samo admin): cene konkurencije iz VariantPriceComparison tabele
+    price_comparison = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductVariant
         fields = [
             'id', 'product', 'name', 'price', 'on_sale', 'sale_price',
             'current_price', 'final_price', 'sku',
             'in_stock', 'stock_quantity', 'length_per_unit', 'effective_length_per_unit',
-            'created_at'
+            'created_at', 'price_comparison'
         ]
         extra_kwargs = {
             'length_per_unit': {'required': False, 'allow_null': True}
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # View postavlja include_price_comparison u context (?include=price_comparison za admina)
+        if not self.context.get('include_price_comparison'):
+            self.fields.pop('price_comparison')
+
+    def get_price_comparison(self, obj):
+        """Čita materijalizovan red - bez agregacije ScrapedProduct-a"""
+        try:
+            comparison = obj.price_comparison
+        except ProductVariant.price_comparison.RelatedObjectDoesNotExist:
+            return None
+        return {
+            'competitor_count': comparison.competitor_count,
+            'min_price': str(comparison.min_price),
+            'median_price': str(comparison.median_price),
+            'max_price': str(comparison.max_price),
+            'cheapest_site': comparison.cheapest_site_id,
+            'price_position': comparison.price_position,
+            'price_index': comparison.price_index,
+            'updated_at': comparison.updated_at,
+        }
+
 
 class ProductSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
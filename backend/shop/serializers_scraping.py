@@ -2,7 +2,7 @@
 Serializers for scraping data
 """
 from rest_framework import serializers
-from .models_scraping import CompetitorSite, ScrapedProduct, PriceHistory
+from .models_scraping import CompetitorSite, ScrapedProduct, PriceHistory, PriceHistoryRollup, ScrapeJob, ProductMatch, VariantPriceComparison
 
 
 class CompetitorSiteSerializer(serializers.ModelSerializer):
@@ -15,6 +15,10 @@ class ScrapedProductSerializer(serializers.ModelSerializer):
     site_name = serializers.CharField(source='site.name', read_only=True)
     discount_percentage = serializers.ReadOnlyField()
     effective_price = serializers.ReadOnlyField()
+    matched_product = serializers.IntegerField(source='match.product_id', read_only=True, default=None)
+    matched_variant = serializers.IntegerField(source='match.variant_id', read_only=True, default=None)
+    match_confidence = serializers.FloatField(source='match.confidence', read_only=True, default=None)
+    match_status = serializers.CharField(source='match.status', read_only=True, default=None)
 
     class Meta:
         model = ScrapedProduct
@@ -22,7 +26,8 @@ class ScrapedProductSerializer(serializers.ModelSerializer):
             'id', 'site', 'site_name', 'external_id', 'name', 'category',
             'description', 'current_price', 'on_sale', 'sale_price',
             'original_price', 'effective_price', 'discount_percentage',
-            'product_url', 'image_url', 'in_stock', 'first_seen_at', 'last_seen_at'
+            'product_url', 'image_url', 'in_stock', 'first_seen_at', 'last_seen_at',
+            'matched_product', 'matched_variant', 'match_confidence', 'match_status'
         ]
 
 
@@ -32,3 +37,58 @@ class PriceHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = PriceHistory
         fields = ['id', 'product', 'product_name', 'price', 'on_sale', 'sale_price', 'in_stock', 'recorded_at']
+
+
+class PriceHistoryRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceHistoryRollup
+        fields = [
+            'id', 'product', 'period', 'period_start', 'min_price', 'max_price', 'last_price',
+            'last_on_sale', 'last_in_stock', 'points', 'last_recorded_at'
+        ]
+
+
+class ScrapeJobSerializer(serializers.ModelSerializer):
+    site_name = serializers.CharField(source='site.name', read_only=True)
+    products_found = serializers.IntegerField(source='log.products_found', read_only=True, default=None)
+    products_new = serializers.IntegerField(source='log.products_new', read_only=True, default=None)
+    products_updated = serializers.IntegerField(source='log.products_updated', read_only=True, default=None)
+    products_removed = serializers.IntegerField(source='log.products_removed', read_only=True, default=None)
+    pages_remaining = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ScrapeJob
+        fields = [
+            'id', 'site', 'site_name', 'status', 'force', 'worker', 'error_message', 'cancel_requested',
+            'pages_fetched', 'pages_expected', 'pages_remaining', 'products_parsed', 'current_category', 'eta_seconds',
+            'log', 'products_found', 'products_new', 'products_updated', 'products_removed',
+            'created_at', 'started_at', 'heartbeat_at', 'finished_at'
+        ]
+
+
+class ProductMatchSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True, default=None)
+    variant_name = serializers.CharField(source='variant.name', read_only=True, default=None)
+
+    class Meta:
+        model = ProductMatch
+        fields = [
+            'id', 'scraped_product', 'product', 'product_name', 'variant', 'variant_name',
+            'confidence', 'status', 'source_name', 'matched_at'
+        ]
+
+
+class VariantPriceComparisonSerializer(serializers.ModelSerializer):
+    variant_name = serializers.CharField(source='variant.name', read_only=True)
+    product = serializers.IntegerField(source='variant.product_id', read_only=True)
+    product_name = serializers.CharField(source='variant.product.name', read_only=True)
+    cheapest_site_name = serializers.CharField(source='cheapest_site.name', read_only=True, default=None)
+    difference_from_cheapest = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = VariantPriceComparison
+        fields = [
+            'variant', 'variant_name', 'product', 'product_name', 'competitor_count',
+            'min_price', 'median_price', 'max_price', 'cheapest_site', 'cheapest_site_name', 'cheapest_product',
+            'our_price', 'price_position', 'price_index', 'difference_from_cheapest', 'updated_at'
+        ]
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, post_init
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import ProductVariant
+from .models import Product, Category, Subcategory, ProductVariant, ProductImage, Order, ContactMessage, AdminEvent, ScrapeLog, VariantPriceComparison
+from .events import publish_event
+from . import price_comparison, product_matching
 
 
 @receiver(post_save, sender=ProductVariant)
@@ -26,3 +29,176 @@ def update_product_timestamp_on_variant_delete(sender, instance, **kwargs):
     if instance.product:
         instance.product.updated_at = timezone.now()
         instance.product.save(update_fields=['updated_at'])
+
+
+# ============================================
+# ADMIN EVENT BUS
+# ============================================
+# post_init pamti vrednosti učitane iz baze da bi post_save mogao
+# da prepozna prelaz (promena statusa, pad zaliha ispod praga).
+# Čita se iz __dict__ da odložena (.only/.defer) polja ne bi izazvala dodatni upit.
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    instance._initial_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def publish_order_events(sender, instance, created, **kwargs):
+    if created:
+        publish_event(
+            AdminEvent.TOPIC_ORDERS, 'new_order',
+            order_id=instance.id,
+            customer_name=instance.customer_name,
+            total_amount=str(instance.total_amount),
+        )
+    elif instance._initial_status is not None and instance.status != instance._initial_status:
+        publish_event(
+            AdminEvent.TOPIC_ORDERS, 'order_status',
+            order_id=instance.id,
+            old_status=instance._initial_status,
+            new_status=instance.status,
+        )
+    instance._initial_status = instance.__dict__.get('status')
+
+
+@receiver(post_init, sender=ProductVariant)
+def remember_variant_stock(sender, instance, **kwargs):
+    instance._initial_stock_quantity = instance.__dict__.get('stock_quantity')
+
+
+@receiver(post_save, sender=ProductVariant)
+def publish_low_stock_event(sender, instance, created, **kwargs):
+    """
+    Javi samo kada zalihe pređu prag naniže, ne pri svakom čuvanju.
+    stock_quantity 0 znači "neograničeno", pa prelaz na 0 nije niska zaliha.
+    """
+    threshold = settings.LOW_STOCK_THRESHOLD
+    old_quantity = instance._initial_stock_quantity
+    if (
+        not created
+        and old_quantity is not None
+        and instance.stock_quantity is not None
+        and old_quantity > threshold >= instance.stock_quantity > 0
+    ):
+        publish_event(
+            AdminEvent.TOPIC_STOCK, 'low_stock',
+            variant_id=instance.id,
+            product_id=instance.product_id,
+            variant_name=instance.name,
+            stock_quantity=instance.stock_quantity,
+            threshold=threshold,
+        )
+    instance._initial_stock_quantity = instance.__dict__.get('stock_quantity')
+
+
+@receiver(post_save, sender=ProductVariant)
+def refresh_variant_price_comparison(sender, instance, created, **kwargs):
+    """Promena naše cene odmah menja poziciju u odnosu na konkurenciju (bez čekanja sledećeg scrape-a)"""
+    if created:
+        return
+    if VariantPriceComparison.objects.filter(variant=instance).exclude(our_price=instance.current_price).exists():
+        price_comparison.refresh([instance.pk])
+
+
+@receiver(post_save, sender=ContactMessage)
+def publish_contact_message_event(sender, instance, created, **kwargs):
+    if created:
+        publish_event(
+            AdminEvent.TOPIC_MESSAGES, 'new_message',
+            message_id=instance.id,
+            name=instance.name,
+        )
+
+
+@receiver(post_init, sender=ScrapeLog)
+def remember_scrape_log_status(sender, instance, **kwargs):
+    instance._initial_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=ScrapeLog)
+def publish_scrape_completed_event(sender, instance, created, **kwargs):
+    status = instance.__dict__.get('status')
+    if status != instance._initial_status and status in ('success', 'failed'):
+        publish_event(
+            AdminEvent.TOPIC_SCRAPING, 'scrape_completed',
+            log_id=instance.id,
+            site_id=instance.site_id,
+            status=status,
+            products_found=instance.products_found,
+            products_new=instance.products_new,
+            products_updated=instance.products_updated,
+            products_removed=instance.products_removed,
+        )
+    instance._initial_status = instance.__dict__.get('status')
+
+
+# ============================================
+# PRODUCT MATCHING - automatski match-evi zastarevaju samo kada se promeni
+# nešto što utiče na uparivanje (novi/obrisan proizvod ili varijanta, naziv),
+# ne pri promeni cene ili zaliha
+# ============================================
+
+@receiver(post_init, sender=Product)
+def remember_product_name(sender, instance, **kwargs):
+    instance._initial_name = instance.__dict__.get('name')
+
+
+@receiver(post_init, sender=ProductVariant)
+def remember_variant_identity(sender, instance, **kwargs):
+    instance._initial_identity = (instance.__dict__.get('product_id'), instance.__dict__.get('name'))
+
+
+@receiver(post_save, sender=Product)
+def bump_catalog_version_on_product_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    if created or instance.name != instance._initial_name:
+        product_matching.catalog_changed()
+    instance._initial_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=ProductVariant)
+def bump_catalog_version_on_variant_save(sender, instance, created, **kwargs):
+    identity = (instance.__dict__.get('product_id'), instance.__dict__.get('name'))
+    if created or identity != instance._initial_identity:
+        product_matching.catalog_changed()
+    instance._initial_identity = identity
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=ProductVariant)
+def bump_catalog_version_on_delete(sender, **kwargs):
+    product_matching.catalog_changed()
+
+
+# ============================================
+# SITEMAP - regeneracija posle promene kataloga (debounce)
+# ============================================
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def mark_sitemap_stale(sender, **kwargs):
+    from .sitemap_builder import mark_stale
+    mark_stale()
+
+
+# ============================================
+# PRODUCT FEED - keš važi do sledeće promene kataloga
+# ============================================
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Subcategory)
+@receiver(post_delete, sender=Subcategory)
+def invalidate_product_feed(sender, **kwargs):
+    from .product_feed import invalidate
+    invalidate()
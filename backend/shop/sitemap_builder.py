@@ -0,0 +1,166 @@
+"""
+Unapred generisan, gzip-ovan sitemap.
+
+Sitemap se renderuje u statične .xml.gz fajlove pod SITEMAP_ROOT i servira
+kao čitanje fajla (sa ETag/Last-Modified) umesto ORM prolaza na svaki
+zahtev crawler-a. Kada ima više od SITEMAP_MAX_URLS adresa po sekciji,
+pravi se sitemap index sa delovima sitemap-<sekcija>-<strana>.xml.
+
+Regeneracija:
+- promena proizvoda/kategorije (signals) -> debounce tajmer + .stale marker
+- management komanda build_sitemap (deploy; `--if-stale` iz cron-a pokupi
+  marker čiji je tajmer nestao sa restartom procesa)
+- prvi zahtev samo ako sitemap još nije generisan; zastareo fajl se servira
+  dok ga tajmer ili komanda ne zamene
+"""
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'sitemap.xml.gz'
+STALE_MARKER = '.stale'
+
+_timer = None
+_timer_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+def sitemap_root():
+    return str(settings.SITEMAP_ROOT)
+
+
+def section_file_name(section, page):
+    return f'sitemap-{section}-{page}.xml.gz'
+
+
+def _write_gzip(path, content):
+    """Atomičan upis - crawler nikad ne vidi polovično upisan fajl"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            # mtime=0 - isti sadržaj daje iste bajtove
+            with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as gz:
+                gz.write(content.encode('utf-8'))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_sitemaps():
+    """
+    Renderuj sve sekcije u SITEMAP_ROOT.
+
+    Returns:
+        list: imena upisanih fajlova
+    """
+    from .sitemaps import SITEMAPS
+
+    root = sitemap_root()
+    os.makedirs(root, exist_ok=True)
+    started = time.time()
+
+    with _build_lock:
+        site = SimpleNamespace(domain=settings.SITEMAP_DOMAIN, name=settings.SITEMAP_DOMAIN)
+        pages = []  # (section, page, urls, lastmod)
+
+        for section, sitemap_class in SITEMAPS.items():
+            sitemap = sitemap_class()
+            sitemap.limit = settings.SITEMAP_MAX_URLS
+            for page in sitemap.paginator.page_range:
+                urls = sitemap.get_urls(page=page, site=site, protocol='https')
+                lastmods = [u['lastmod'] for u in urls if u.get('lastmod')]
+                pages.append((section, page, urls, max(lastmods) if lastmods else None))
+
+        written = []
+        if len(pages) <= 1 or sum(len(p[2]) for p in pages) <= settings.SITEMAP_MAX_URLS:
+            # Mali sitemap - jedan urlset fajl
+            urlset = [url for page in pages for url in page[2]]
+            _write_gzip(os.path.join(root, INDEX_FILE), render_to_string('sitemap.xml', {'urlset': urlset}))
+            written.append(INDEX_FILE)
+        else:
+            index_items = []
+            for section, page, urls, lastmod in pages:
+                file_name = section_file_name(section, page)
+                _write_gzip(os.path.join(root, file_name), render_to_string('sitemap.xml', {'urlset': urls}))
+                written.append(file_name)
+                location = f"{settings.SITEMAP_INDEX_BASE_URL.rstrip('/')}/{file_name[:-len('.gz')]}"
+                index_items.append(SimpleNamespace(location=location, last_mod=lastmod))
+            _write_gzip(os.path.join(root, INDEX_FILE), render_to_string('sitemap_index.xml', {'sitemaps': index_items}))
+            written.append(INDEX_FILE)
+
+        # Ukloni delove koji više ne postoje (npr. manje strana nego ranije)
+        for name in os.listdir(root):
+            if name.startswith('sitemap-') and name.endswith('.xml.gz') and name not in written:
+                os.remove(os.path.join(root, name))
+
+        # Marker briši samo ako nije bilo promena tokom generisanja
+        marker = os.path.join(root, STALE_MARKER)
+        if os.path.exists(marker) and os.path.getmtime(marker) <= started:
+            os.remove(marker)
+
+    logger.info(f"Sitemap built: {len(written)} file(s) in {time.time() - started:.2f}s")
+    return written
+
+
+def mark_stale():
+    """Označi sitemap kao zastareo i zakaži regeneraciju (debounce)"""
+    global _timer
+
+    root = sitemap_root()
+    try:
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, STALE_MARKER), 'a'):
+            os.utime(os.path.join(root, STALE_MARKER), None)
+    except OSError as e:
+        logger.warning(f"Could not mark sitemap stale: {e}")
+
+    with _timer_lock:
+        if _timer is not None:
+            _timer.cancel()
+        _timer = threading.Timer(settings.SITEMAP_REBUILD_DELAY, _rebuild_in_background)
+        _timer.daemon = True
+        _timer.start()
+
+
+def is_stale():
+    """Da li je posle poslednjeg generisanja bilo promena kataloga"""
+    return os.path.exists(os.path.join(sitemap_root(), STALE_MARKER))
+
+
+def _rebuild_in_background():
+    from django.db import connection
+
+    try:
+        build_sitemaps()
+    except Exception as e:
+        logger.error(f"Sitemap rebuild failed: {e}", exc_info=True)
+    finally:
+        connection.close()
+
+
+def get_sitemap_file(file_name):
+    """
+    Putanja do gotovog fajla; generiše sitemap samo ako još nije generisan.
+    Zastareo sitemap se i dalje servira - regeneraciju radi tajmer procesa
+    koji je označio promenu ili `manage.py build_sitemap`, nikad zahtev.
+    None ako traženi deo ne postoji.
+    """
+    root = sitemap_root()
+    path = os.path.join(root, file_name)
+
+    if not os.path.exists(os.path.join(root, INDEX_FILE)):
+        build_sitemaps()
+
+    return path if os.path.exists(path) else None
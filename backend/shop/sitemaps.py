@@ -8,7 +8,7 @@ class ProductSitemap(Sitemap):
     protocol = 'https'
 
     def items(self):
-        return Product.objects.filter(in_stock=True)
+        return Product.objects.filter(in_stock=True).order_by('id')
 
     def lastmod(self, obj):
         # Koristi updated_at da Google zna kada je proizvod poslednji put izmenjen (cena, opis, itd)
@@ -34,7 +34,7 @@ class CategorySitemap(Sitemap):
     protocol = 'https'
 
     def items(self):
-        return Category.objects.all()
+        return Category.objects.order_by('id')
 
     def location(self, obj):
         # Za sada koristi query parameter (kasnije može slug)
@@ -73,3 +73,11 @@ class StaticViewSitemap(Sitemap):
             # Zameni api.betapack.co.rs sa www.betapack.co.rs (sajt forsira www verziju)
             url_info['location'] = url_info['location'].replace('api.betapack.co.rs', 'www.betapack.co.rs')
         return urls
+
+
+# Sekcije sitemap-a (koristi ih sitemap_builder)
+SITEMAPS = {
+    'products': ProductSitemap,
+    'categories': CategorySitemap,
+    'static': StaticViewSitemap,
+}
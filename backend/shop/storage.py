@@ -1,12 +1,21 @@
 """
 Custom Cloudinary storage backend for Django
 """
+import logging
+import threading
+from collections import OrderedDict
+
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
 from django.core.files.storage import Storage
 from django.core.files.base import ContentFile
 from django.conf import settings
-import os
+
+logger = logging.getLogger(__name__)
+
+# Koliko nepročitanih upload odgovora se čuva; stariji se izbacuju
+UPLOAD_RESULTS_MAX = 256
 
 
 class CloudinaryMediaStorage(Storage):
@@ -17,19 +26,24 @@ class CloudinaryMediaStorage(Storage):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Configure Cloudinary
-        print("[CLOUDINARY] Initializing CloudinaryMediaStorage")
+        logger.debug("[CLOUDINARY] Initializing CloudinaryMediaStorage")
         cloudinary.config(
             cloud_name=settings.CLOUDINARY_STORAGE['CLOUD_NAME'],
             api_key=settings.CLOUDINARY_STORAGE['API_KEY'],
             api_secret=settings.CLOUDINARY_STORAGE['API_SECRET'],
             secure=True
         )
+        # Rezultati poslednjih upload-a (public_id -> odgovor API-ja), da bi model
+        # mogao da upiše URL/dimenzije bez dodatnog poziva ka Cloudinary-ju.
+        # Storage je jedna instanca po procesu (i bulk upload ga deli između
+        # thread-ova), pa je keš ograničen i zaključan
+        self._upload_results = OrderedDict()
+        self._upload_results_lock = threading.Lock()
 
     def _save(self, name, content):
         """
         Save file to Cloudinary
         """
-        print(f"[CLOUDINARY] _save() called with name: {name}")
         try:
             # Upload to Cloudinary
             result = cloudinary.uploader.upload(
@@ -39,21 +53,21 @@ class CloudinaryMediaStorage(Storage):
                 use_filename=True,
                 unique_filename=True
             )
-            print(f"[CLOUDINARY] Upload successful! Public ID: {result['public_id']}")
-            print(f"[CLOUDINARY] Secure URL: {result.get('secure_url')}")
+            logger.info(f"[CLOUDINARY] Upload successful! Public ID: {result['public_id']}")
+            with self._upload_results_lock:
+                self._upload_results[result['public_id']] = result
+                while len(self._upload_results) > UPLOAD_RESULTS_MAX:
+                    self._upload_results.popitem(last=False)
             # Return the public_id (Cloudinary's identifier)
             return result['public_id']
         except Exception as e:
-            print(f"[CLOUDINARY] Upload FAILED: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"[CLOUDINARY] Upload FAILED: {e}", exc_info=True)
             raise
 
     def _open(self, name, mode='rb'):
         """
         Required by Django - open file for reading
         """
-        print(f"[CLOUDINARY] _open() called with name: {name}")
         # Return a ContentFile with the Cloudinary URL
         # This is needed for Django to work properly
         return ContentFile(b'')
@@ -62,36 +76,76 @@ class CloudinaryMediaStorage(Storage):
         """
         Return a filename that's available for writing
         """
-        print(f"[CLOUDINARY] get_available_name() called with name: {name}")
         return name
 
     def url(self, name):
         """
         Return the URL for accessing the file
         """
-        print(f"[CLOUDINARY] url() called with name: {name}")
         # Build Cloudinary URL with proper format
         # Cloudinary URLs need /image/upload/ in the path
-        url = cloudinary.CloudinaryImage(name).build_url(
+        return cloudinary.CloudinaryImage(name).build_url(
             secure=True,
             resource_type='image'
         )
-        print(f"[CLOUDINARY] Generated URL: {url}")
-        return url
 
     def exists(self, name):
         """
         Check if file exists - always return False to allow uploads
         """
-        print(f"[CLOUDINARY] exists() called with name: {name}")
         return False
 
     def delete(self, name):
         """
         Delete file from Cloudinary
         """
-        print(f"[CLOUDINARY] delete() called with name: {name}")
         try:
             cloudinary.uploader.destroy(name)
         except Exception as e:
-            print(f"[CLOUDINARY] Error deleting: {e}")
+            logger.error(f"[CLOUDINARY] Error deleting {name}: {e}")
+
+    def get_image_metadata(self, name, fetch=False):
+        """
+        URL, dimenzije i format slike.
+
+        Posle upload-a koristi odgovor koji je već stigao od Cloudinary-ja;
+        fetch=True (backfill komanda) pita Admin API za postojeće slike.
+        """
+        with self._upload_results_lock:
+            result = self._upload_results.pop(name, None)
+        if result is None and fetch:
+            try:
+                result = cloudinary.api.resource(name)
+            except Exception as e:
+                logger.warning(f"[CLOUDINARY] Could not fetch metadata for {name}: {e}")
+
+        if result is None:
+            return {'url': self.url(name), 'width': None, 'height': None, 'format': ''}
+
+        return {
+            'url': result.get('secure_url') or self.url(name),
+            'width': result.get('width'),
+            'height': result.get('height'),
+            'format': result.get('format') or '',
+        }
+
+
+def get_image_metadata(storage, name, fetch=False):
+    """
+    Vrati {'url', 'width', 'height', 'format'} za sliku u bilo kom storage-u.
+    Lokalni storage (DEBUG) čita dimenzije direktno iz fajla preko Pillow-a.
+    """
+    if hasattr(storage, 'get_image_metadata'):
+        return storage.get_image_metadata(name, fetch=fetch)
+
+    metadata = {'url': storage.url(name), 'width': None, 'height': None, 'format': ''}
+    try:
+        from PIL import Image
+        with storage.open(name, 'rb') as f:
+            with Image.open(f) as img:
+                metadata['width'], metadata['height'] = img.size
+                # Isti zapis kao Cloudinary ('jpg', ne 'jpeg')
+                metadata['format'] = (img.format or '').lower().replace('jpeg', 'jpg')
+    except Exception as e:
+        logger.warning(f"Could not read image metadata for {name}: {e}")
+    return metadata
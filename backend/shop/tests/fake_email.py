@@ -0,0 +1,59 @@
+"""Local stand-in for the Resend API, used by the email delivery tests"""
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeEmailServer:
+    """
+    Lokalni HTTP server koji imitira Resend POST /emails.
+
+    Primljene poruke se čuvaju u self.messages. fail_next=N vraća
+    fail_status (podrazumevano 503) za narednih N zahteva (za proveru retry
+    logike i razlikovanja privremenih i trajnih grešaka).
+
+        server = FakeEmailServer().start()
+        transport = ResendTransport(api_key='test', base_url=server.url)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.messages = []
+        self.fail_next = 0
+        self.fail_status = 503
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with server._lock:
+                    if server.fail_next > 0:
+                        server.fail_next -= 1
+                        self._reply(server.fail_status, {'message': 'fake failure'})
+                        return
+                    message_id = str(uuid.uuid4())
+                    server.messages.append({'id': message_id, **json.loads(body or b'{}')})
+                self._reply(200, {'id': message_id})
+
+            def _reply(self, code, data):
+                payload = json.dumps(data).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop.models import Category, Product, ProductImage
+
+from .utils import image_upload, isolated_files
+
+
+@isolated_files
+class BulkUploadTests(TransactionTestCase):
+    """Uploads run in a thread pool with their own connections, so no wrapping transaction"""
+    serialized_rollback = True
+
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        self.product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('admin', password='x', is_staff=True))
+
+    def post(self, files, **data):
+        return self.client.post(
+            reverse('product-image-bulk-upload'),
+            {'product': self.product.id, 'images': files, **data},
+            format='multipart',
+        )
+
+    def files(self, count):
+        return [image_upload(f'slika{i}.jpg', color=(40 * i, 20, 20)) for i in range(count)]
+
+    def images(self):
+        return list(ProductImage.objects.filter(product=self.product).order_by('order'))
+
+    def test_first_image_becomes_primary(self):
+        response = self.post(self.files(3))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 3)
+        images = self.images()
+        self.assertEqual([image.is_primary for image in images], [True, False, False])
+        self.assertEqual([image.order for image in images], [1, 2, 3])
+        self.assertTrue(all(image.delivery_url and image.renditions and image.placeholder for image in images))
+        self.assertEqual({image.alt_text for image in images}, {'Kutija'})
+
+    def test_existing_primary_is_kept(self):
+        existing = ProductImage.objects.create(product=self.product, image=image_upload('stara.jpg'), is_primary=True, order=5)
+
+        self.assertEqual(self.post(self.files(2)).status_code, 201)
+
+        images = self.images()
+        self.assertEqual([image.pk for image in images if image.is_primary], [existing.pk])
+        self.assertEqual([image.order for image in images], [5, 6, 7])
+
+    def test_primary_index_replaces_the_primary(self):
+        ProductImage.objects.create(product=self.product, image=image_upload('stara.jpg'), is_primary=True)
+
+        self.assertEqual(self.post(self.files(3), primary_index=2).status_code, 201)
+
+        primary = ProductImage.objects.get(product=self.product, is_primary=True)
+        self.assertEqual(primary.order, 3)  # existing image has order 0
+
+    def test_invalid_file_rejects_the_whole_request(self):
+        files = self.files(1) + [SimpleUploadedFile('opis.jpg', b'nije slika', content_type='image/jpeg')]
+
+        with mock.patch.object(ProductImage, 'prepare_upload') as prepare:
+            response = self.post(files)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['errors']), ['opis.jpg'])
+        prepare.assert_not_called()
+        self.assertEqual(self.images(), [])
+
+    def test_request_validation(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        with override_settings(IMAGE_BULK_UPLOAD_MAX_FILES=2):
+            self.assertEqual(self.post(self.files(3)).status_code, 400)
+        response = self.client.post(reverse('product-image-bulk-upload'), {'product': 0, 'images': self.files(1)}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.images(), [])
+
+    def test_admin_only(self):
+        self.client.force_authenticate(get_user_model().objects.create_user('kupac', password='x'))
+        self.assertEqual(self.post(self.files(1)).status_code, 403)
+
+    def test_storage_failure_creates_nothing(self):
+        with mock.patch.object(ProductImage, 'prepare_upload', side_effect=OSError('storage down')), \
+                self.assertLogs('shop.views', 'ERROR'):
+            response = self.post(self.files(2))
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(self.images(), [])
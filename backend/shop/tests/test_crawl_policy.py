@@ -0,0 +1,62 @@
+import io
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from shop.management.commands.scrape_competitors import Command
+from shop.models_scraping import CompetitorSite
+from shop.scrapers import SCRAPERS
+from shop.scrapers.politeness import HostRateLimiter
+
+
+class ApplyCrawlPolicyTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.get(name='JeepCommerce')
+        self.command = Command(stdout=io.StringIO())
+
+    def apply(self, robots_txt, site_delay=0, scraper_delay=5, fetched=None):
+        CompetitorSite.objects.filter(pk=self.site.pk).update(
+            crawl_delay_seconds=site_delay, robots_txt='', robots_fetched_at=None,
+        )
+        self.site.refresh_from_db()
+        scraper = SCRAPERS['jeepcommerce']()
+        scraper.crawl_delay = scraper_delay
+        scraper.rate_limiter = HostRateLimiter()
+        with mock.patch(
+            'shop.management.commands.scrape_competitors.fetch_robots_txt', return_value=robots_txt,
+        ) as fetch:
+            self.command.apply_crawl_policy(self.site, scraper)
+        self.fetch = fetch
+        return scraper
+
+    def test_scraper_delay_is_the_floor(self):
+        scraper = self.apply('User-agent: *\nCrawl-delay: 2\n', site_delay=1, scraper_delay=5)
+        self.assertEqual(scraper.crawl_delay, 5)
+
+    def test_stricter_robots_or_site_delay_wins(self):
+        self.assertEqual(self.apply('User-agent: *\nCrawl-delay: 20\n', site_delay=1).crawl_delay, 20)
+        self.assertEqual(self.apply('User-agent: *\nCrawl-delay: 2\n', site_delay=15).crawl_delay, 15)
+
+    def test_missing_robots_txt_does_not_relax_the_delay(self):
+        # 404 -> '' (no rules, no Crawl-delay)
+        self.assertEqual(self.apply('', scraper_delay=10).crawl_delay, 10)
+
+    def test_unreachable_robots_txt_without_cache_does_not_relax_the_delay(self):
+        scraper = self.apply(None, scraper_delay=10)
+
+        self.assertEqual(scraper.crawl_delay, 10)
+        self.site.refresh_from_db()
+        self.assertIsNone(self.site.robots_fetched_at)
+
+    def test_fresh_cached_robots_txt_is_not_refetched(self):
+        CompetitorSite.objects.filter(pk=self.site.pk).update(
+            robots_txt='User-agent: *\nDisallow: /cevi/\n', robots_fetched_at=timezone.now(),
+        )
+        self.site.refresh_from_db()
+        scraper = SCRAPERS['jeepcommerce']()
+        with mock.patch('shop.management.commands.scrape_competitors.fetch_robots_txt') as fetch:
+            self.command.apply_crawl_policy(self.site, scraper)
+
+        fetch.assert_not_called()
+        self.assertFalse(scraper.robots.allowed(f'{scraper.base_url}/cevi/'))
@@ -0,0 +1,200 @@
+import smtplib
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from shop import email_utils
+from shop.email_utils import DeliveryError, ResendTransport, SMTPTransport, TransientDeliveryError
+from shop.models import EmailDeliveryLog, Order
+from shop.views import OrderViewSet
+
+from .fake_email import FakeEmailServer
+
+
+class StubTransport:
+    name = 'stub'
+
+    def send(self, subject, message, recipients, from_email, timeout):
+        return 'stub-1'
+
+
+@override_settings(EMAIL_MAX_RETRIES=3, EMAIL_RETRY_BACKOFF=1.0, EMAIL_TIMEOUT=2)
+class DeliverEmailTests(TestCase):
+    def setUp(self):
+        self.server = FakeEmailServer().start()
+        self.addCleanup(self.server.stop)
+        self.transport = ResendTransport(api_key='test', base_url=self.server.url)
+        sleep = mock.patch('shop.email_utils.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def deliver(self, recipients=('office@example.rs',), **kwargs):
+        return email_utils.deliver_email('Nova narudžbina', 'Tekst', list(recipients), transport=self.transport, **kwargs)
+
+    def test_one_call_for_all_recipients(self):
+        self.assertTrue(self.deliver(['a@example.rs', ' b@example.rs ', '']))
+
+        message, = self.server.messages
+        self.assertEqual(message['to'], ['a@example.rs', 'b@example.rs'])
+        log = EmailDeliveryLog.objects.get()
+        self.assertEqual((log.status, log.attempts, log.transport), ('sent', 1, 'resend'))
+        self.assertEqual(log.provider_message_id, message['id'])
+        self.assertEqual(log.recipients, 'a@example.rs, b@example.rs')
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        self.server.fail_next = 2
+
+        with self.assertLogs('shop.email_utils', 'WARNING'):
+            self.assertTrue(self.deliver())
+
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [1.0, 2.0])
+        log = EmailDeliveryLog.objects.get()
+        self.assertEqual((log.status, log.attempts), ('sent', 3))
+
+    def test_gives_up_after_max_retries(self):
+        self.server.fail_next = 10
+
+        with self.assertLogs('shop.email_utils', 'WARNING') as logs:
+            self.assertFalse(self.deliver(max_retries=1))
+
+        self.assertEqual(self.sleep.call_count, 1)
+        self.assertIn('after 2 attempt(s)', logs.output[-1])
+        log = EmailDeliveryLog.objects.get()
+        self.assertEqual((log.status, log.attempts), ('failed', 2))
+        self.assertIn('HTTP 503', log.error_message)
+
+    def test_rate_limit_is_transient(self):
+        self.server.fail_next = 1
+        self.server.fail_status = 429
+
+        with self.assertLogs('shop.email_utils', 'WARNING'):
+            self.assertTrue(self.deliver())
+
+        self.assertEqual(EmailDeliveryLog.objects.get().attempts, 2)
+
+    def test_client_errors_are_permanent(self):
+        self.server.fail_next = 1
+        self.server.fail_status = 422
+
+        with self.assertLogs('shop.email_utils', 'ERROR'):
+            self.assertFalse(self.deliver())
+
+        self.sleep.assert_not_called()
+        log = EmailDeliveryLog.objects.get()
+        self.assertEqual((log.status, log.attempts), ('failed', 1))
+        self.assertIn('HTTP 422', log.error_message)
+
+    def test_missing_api_key_is_permanent(self):
+        self.transport = ResendTransport(api_key='', base_url=self.server.url)
+
+        with self.assertLogs('shop.email_utils', 'ERROR'):
+            self.assertFalse(self.deliver())
+
+        self.assertEqual(EmailDeliveryLog.objects.get().attempts, 1)
+        self.assertEqual(self.server.messages, [])
+
+    def test_connection_errors_are_transient(self):
+        self.server.fail_next = 0
+        self.transport = ResendTransport(api_key='test', base_url='http://127.0.0.1:9')
+
+        with self.assertLogs('shop.email_utils', 'WARNING'):
+            self.assertFalse(self.deliver(max_retries=1))
+
+        self.assertEqual(EmailDeliveryLog.objects.get().attempts, 2)
+
+    def test_latency_is_recorded(self):
+        self.transport = StubTransport()
+
+        with mock.patch('shop.email_utils.time.monotonic', side_effect=[100.0, 100.25]), \
+                self.assertLogs('shop.email_utils', 'INFO'):
+            self.assertTrue(self.deliver())
+
+        log = EmailDeliveryLog.objects.get()
+        self.assertEqual((log.latency_ms, log.provider_message_id, log.transport), (250, 'stub-1', 'stub'))
+
+    def test_no_recipients(self):
+        self.assertFalse(self.deliver(['', ' ']))
+        self.assertFalse(EmailDeliveryLog.objects.exists())
+
+
+class SMTPClassificationTests(TestCase):
+    def send_raising(self, error):
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=error):
+            SMTPTransport().send('Naslov', 'Tekst', ['a@example.rs'], 'shop@example.rs', timeout=1)
+
+    def test_transient_smtp_errors(self):
+        for error in (
+            smtplib.SMTPServerDisconnected('gone'),
+            smtplib.SMTPDataError(451, b'try later'),
+            TimeoutError('timed out'),
+        ):
+            with self.subTest(error=error), self.assertRaises(TransientDeliveryError):
+                self.send_raising(error)
+
+    def test_permanent_smtp_errors(self):
+        for error in (
+            smtplib.SMTPAuthenticationError(535, b'bad credentials'),
+            smtplib.SMTPRecipientsRefused({'a@example.rs': (550, b'no such user')}),
+            smtplib.SMTPDataError(554, b'rejected'),
+        ):
+            with self.subTest(error=error), self.assertRaises(DeliveryError) as raised:
+                self.send_raising(error)
+            self.assertNotIsInstance(raised.exception, TransientDeliveryError)
+
+
+@override_settings(EMAIL_REQUEST_MAX_RETRIES=0, OWNER_EMAILS=['vlasnik@example.rs'], CONTACT_EMAIL_RECIPIENT='office@example.rs')
+class AfterCommitTests(TestCase):
+    def setUp(self):
+        self.server = FakeEmailServer().start()
+        self.addCleanup(self.server.stop)
+        transport = mock.patch(
+            'shop.email_utils.get_transport',
+            side_effect=lambda: ResendTransport(api_key='test', base_url=self.server.url),
+        )
+        transport.start()
+        self.addCleanup(transport.stop)
+
+    def test_sent_only_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            email_utils.deliver_email_after_commit('Naslov', 'Tekst', ['a@example.rs'])
+            self.assertEqual(self.server.messages, [])
+
+        callbacks[0]()
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_order_notification_marks_the_order(self):
+        order = Order.objects.create(
+            customer_name='Petar', customer_phone='0641234567', address='Ulica 1', city='Beograd', total_amount=100,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderViewSet().send_order_notification(order)
+
+        self.assertEqual(self.server.messages[0]['to'], ['vlasnik@example.rs'])
+        order.refresh_from_db()
+        self.assertTrue(order.email_sent)
+
+    def test_failed_order_notification_leaves_the_flag(self):
+        order = Order.objects.create(
+            customer_name='Petar', customer_phone='0641234567', address='Ulica 1', city='Beograd', total_amount=100,
+        )
+        self.server.fail_next = 1
+
+        with self.assertLogs('shop.email_utils', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            OrderViewSet().send_order_notification(order)
+
+        order.refresh_from_db()
+        self.assertFalse(order.email_sent)
+        self.assertEqual(EmailDeliveryLog.objects.get().attempts, 1)
+
+    def test_contact_form(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('contact-message'), {'name': 'Ana', 'email': 'ana@example.rs', 'message': 'Pitanje'},
+            )
+
+        self.assertEqual(response.status_code, 201)
+        message, = self.server.messages
+        self.assertEqual(message['to'], ['office@example.rs'])
+        self.assertIn('Pitanje', message['text'])
@@ -0,0 +1,173 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shop import events
+from shop.models import AdminEvent, Category, ContactMessage, Order, Product, ProductVariant
+from shop.models_scraping import CompetitorSite, ScrapeLog
+
+from .utils import isolated_files
+
+
+def create_order(**fields):
+    return Order.objects.create(
+        customer_name='Petar Petrović', customer_phone='0641234567', address='Ulica 1',
+        city='Beograd', total_amount=1500, **fields,
+    )
+
+
+@isolated_files
+class PublishTests(TestCase):
+    def events(self):
+        return list(AdminEvent.objects.values_list('topic', 'event_type'))
+
+    def test_order_created_and_status_changed(self):
+        order = create_order()
+        order.status = 'confirmed'
+        order.save()
+        order.admin_notes = 'pozvati'
+        order.save()
+
+        self.assertEqual(self.events(), [('orders', 'new_order'), ('orders', 'order_status')])
+        self.assertEqual(
+            AdminEvent.objects.last().payload,
+            {'order_id': order.id, 'old_status': 'pending', 'new_status': 'confirmed'},
+        )
+
+    @override_settings(LOW_STOCK_THRESHOLD=5)
+    def test_low_stock_only_when_crossing_the_threshold(self):
+        category = Category.objects.create(name='Profili')
+        product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+        variant = ProductVariant.objects.create(product=product, name='40x40', price=100, stock_quantity=10)
+
+        for quantity in (6, 4, 3, 0, 10):
+            variant.stock_quantity = quantity
+            variant.save()
+
+        self.assertEqual(self.events(), [('stock', 'low_stock')])
+        self.assertEqual(AdminEvent.objects.get().payload['stock_quantity'], 4)
+
+    def test_contact_message_and_finished_scrape(self):
+        ContactMessage.objects.create(name='Ana', message='Pitanje')
+        log = ScrapeLog.objects.create(site=CompetitorSite.objects.get(name='JeepCommerce'), status='running')
+        log.status = 'success'
+        log.save()
+
+        self.assertEqual(self.events(), [('messages', 'new_message'), ('scraping', 'scrape_completed')])
+
+    def test_failed_insert_does_not_break_the_callers_transaction(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TRIGGER reject_admin_event BEFORE INSERT ON shop_adminevent "
+                "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+            )
+
+        with transaction.atomic(), self.assertLogs('shop.events', 'ERROR'):
+            order = create_order()
+            order.admin_notes = 'sačuvano posle neuspelog događaja'
+            order.save()
+
+        self.assertEqual(Order.objects.get().admin_notes, 'sačuvano posle neuspelog događaja')
+        self.assertFalse(AdminEvent.objects.exists())
+
+    def test_parse_topics(self):
+        self.assertEqual(events.parse_topics('orders, stock,unknown'), ['orders', 'stock'])
+        self.assertEqual(events.parse_topics('unknown'), events.parse_topics(None))
+
+
+class PruneTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(events, '_last_prune', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def old_event(self):
+        event = AdminEvent.objects.create(topic='orders', event_type='new_order')
+        AdminEvent.objects.filter(pk=event.pk).update(created_at=timezone.now() - timedelta(days=30))
+        return event
+
+    @override_settings(ADMIN_EVENTS_RETENTION_DAYS=7, ADMIN_EVENTS_PRUNE_INTERVAL_SECONDS=3600)
+    def test_prune_runs_at_most_once_per_interval(self):
+        self.old_event()
+        recent = AdminEvent.objects.create(topic='orders', event_type='new_order')
+
+        with mock.patch('shop.events.time.monotonic', return_value=1000.0):
+            events.prune_old_events()
+        self.assertEqual(list(AdminEvent.objects.values_list('id', flat=True)), [recent.id])
+
+        second = self.old_event()
+        with mock.patch('shop.events.time.monotonic', return_value=1000.0 + 3599):
+            events.prune_old_events()
+        self.assertTrue(AdminEvent.objects.filter(pk=second.pk).exists())
+
+        with mock.patch('shop.events.time.monotonic', return_value=1000.0 + 3600):
+            events.prune_old_events()
+        self.assertFalse(AdminEvent.objects.filter(pk=second.pk).exists())
+
+
+@override_settings(ADMIN_EVENTS_POLL_SECONDS=0)
+class StreamTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(events, '_last_prune', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        staff = get_user_model().objects.create_user('admin', password='x', is_staff=True)
+        self.token = str(AccessToken.for_user(staff))
+
+    def open(self, name='admin-events', **params):
+        response = self.client.get(reverse(name), {'token': self.token, **params})
+        self.addCleanup(response.close)
+        return response
+
+    def messages(self, response, count):
+        """First `count` SSE messages (heartbeats included)"""
+        chunks = []
+        for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+            if len(chunks) == count:
+                return chunks
+        return chunks
+
+    @staticmethod
+    def data(message):
+        return json.loads(message.split('data: ', 1)[1])
+
+    def test_requires_a_staff_token(self):
+        self.assertEqual(self.client.get(reverse('admin-events')).status_code, 401)
+        user = get_user_model().objects.create_user('kupac', password='x')
+        response = self.client.get(reverse('admin-events'), {'token': str(AccessToken.for_user(user))})
+        self.assertEqual(response.status_code, 401)
+
+    def test_new_connection_starts_after_existing_events(self):
+        AdminEvent.objects.create(topic='orders', event_type='new_order', payload={'order_id': 1})
+        response = self.open()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        init, heartbeat = self.messages(response, 2)
+        self.assertEqual(self.data(init)['type'], 'init')
+        self.assertEqual(heartbeat, ': heartbeat\n\n')
+
+    def test_resumes_from_last_event_id_and_filters_topics(self):
+        first = AdminEvent.objects.create(topic='orders', event_type='new_order', payload={'order_id': 1})
+        AdminEvent.objects.create(topic='stock', event_type='low_stock', payload={'variant_id': 2})
+        third = AdminEvent.objects.create(topic='orders', event_type='order_status', payload={'order_id': 1})
+
+        response = self.open(topics='orders', last_event_id=first.id - 1)
+        init, one, two, heartbeat = self.messages(response, 4)
+
+        self.assertEqual(self.data(init)['topics'], ['orders'])
+        self.assertTrue(one.startswith(f'id: {first.id}\n'))
+        self.assertTrue(two.startswith(f'id: {third.id}\n'))
+        self.assertEqual(self.data(two), {'type': 'order_status', 'topic': 'orders', 'order_id': 1})
+        self.assertEqual(heartbeat, ': heartbeat\n\n')
+
+    def test_legacy_order_stream_defaults_to_orders(self):
+        response = self.open('order-notifications')
+        self.assertEqual(self.data(self.messages(response, 1)[0])['topics'], ['orders'])
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from shop import image_processing
+from shop.models import Category, ImageAsset, Product, ProductImage
+
+from .utils import image_upload, isolated_files
+
+
+@isolated_files
+class ImageDedupTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        self.product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+        self.process = mock.patch('shop.image_processing.process_upload', wraps=image_processing.process_upload)
+        self.process_upload = self.process.start()
+        self.addCleanup(self.process.stop)
+
+    def test_hash_and_processing_share_one_read(self):
+        upload = image_upload()
+        content = upload.read()
+
+        with mock.patch('shop.image_processing.read_upload', wraps=image_processing.read_upload) as read_upload:
+            ProductImage.objects.create(product=self.product, image=upload)
+
+        read_upload.assert_called_once()
+        # The bytes read while hashing are what gets processed
+        self.assertEqual(self.process_upload.call_args.args[2], content)
+        self.assertEqual(ImageAsset.objects.get().content_hash, image_processing.read_upload(upload)[1])
+
+    def test_same_content_reuses_the_stored_file(self):
+        first = ProductImage.objects.create(product=self.product, image=image_upload('a.jpg'))
+        second = ProductImage.objects.create(product=self.product, image=image_upload('b.jpg'))
+
+        self.assertEqual(self.process_upload.call_count, 1)
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual((second.width, second.placeholder), (first.width, first.placeholder))
+
+
+@isolated_files
+class BulkUploadDedupTests(TransactionTestCase):
+    """Uploads run in a thread pool with their own connections, so no wrapping transaction"""
+    serialized_rollback = True
+
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        self.product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user('admin', password='x', is_staff=True))
+        process = mock.patch('shop.image_processing.process_upload', wraps=image_processing.process_upload)
+        self.process_upload = process.start()
+        self.addCleanup(process.stop)
+
+    def test_bulk_upload_processes_identical_files_once(self):
+        response = self.client.post(reverse('product-image-bulk-upload'), {
+            'product': self.product.id,
+            'images': [image_upload('a.jpg'), image_upload('kopija.jpg'), image_upload('plava.jpg', color=(0, 0, 200))],
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.process_upload.call_count, 2)
+        self.assertEqual(ImageAsset.objects.count(), 2)
+        first, copy, other = ProductImage.objects.filter(product=self.product).order_by('order')
+        self.assertEqual(copy.image.name, first.image.name)
+        self.assertEqual(copy.renditions, first.renditions)
+        self.assertNotEqual(other.image.name, first.image.name)
+        self.assertEqual([image.is_primary for image in (first, copy, other)], [True, False, False])
@@ -0,0 +1,114 @@
+import base64
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from shop import image_processing
+from shop.models import Category, Product, ProductImage
+
+from .utils import image_upload, isolated_files
+
+ORIENTATION = 0x0112
+
+
+def exif_with_orientation(value):
+    exif = Image.Exif()
+    exif[ORIENTATION] = value
+    return exif.tobytes()
+
+
+def open_content(result):
+    result['content'].seek(0)
+    return Image.open(io.BytesIO(result['content'].read()))
+
+
+class ProcessUploadTests(SimpleTestCase):
+    def process(self, upload):
+        return image_processing.process_upload(upload, upload.name)
+
+    def test_exif_orientation_is_applied_and_stripped(self):
+        # Stored landscape, EXIF says "rotate 90 CW" - a portrait photo from a phone
+        result = self.process(image_upload('telefon.jpg', size=(60, 30), exif=exif_with_orientation(6)))
+
+        image = open_content(result)
+        self.assertEqual(image.size, (30, 60))
+        self.assertNotIn(ORIENTATION, image.getexif())
+        self.assertEqual(result['name'], 'telefon.jpg')
+
+    def test_small_clean_image_is_kept_as_is(self):
+        upload = image_upload('mala.jpg')
+        original = upload.read()
+
+        result = self.process(upload)
+
+        self.assertEqual(result['content'].read(), original)
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_oversized_image_is_downscaled_and_reencoded(self):
+        result = self.process(image_upload('velika.webp', size=(400, 200), image_format='WEBP'))
+
+        image = open_content(result)
+        self.assertEqual((image.format, image.size), ('WEBP', (100, 50)))
+        self.assertEqual(result['name'], 'velika.webp')
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_transparent_png_stays_png(self):
+        buffer = io.BytesIO()
+        Image.new('RGBA', (200, 200), (0, 0, 0, 0)).save(buffer, 'PNG')
+
+        result = self.process(SimpleUploadedFile('logo.png', buffer.getvalue()))
+
+        self.assertEqual(open_content(result).mode, 'RGBA')
+        self.assertEqual(result['name'], 'logo.png')
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_other_formats_become_jpeg(self):
+        result = self.process(image_upload('sken.bmp', size=(300, 100), image_format='BMP'))
+
+        self.assertEqual(open_content(result).format, 'JPEG')
+        self.assertEqual(result['name'], 'sken.jpg')
+
+    def test_not_an_image(self):
+        with self.assertLogs('shop.image_processing', 'WARNING'):
+            self.assertIsNone(self.process(SimpleUploadedFile('opis.jpg', b'nije slika')))
+
+    def test_placeholder_is_a_tiny_jpeg_data_uri(self):
+        placeholder = image_processing.build_placeholder(Image.new('RGBA', (800, 400), (10, 120, 200, 255)))
+
+        prefix = 'data:image/jpeg;base64,'
+        self.assertTrue(placeholder.startswith(prefix))
+        image = Image.open(io.BytesIO(base64.b64decode(placeholder[len(prefix):])))
+        self.assertEqual((image.format, image.size), ('JPEG', (16, 8)))
+        self.assertLess(len(placeholder), 1024)
+
+    def test_dominant_color(self):
+        image = Image.new('RGB', (10, 10), (200, 30, 30))
+        image.paste((0, 0, 0), (0, 0, 10, 5))
+
+        self.assertEqual(image_processing.dominant_color(image), '#640f0f')
+
+
+@isolated_files
+class UploadFieldsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        self.product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+
+    def test_upload_fills_placeholder_and_color(self):
+        image = ProductImage.objects.create(
+            product=self.product, image=image_upload(size=(60, 30), exif=exif_with_orientation(6)),
+        )
+
+        self.assertTrue(image.placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertRegex(image.dominant_color, r'^#[0-9a-f]{6}$')
+        self.assertEqual((image.width, image.height), (30, 60))
+
+    def test_backfill_analysis_of_a_stored_image(self):
+        image = ProductImage.objects.create(product=self.product, image=image_upload(color=(0, 0, 200)))
+
+        placeholder, color = image_processing.analyze_stored_image(image)
+
+        self.assertEqual(placeholder, image.placeholder)
+        self.assertEqual(color, image.dominant_color)
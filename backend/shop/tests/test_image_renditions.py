@@ -0,0 +1,90 @@
+import io
+from unittest import mock
+
+import cloudinary
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from shop import image_renditions
+from shop.models import Category, Product, ProductImage
+from shop.serializers import ProductImageSerializer
+
+from .utils import TEMP_ROOT, image_upload, isolated_files
+
+
+def open_stored(url):
+    name = url.split('/media/', 1)[1]
+    with default_storage.open(name, 'rb') as f:
+        return Image.open(io.BytesIO(f.read()))
+
+
+@isolated_files
+@override_settings(IMAGE_MAX_DIMENSION=4000)
+class LocalRenditionTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        self.product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+
+    def upload(self, **kwargs):
+        return ProductImage.objects.create(product=self.product, image=image_upload(**kwargs))
+
+    def test_widths_are_capped_at_the_source(self):
+        image = self.upload(size=(1000, 500))
+
+        self.assertEqual(
+            {name: rendition['width'] for name, rendition in image.renditions.items()},
+            {'thumb': 160, 'card': 400, 'detail': 800, 'zoom': 1000},
+        )
+
+    def test_files_are_written_in_webp_and_fallback_format(self):
+        image = self.upload(size=(600, 300))
+        card = image.renditions['card']
+
+        webp = open_stored(card['webp'])
+        self.assertEqual((webp.format, webp.size), ('WEBP', (400, 200)))
+        self.assertEqual(open_stored(card['fallback']).format, 'JPEG')
+        self.assertTrue(TEMP_ROOT in default_storage.path(card['webp'].split('/media/', 1)[1]))
+
+    def test_png_fallback_stays_png(self):
+        image = self.upload(name='providna.png', image_format='PNG', size=(300, 300))
+
+        self.assertTrue(image.renditions['thumb']['fallback'].endswith('_thumb.png'))
+        self.assertEqual(open_stored(image.renditions['thumb']['fallback']).format, 'PNG')
+
+    def test_serializer_exposes_srcset(self):
+        image = self.upload(size=(500, 250))
+
+        srcset = ProductImageSerializer(image).data['srcset']
+
+        self.assertTrue(srcset['webp'].endswith(' 500w'))
+        self.assertIn('_card.jpg 400w', srcset['fallback'])
+
+    def test_unreadable_file_gives_no_renditions(self):
+        with self.assertLogs('shop.image_renditions', 'WARNING'):
+            self.assertEqual(image_renditions.build_renditions(default_storage, 'nema/fajla.jpg'), {})
+
+
+class SrcsetTests(SimpleTestCase):
+    def test_sorted_by_width(self):
+        renditions = {
+            'zoom': {'width': 1600, 'webp': 'z.webp', 'fallback': 'z.jpg'},
+            'thumb': {'width': 160, 'webp': 't.webp', 'fallback': 't.jpg'},
+        }
+
+        self.assertEqual(image_renditions.build_srcset(renditions), {
+            'webp': 't.webp 160w, z.webp 1600w',
+            'fallback': 't.jpg 160w, z.jpg 1600w',
+        })
+
+    def test_no_renditions(self):
+        self.assertIsNone(image_renditions.build_srcset({}))
+
+    def test_cloudinary_urls_use_transformations(self):
+        with mock.patch.object(cloudinary.config(), 'cloud_name', 'demo', create=True):
+            renditions = image_renditions._cloudinary_renditions('proizvodi/kutija', 1200, 'png')
+
+        self.assertEqual(renditions['zoom']['width'], 1200)
+        self.assertIn('/demo/image/upload/c_limit,q_auto,w_400/', renditions['card']['webp'])
+        self.assertTrue(renditions['card']['webp'].endswith('proizvodi/kutija.webp'))
+        self.assertTrue(renditions['card']['fallback'].endswith('proizvodi/kutija.png'))
@@ -0,0 +1,179 @@
+import contextlib
+import io
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from shop.scrapers import SCRAPERS
+from shop.scrapers.politeness import CircuitBreaker, CircuitOpen, HostRateLimiter, RobotsRules, retry_after_seconds
+
+
+def response_with(retry_after=None, status=429):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_stays_closed_below_min_requests(self):
+        breaker = CircuitBreaker(error_rate=0.5, window=10, min_requests=4)
+        for _ in range(3):
+            breaker.record(True)
+        self.assertFalse(breaker.tripped)
+
+    def test_opens_when_error_rate_is_exceeded(self):
+        breaker = CircuitBreaker(error_rate=0.5, window=10, min_requests=4)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(True)
+        with self.assertRaises(CircuitOpen):
+            breaker.record(True)
+        self.assertTrue(breaker.tripped)
+
+    def test_exact_error_rate_does_not_open(self):
+        breaker = CircuitBreaker(error_rate=0.5, window=10, min_requests=4)
+        for failed in (True, False, True, False):
+            breaker.record(failed)
+        self.assertFalse(breaker.tripped)
+
+    def test_only_the_window_counts(self):
+        breaker = CircuitBreaker(error_rate=0.5, window=4, min_requests=4)
+        breaker.record(True)
+        breaker.record(True)
+        for _ in range(4):
+            breaker.record(False)
+        self.assertFalse(breaker.tripped)
+
+    def test_stays_open_once_tripped(self):
+        breaker = CircuitBreaker(error_rate=0.5, window=4, min_requests=2)
+        breaker.record(True)
+        with self.assertRaises(CircuitOpen):
+            breaker.record(True)
+        with self.assertRaises(CircuitOpen):
+            breaker.record(False)
+
+
+class RetryAfterTests(SimpleTestCase):
+    def test_missing_or_invalid_header(self):
+        self.assertIsNone(retry_after_seconds(response_with()))
+        self.assertIsNone(retry_after_seconds(response_with('soon')))
+        self.assertIsNone(retry_after_seconds(response_with('-5')))
+
+    def test_delta_seconds(self):
+        self.assertEqual(retry_after_seconds(response_with('120')), 120.0)
+
+    def test_http_date(self):
+        when = datetime.now(timezone.utc) + timedelta(seconds=60)
+        seconds = retry_after_seconds(response_with(format_datetime(when, usegmt=True)))
+        self.assertAlmostEqual(seconds, 60, delta=2)
+
+    def test_http_date_in_the_past_is_zero(self):
+        when = datetime.now(timezone.utc) - timedelta(hours=1)
+        self.assertEqual(retry_after_seconds(response_with(format_datetime(when, usegmt=True))), 0.0)
+
+
+class RobotsRulesTests(SimpleTestCase):
+    def test_disallow_for_matching_agent(self):
+        rules = RobotsRules(
+            'User-agent: *\nDisallow: /admin/\n\nUser-agent: BadBot\nDisallow: /\n',
+            'Mozilla/5.0',
+        )
+        self.assertFalse(rules.allowed('https://example.rs/admin/page'))
+        self.assertTrue(rules.allowed('https://example.rs/proizvodi/'))
+        self.assertFalse(RobotsRules(rules.text, 'BadBot').allowed('https://example.rs/proizvodi/'))
+
+    def test_empty_file_allows_everything_without_delay(self):
+        rules = RobotsRules('', 'Mozilla/5.0')
+        self.assertTrue(rules.allowed('https://example.rs/anything'))
+        self.assertIsNone(rules.crawl_delay)
+
+    def test_fractional_crawl_delay_is_rounded_up(self):
+        self.assertEqual(RobotsRules('User-agent: *\nCrawl-delay: 0.5\n').crawl_delay, 1.0)
+
+    def test_request_rate_is_used_when_stricter(self):
+        rules = RobotsRules('User-agent: *\nCrawl-delay: 2\nRequest-rate: 1/10\n')
+        self.assertEqual(rules.crawl_delay, 10.0)
+
+
+class RequestRetryTests(SimpleTestCase):
+    def setUp(self):
+        self.scraper = SCRAPERS['jeepcommerce']()
+        self.scraper.crawl_delay = 0
+        self.scraper.rate_limiter = HostRateLimiter()
+        self.sleeps = []
+        self.scraper._sleep = self.sleeps.append
+
+    def request(self, *responses):
+        with mock.patch.object(self.scraper.session, 'get', side_effect=responses) as get, \
+                contextlib.redirect_stdout(io.StringIO()):
+            try:
+                return self.scraper._request('https://example.rs/a/', {})
+            finally:
+                self.calls = get.call_count
+
+    def test_retries_transient_errors_with_growing_backoff(self):
+        ok = response_with(status=200)
+
+        response = self.request(response_with(status=503), requests.ConnectionError('reset'), ok)
+
+        self.assertIs(response, ok)
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.scraper.stats['retries'], 2)
+        # Jittered between half and all of base * 2**attempt
+        self.assertTrue(1.0 <= self.sleeps[0] <= 2.0)
+        self.assertTrue(2.0 <= self.sleeps[1] <= 4.0)
+
+    def test_gives_up_after_max_retries(self):
+        response = self.request(*[response_with(status=502)] * 4)
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(self.calls, self.scraper.max_retries + 1)
+
+    def test_last_connection_error_is_raised(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.request(*[requests.ConnectionError('down')] * 4)
+
+    def test_retry_after_is_respected_and_too_long_is_not_retried(self):
+        self.request(response_with('30'), response_with(status=200))
+        self.assertEqual(self.sleeps, [30.0])
+
+        response = self.request(response_with('3600'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.calls, 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.assertEqual(self.request(response_with(status=404)).status_code, 404)
+        self.assertEqual(self.sleeps, [])
+
+    def test_circuit_breaker_stops_a_failing_site(self):
+        self.scraper.circuit_breaker = CircuitBreaker(error_rate=0.5, window=10, min_requests=4)
+        self.scraper.max_retries = 10
+
+        with self.assertRaises(CircuitOpen):
+            self.request(*[response_with(status=500)] * 11)
+        self.assertEqual(self.calls, 4)
+
+
+class HostRateLimiterTests(SimpleTestCase):
+    def test_cancelled_wait_does_not_take_the_slot(self):
+        limiter = HostRateLimiter()
+        limiter.wait('https://example.rs/a/', 0)
+        last = limiter._last_request['example.rs']
+        cancel = threading.Event()
+        cancel.set()
+
+        limiter.wait('https://example.rs/b/', 60, cancel)
+
+        self.assertEqual(limiter._last_request['example.rs'], last)
+
+    def test_delay_between_requests_to_one_host(self):
+        limiter = HostRateLimiter()
+        self.assertEqual(limiter.wait('https://example.rs/a/', 0.05), 0)
+        self.assertGreater(limiter.wait('https://EXAMPLE.rs/b/', 0.05), 0)
+        self.assertEqual(limiter.wait('https://other.rs/', 0.05), 0)
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from shop import price_comparison
+from shop.models import Category, Product, ProductVariant
+from shop.models_scraping import CompetitorSite, ProductMatch, ScrapedProduct, VariantPriceComparison
+
+from .utils import isolated_files
+
+
+@isolated_files
+class RefreshTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        product = Product.objects.create(name='Kutija', description='-', price=1, category=category)
+        self.variant = ProductVariant.objects.create(product=product, name='40x40x2', price=Decimal('120.00'))
+        self.sites = [
+            CompetitorSite.objects.create(name=f'Test {i}', url=f'https://test{i}.rs') for i in range(3)
+        ]
+
+    def competitor(self, site, price, status=ProductMatch.STATUS_AUTO, **fields):
+        scraped = ScrapedProduct.objects.create(
+            site=site, external_id=str(price), name='Kutija 40x40x2', current_price=price,
+            product_url=f'{site.url}/{price}/', **fields,
+        )
+        ProductMatch.objects.create(
+            scraped_product=scraped, product=self.variant.product, variant=self.variant,
+            status=status, confidence=0.9, source_name=scraped.name,
+        )
+        return scraped
+
+    def comparison(self):
+        return VariantPriceComparison.objects.get(variant=self.variant)
+
+    def test_aggregates_effective_competitor_prices(self):
+        self.competitor(self.sites[0], Decimal('100.00'))
+        self.competitor(self.sites[1], Decimal('150.00'), on_sale=True, sale_price=Decimal('90.00'))
+        self.competitor(self.sites[2], Decimal('130.00'))
+
+        self.assertEqual(price_comparison.refresh(), {'updated': 1, 'deleted': 0})
+
+        row = self.comparison()
+        self.assertEqual(row.competitor_count, 3)
+        self.assertEqual((row.min_price, row.median_price, row.max_price), (Decimal('90.00'), Decimal('100.00'), Decimal('130.00')))
+        self.assertEqual(row.cheapest_site_id, self.sites[1].pk)
+        self.assertEqual(row.price_position, VariantPriceComparison.POSITION_ABOVE_MEDIAN)
+        self.assertEqual(row.price_index, 120.0)
+
+    def test_rejected_and_inactive_competitors_are_ignored(self):
+        self.competitor(self.sites[0], Decimal('100.00'))
+        self.competitor(self.sites[1], Decimal('50.00'), status=ProductMatch.STATUS_REJECTED)
+        self.competitor(self.sites[2], Decimal('60.00'), is_active=False)
+
+        price_comparison.refresh()
+
+        self.assertEqual(self.comparison().competitor_count, 1)
+        self.assertEqual(self.comparison().min_price, Decimal('100.00'))
+
+    def test_row_is_deleted_when_matches_are_gone(self):
+        scraped = self.competitor(self.sites[0], Decimal('100.00'))
+        price_comparison.refresh()
+
+        scraped.delete()
+
+        self.assertEqual(price_comparison.refresh([self.variant.pk]), {'updated': 0, 'deleted': 1})
+        self.assertFalse(VariantPriceComparison.objects.exists())
+
+    def test_our_price_change_refreshes_the_row(self):
+        self.competitor(self.sites[0], Decimal('100.00'))
+        self.competitor(self.sites[1], Decimal('130.00'))
+        price_comparison.refresh()
+        self.assertEqual(self.comparison().price_position, VariantPriceComparison.POSITION_ABOVE_MEDIAN)
+
+        self.variant.price = Decimal('95.00')
+        self.variant.save()
+
+        row = self.comparison()
+        self.assertEqual(row.our_price, Decimal('95.00'))
+        self.assertEqual(row.price_position, VariantPriceComparison.POSITION_CHEAPEST)
+
+    def test_our_sale_price_counts(self):
+        self.competitor(self.sites[0], Decimal('100.00'))
+        price_comparison.refresh()
+
+        self.variant.on_sale = True
+        self.variant.sale_price = Decimal('99.00')
+        self.variant.save()
+
+        self.assertEqual(self.comparison().our_price, Decimal('99.00'))
+
+    def test_unrelated_save_does_not_refresh(self):
+        self.competitor(self.sites[0], Decimal('100.00'))
+        price_comparison.refresh()
+        updated_at = self.comparison().updated_at
+
+        self.variant.stock_quantity = 3
+        self.variant.save()
+
+        self.assertEqual(self.comparison().updated_at, updated_at)
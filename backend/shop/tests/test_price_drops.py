@@ -0,0 +1,87 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from shop import price_drops
+from shop.models_scraping import CompetitorSite, PriceHistory, ScrapedProduct
+
+
+class PriceDropTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        self.other_site = CompetitorSite.objects.create(name='Other', url='https://other.rs')
+        self.since = self.now - timedelta(days=7)
+
+    def product(self, external_id, prices, site=None, is_active=True):
+        """prices: [(days ago, price, sale price or None), ...] oldest first"""
+        product = ScrapedProduct.objects.create(
+            site=site or self.site, external_id=external_id, name=external_id, current_price=prices[-1][1],
+            product_url=f'https://example.rs/{external_id}/', is_active=is_active,
+        )
+        for days_ago, price, sale_price in prices:
+            row = PriceHistory.objects.create(
+                product=product, price=price, on_sale=sale_price is not None, sale_price=sale_price,
+            )
+            PriceHistory.objects.filter(pk=row.pk).update(recorded_at=self.now - timedelta(days=days_ago))
+        return product
+
+    def both(self, min_percent=0, site_id=None):
+        """Results of the window (PostgreSQL) and the batched path, which must agree"""
+        def key(drop):
+            return drop['product_id']
+        window = sorted(price_drops._drops_window(min_percent, site_id, self.since), key=key)
+        batched = sorted(price_drops._drops_batched(min_percent, site_id, self.since), key=key)
+        self.assertEqual(window, batched)
+        return batched
+
+    def test_window_and_batched_paths_agree(self):
+        dropped = self.product('dropped', [(30, 100, None), (2, 80, None)])
+        on_sale = self.product('sale', [(20, 200, None), (1, 200, 150)])
+        self.product('raised', [(10, 100, None), (1, 120, None)])
+        self.product('old-drop', [(30, 100, None), (20, 50, None)])
+        self.product('single', [(1, 100, None)])
+        self.product('inactive', [(10, 100, None), (1, 10, None)], is_active=False)
+        self.product('drop-then-rise', [(5, 100, None), (3, 50, None), (1, 70, None)])
+
+        drops = self.both()
+
+        self.assertEqual([drop['product_id'] for drop in drops], [dropped.id, on_sale.id])
+        self.assertEqual(drops[0]['previous_price'], Decimal('100'))
+        self.assertEqual(drops[0]['current_price'], Decimal('80'))
+        self.assertEqual(drops[0]['drop_percent'], 20.0)
+        self.assertEqual(drops[1]['drop_percent'], 25.0)
+
+    def test_min_percent_and_site_filters(self):
+        self.product('small', [(10, 100, None), (1, 95, None)])
+        big = self.product('big', [(10, 100, None), (1, 50, None)])
+        other = self.product('other', [(10, 100, None), (1, 50, None)], site=self.other_site)
+
+        self.assertEqual([drop['product_id'] for drop in self.both(min_percent=10)], [big.id, other.id])
+        self.assertEqual([drop['product_id'] for drop in self.both(site_id=self.other_site.id)], [other.id])
+
+    def test_find_price_drops_sorts_by_percent(self):
+        small = self.product('small', [(10, 100, None), (1, 90, None)])
+        big = self.product('big', [(10, 100, None), (1, 50, None)])
+
+        drops = price_drops.find_price_drops(days=7)
+
+        self.assertEqual([drop['product_id'] for drop in drops], [big.id, small.id])
+
+    def test_zero_sale_price_is_not_a_drop(self):
+        self.product('zero-sale', [(10, 100, None), (1, 100, 0)])
+
+        self.assertEqual(self.both(), [])
+
+    def test_batched_path_reads_only_the_window_and_one_previous_row(self):
+        long_history = self.product('long', [(days, 200 - days, None) for days in range(60, 8, -1)] + [(1, 100, None)])
+        self.product('two-recent', [(60, 500, None), (3, 300, None), (1, 290, None)])
+
+        with self.assertNumQueries(3):  # recent products, window rows, previous rows
+            drops = price_drops._drops_batched(0, None, self.since)
+
+        by_product = {drop['product_id']: drop for drop in drops}
+        self.assertEqual(by_product[long_history.id]['previous_price'], Decimal('191'))
+        self.assertEqual(len(by_product), 2)
@@ -0,0 +1,162 @@
+import importlib
+import io
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from shop import price_history
+from shop.models_scraping import CompetitorSite, PriceHistory, PriceHistoryRollup, ScrapedProduct
+
+partition_migration = importlib.import_module('shop.migrations.0043_partition_price_history')
+
+
+def at(day, hour=12):
+    return datetime(2026, 1, day, hour, tzinfo=dt_timezone.utc)
+
+
+class RetentionCutoffTests(TestCase):
+    def test_cutoff_is_aligned_to_the_bucket(self):
+        now = at(14, hour=15)  # Wednesday
+
+        self.assertEqual(price_history.retention_cutoff(3, PriceHistoryRollup.PERIOD_DAY, now), at(11, hour=0))
+        # Sunday the 11th -> the week starting Monday the 5th
+        self.assertEqual(price_history.retention_cutoff(3, PriceHistoryRollup.PERIOD_WEEK, now), at(5, hour=0))
+
+    def test_bucket_start(self):
+        self.assertEqual(price_history.bucket_start(at(7), PriceHistoryRollup.PERIOD_DAY), date(2026, 1, 7))
+        self.assertEqual(price_history.bucket_start(at(7), PriceHistoryRollup.PERIOD_WEEK), date(2026, 1, 5))
+
+
+class RollUpTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        self.cutoff = at(10, hour=0)
+
+    def product(self, external_id, prices):
+        """prices: [(recorded_at, price, sale price or None), ...]"""
+        product = ScrapedProduct.objects.create(
+            site=self.site, external_id=external_id, name=external_id, current_price=prices[-1][1],
+            product_url=f'https://example.rs/{external_id}/',
+        )
+        for recorded_at, price, sale_price in prices:
+            row = PriceHistory.objects.create(
+                product=product, price=price, on_sale=sale_price is not None, sale_price=sale_price,
+            )
+            PriceHistory.objects.filter(pk=row.pk).update(recorded_at=recorded_at)
+        return product
+
+    def roll_up(self, product, dry_run=False):
+        return price_history.roll_up_products([product.id], self.cutoff, PriceHistoryRollup.PERIOD_DAY, dry_run=dry_run)
+
+    def test_rollup_summarizes_effective_prices_per_day(self):
+        product = self.product('a', [
+            (at(1, hour=9), Decimal('100.00'), None),
+            (at(1, hour=15), Decimal('100.00'), Decimal('80.00')),
+            (at(1, hour=18), Decimal('90.00'), None),
+            (at(2), Decimal('120.00'), None),
+            (at(12), Decimal('110.00'), None),
+        ])
+
+        self.assertEqual(self.roll_up(product), {'rollups': 2, 'deleted': 3})
+
+        first, second = PriceHistoryRollup.objects.filter(product=product).order_by('period_start')
+        self.assertEqual((first.min_price, first.max_price, first.last_price), (Decimal('80.00'), Decimal('100.00'), Decimal('90.00')))
+        self.assertEqual((first.points, first.last_recorded_at), (3, at(1, hour=18)))
+        self.assertEqual((second.min_price, second.max_price, second.points), (Decimal('120.00'), Decimal('120.00'), 1))
+
+    def test_last_raw_row_before_the_cutoff_is_kept(self):
+        product = self.product('a', [(at(1), 100, None), (at(2), 120, None), (at(12), 110, None)])
+
+        self.roll_up(product)
+
+        self.assertEqual(
+            list(PriceHistory.objects.filter(product=product).order_by('recorded_at').values_list('recorded_at', flat=True)),
+            [at(2), at(12)],
+        )
+        self.assertEqual(price_history.products_to_roll_up(self.cutoff), [])
+
+    def test_rerun_does_not_count_rows_twice(self):
+        product = self.product('a', [(at(1), 100, None), (at(2), 120, None)])
+        self.roll_up(product)
+
+        self.assertEqual(self.roll_up(product), {'rollups': 0, 'deleted': 0})
+
+        self.assertEqual(
+            list(PriceHistoryRollup.objects.filter(product=product).order_by('period_start').values_list('points', flat=True)),
+            [1, 1],
+        )
+
+    def test_later_rows_extend_an_existing_bucket(self):
+        product = self.product('a', [(at(1), 100, None), (at(1, hour=13), 90, None)])
+        self.roll_up(product)
+        PriceHistory.objects.create(product=product, price=70)
+        PriceHistory.objects.filter(product=product, price=70).update(recorded_at=at(1, hour=20))
+
+        self.roll_up(product)
+
+        rollup = PriceHistoryRollup.objects.get(product=product)
+        self.assertEqual((rollup.min_price, rollup.last_price, rollup.points), (Decimal('70.00'), Decimal('70.00'), 3))
+
+    def test_dry_run_changes_nothing(self):
+        product = self.product('a', [(at(1), 100, None), (at(2), 120, None)])
+
+        self.assertEqual(self.roll_up(product, dry_run=True), {'rollups': 2, 'deleted': 1})
+
+        self.assertEqual(PriceHistory.objects.count(), 2)
+        self.assertFalse(PriceHistoryRollup.objects.exists())
+
+
+class RollupCommandTests(TestCase):
+    def setUp(self):
+        site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        self.product = ScrapedProduct.objects.create(
+            site=site, external_id='a', name='a', current_price=100, product_url='https://example.rs/a/',
+        )
+        now = timezone.now()
+        for days_ago, price in [(60, 100), (50, 90), (40, 95), (1, 100)]:
+            row = PriceHistory.objects.create(product=self.product, price=price)
+            PriceHistory.objects.filter(pk=row.pk).update(recorded_at=now - timedelta(days=days_ago))
+
+    def call(self, **options):
+        out = io.StringIO()
+        call_command('rollup_price_history', keep_days=30, period='week', stdout=out, **options)
+        return out.getvalue()
+
+    def test_rolls_up_old_rows(self):
+        output = self.call()
+
+        self.assertIn('Rolled up 2 of 4 raw rows', output)
+        self.assertEqual(PriceHistory.objects.count(), 2)
+        rollups = PriceHistoryRollup.objects.filter(product=self.product, period=PriceHistoryRollup.PERIOD_WEEK)
+        self.assertEqual(sum(rollup.points for rollup in rollups), 3)
+        # SQLite: no partition maintenance
+        self.assertNotIn('Partitions', output)
+
+    def test_dry_run(self):
+        self.assertIn('Would roll up 2 of 4 raw rows', self.call(dry_run=True))
+        self.assertEqual(PriceHistory.objects.count(), 4)
+        self.assertFalse(PriceHistoryRollup.objects.exists())
+
+    def test_keep_days_must_be_positive(self):
+        with self.assertRaises(CommandError):
+            call_command('rollup_price_history', keep_days=0, stdout=io.StringIO())
+
+
+class PartitionMigrationTests(TestCase):
+    def test_noop_outside_postgresql(self):
+        operation = partition_migration.Migration.operations[0]
+        schema_editor = mock.Mock(connection=connection)
+
+        operation.database_forwards('shop', schema_editor, None, None)
+        operation.database_backwards('shop', schema_editor, None, None)
+
+        schema_editor.execute.assert_not_called()
+        self.assertFalse(price_history.is_partitioned())
+
+    def test_model_state_is_unchanged(self):
+        self.assertEqual(partition_migration.Migration.operations[0].state_operations, [])
@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from shop import price_series
+from shop.models_scraping import CompetitorSite, PriceHistory, PriceHistoryRollup, ScrapedProduct
+
+
+class DownsamplerTests(SimpleTestCase):
+    def setUp(self):
+        self.x = np.arange(1000, dtype=np.float64)
+        self.y = np.sin(self.x / 50) * 10
+        self.y[500] = 100  # one-point spike
+
+    def test_lttb_keeps_endpoints_and_size(self):
+        keep = price_series.lttb(self.x, self.y, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertTrue((np.diff(keep) > 0).all())
+        self.assertIn(500, keep)
+
+    def test_lttb_returns_everything_when_small(self):
+        self.assertEqual(list(price_series.lttb(self.x[:10], self.y[:10], 50)), list(range(10)))
+        self.assertEqual(list(price_series.lttb(self.x[:10], self.y[:10], 2)), list(range(10)))
+
+    def test_minmax_keeps_extremes_of_every_bucket(self):
+        keep = price_series.minmax(self.x, self.y, 50)
+        self.assertLessEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertIn(500, keep)
+        self.assertIn(int(self.y.argmin()), keep)
+
+    def test_minmax_flat_time_range(self):
+        x = np.zeros(10)
+        self.assertEqual(list(price_series.minmax(x, np.arange(10.0), 4)), [0, 9])
+
+    def test_downsample_extends_last_price_to_end(self):
+        now = timezone.now()
+        result = price_series.downsample([(now - timedelta(days=2), 10), (now - timedelta(days=1), 12)], now, 10)
+        self.assertEqual(result['price'], [10.0, 12.0, 12.0])
+        self.assertEqual(result['t'][-1], int(now.timestamp() * 1000))
+        self.assertEqual(result['raw_points'], 2)
+
+
+class LoadPointsTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        self.product = ScrapedProduct.objects.create(
+            site=site, external_id='1', name='Kutija', current_price=50, product_url='https://example.rs/1/'
+        )
+
+    def history(self, price, days_ago, **fields):
+        row = PriceHistory.objects.create(product=self.product, price=price, **fields)
+        PriceHistory.objects.filter(pk=row.pk).update(recorded_at=self.now - timedelta(days=days_ago))
+
+    def test_carried_price_then_rollups_then_raw_rows(self):
+        self.history(40, 400)
+        self.history(50, 100)
+        PriceHistoryRollup.objects.create(
+            product=self.product, period='day', period_start=(self.now - timedelta(days=300)).date(),
+            min_price=30, max_price=45, last_price=35, points=3, last_recorded_at=self.now - timedelta(days=300),
+        )
+        start = self.now - timedelta(days=365)
+
+        points = price_series.load_points([self.product.id], start, self.now)[self.product.id]
+
+        self.assertEqual([float(price) for _, price in points], [40, 35, 50])
+        self.assertEqual(points[0][0], start)
+
+    def test_rollups_overlapping_raw_rows_are_skipped(self):
+        self.history(50, 100)
+        PriceHistoryRollup.objects.create(
+            product=self.product, period='day', period_start=(self.now - timedelta(days=50)).date(),
+            min_price=30, max_price=45, last_price=35, points=3, last_recorded_at=self.now - timedelta(days=50),
+        )
+
+        points = price_series.load_points([self.product.id], self.now - timedelta(days=365), self.now)
+
+        self.assertEqual([float(price) for _, price in points[self.product.id]], [50])
+
+    def test_sale_price_is_the_effective_price(self):
+        self.history(100, 10, on_sale=True, sale_price=80)
+
+        points = price_series.load_points([self.product.id], self.now - timedelta(days=30), self.now)
+
+        self.assertEqual(float(points[self.product.id][0][1]), 80)
+
+
+class SeriesViewTests(TestCase):
+    def setUp(self):
+        site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        self.product = ScrapedProduct.objects.create(
+            site=site, external_id='1', name='Kutija', current_price=50, product_url='https://example.rs/1/'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.rs', 'x'))
+
+    def get(self, **params):
+        return self.client.get('/api/scraped-products/series/', {'ids': self.product.id, **params})
+
+    def test_points_are_validated(self):
+        for points in ['2', '-5', '100000', 'x']:
+            with self.subTest(points=points):
+                self.assertEqual(self.get(points=points).status_code, 400)
+        self.assertEqual(self.get(points=3).status_code, 200)
+
+    def test_series_of_a_product(self):
+        PriceHistory.objects.create(product=self.product, price=50)
+
+        response = self.get(method='minmax')
+
+        self.assertEqual(response.status_code, 200)
+        series = response.json()['series']
+        self.assertEqual(series[0]['product'], self.product.id)
+        self.assertEqual(series[0]['price'][0], 50.0)
@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from shop.models import ProductVariant
+from shop.models_scraping import CompetitorSite, PriceHistory, ScrapedProduct
+from shop.pricing import effective_price, effective_price_expression
+
+CASES = [
+    # (price, on_sale, sale_price, effective)
+    (Decimal('100'), False, None, Decimal('100')),
+    (Decimal('100'), False, Decimal('80'), Decimal('100')),
+    (Decimal('100'), True, Decimal('80'), Decimal('80')),
+    (Decimal('100'), True, None, Decimal('100')),
+    (Decimal('100'), True, Decimal('0'), Decimal('100')),
+]
+
+
+class EffectivePriceTests(SimpleTestCase):
+    def test_rule(self):
+        for price, on_sale, sale_price, expected in CASES:
+            with self.subTest(on_sale=on_sale, sale_price=sale_price):
+                self.assertEqual(effective_price(price, on_sale, sale_price), expected)
+
+    def test_model_properties_use_the_same_rule(self):
+        for price, on_sale, sale_price, expected in CASES:
+            with self.subTest(on_sale=on_sale, sale_price=sale_price):
+                variant = ProductVariant(price=price, on_sale=on_sale, sale_price=sale_price)
+                scraped = ScrapedProduct(current_price=price, on_sale=on_sale, sale_price=sale_price)
+                self.assertEqual(variant.current_price, expected)
+                self.assertEqual(scraped.effective_price, expected)
+
+
+class EffectivePriceExpressionTests(TestCase):
+    def test_expression_matches_the_python_rule(self):
+        site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        product = ScrapedProduct.objects.create(site=site, external_id='1', name='x', current_price=1, product_url='https://example.rs/1/')
+        expected = {}
+        for price, on_sale, sale_price, effective in CASES:
+            row = PriceHistory.objects.create(product=product, price=price, on_sale=on_sale, sale_price=sale_price)
+            expected[row.pk] = effective
+
+        rows = dict(PriceHistory.objects.annotate(effective=effective_price_expression()).values_list('id', 'effective'))
+
+        self.assertEqual(rows, expected)
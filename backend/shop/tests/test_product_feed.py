@@ -0,0 +1,194 @@
+import csv
+import io
+import os
+import tempfile
+from xml.etree import ElementTree
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from shop import product_feed
+from shop.models import Category, Product, ProductImage, ProductVariant, Subcategory
+
+from .utils import TEMP_ROOT, image_upload, isolated_files
+
+G = '{http://base.google.com/ns/1.0}'
+
+
+@isolated_files
+@override_settings(
+    PRODUCT_FEED_SITE_URL='https://www.example.rs/',
+    PRODUCT_FEED_MEDIA_BASE_URL='https://api.example.rs',
+    PRODUCT_FEED_CURRENCY='RSD',
+)
+class ProductFeedTestCase(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp(dir=TEMP_ROOT)
+        override = override_settings(PRODUCT_FEED_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.root = root
+        self.category = Category.objects.create(name='Profili')
+
+    def product(self, name, **fields):
+        fields.setdefault('description', '-')
+        fields.setdefault('price', 100)
+        return Product.objects.create(name=name, category=self.category, **fields)
+
+    def render(self, fmt):
+        return b''.join(product_feed.stream_feed(fmt)).decode('utf-8')
+
+    def xml_items(self):
+        channel = ElementTree.fromstring(self.render('xml')).find('channel')
+        return {item.findtext(f'{G}id'): item for item in channel.findall('item')}
+
+    def csv_rows(self):
+        return {row['id']: row for row in csv.DictReader(io.StringIO(self.render('csv')))}
+
+
+class FeedContentTests(ProductFeedTestCase):
+    def test_product_without_variants_is_one_item(self):
+        subcategory = Subcategory.objects.create(name='Ugaoni', category=self.category)
+        product = self.product('Kutija & poklopac', subcategory=subcategory, on_sale=True, sale_price=80)
+
+        item = self.xml_items()[f'P{product.id}']
+
+        self.assertEqual(item.findtext(f'{G}title'), 'Kutija & poklopac')
+        self.assertEqual(item.findtext(f'{G}link'), f'https://www.example.rs/proizvod/{product.slug}')
+        self.assertEqual(item.findtext(f'{G}price'), '100.00 RSD')
+        self.assertEqual(item.findtext(f'{G}sale_price'), '80.00 RSD')
+        self.assertEqual(item.findtext(f'{G}availability'), 'in_stock')
+        self.assertEqual(item.findtext(f'{G}product_type'), 'Profili > Ugaoni')
+        self.assertIsNone(item.find(f'{G}mpn'))
+
+    def test_each_variant_is_an_item(self):
+        product = self.product('Tačna 70')
+        small = ProductVariant.objects.create(product=product, name='20x20', price=150, sku='T70-20', dimension_value=20)
+        large = ProductVariant.objects.create(
+            product=product, name='40x40', price=300, dimension_value=40, in_stock=False, on_sale=True, sale_price=250,
+        )
+
+        items = self.xml_items()
+
+        self.assertEqual(set(items), {f'P{product.id}-V{small.id}', f'P{product.id}-V{large.id}'})
+        small_item = items[f'P{product.id}-V{small.id}']
+        self.assertEqual(small_item.findtext(f'{G}title'), 'Tačna 70 - 20x20')
+        self.assertEqual(small_item.findtext(f'{G}item_group_id'), str(product.id))
+        self.assertEqual(small_item.findtext(f'{G}mpn'), 'T70-20')
+        self.assertIsNone(small_item.find(f'{G}sale_price'))
+        large_item = items[f'P{product.id}-V{large.id}']
+        self.assertEqual(large_item.findtext(f'{G}availability'), 'out_of_stock')
+        self.assertEqual(large_item.findtext(f'{G}sale_price'), '250.00 RSD')
+
+    def test_images_are_absolute_with_primary_first(self):
+        product = self.product('Kutija')
+        other = ProductImage.objects.create(product=product, image=image_upload('druga.jpg'), order=1)
+        primary = ProductImage.objects.create(
+            product=product, image=image_upload('glavna.jpg', color=(0, 0, 200)), is_primary=True, order=2,
+        )
+
+        item = self.xml_items()[f'P{product.id}']
+
+        self.assertEqual(item.findtext(f'{G}image_link'), 'https://api.example.rs' + primary.delivery_url)
+        self.assertEqual(
+            [link.text for link in item.findall(f'{G}additional_image_link')],
+            ['https://api.example.rs' + other.delivery_url],
+        )
+
+    def test_csv_has_the_same_rows(self):
+        product = self.product('Kutija, "velika"', in_stock=False)
+        ProductImage.objects.create(product=product, image=image_upload('a.jpg'), is_primary=True)
+        ProductImage.objects.create(product=product, image=image_upload('b.jpg', color=(0, 200, 0)), order=1)
+        ProductImage.objects.create(product=product, image=image_upload('c.jpg', color=(0, 0, 200)), order=2)
+
+        rows = self.csv_rows()
+
+        row = rows[f'P{product.id}']
+        self.assertEqual(list(row), product_feed.CSV_COLUMNS)
+        self.assertEqual(row['title'], 'Kutija, "velika"')
+        self.assertEqual(row['availability'], 'out_of_stock')
+        self.assertEqual(row['sale_price'], '')
+        self.assertEqual(len(row['additional_image_link'].split(',')), 2)
+
+    def test_description_is_truncated(self):
+        product = self.product('Kutija', description='x' * (product_feed.DESCRIPTION_MAX_LENGTH + 10))
+
+        row = self.csv_rows()[f'P{product.id}']
+
+        self.assertEqual(len(row['description']), product_feed.DESCRIPTION_MAX_LENGTH)
+
+
+class FeedCacheTests(ProductFeedTestCase):
+    def test_finished_stream_is_cached(self):
+        self.product('Kutija')
+        self.assertIsNone(product_feed.get_cached_feed('xml'))
+
+        content = self.render('xml')
+
+        path = product_feed.get_cached_feed('xml')
+        self.assertEqual(path, os.path.join(self.root, 'products.xml'))
+        with open(path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual([name for name in os.listdir(self.root) if name.endswith('.tmp')], [])
+
+    def test_abandoned_stream_is_not_cached(self):
+        self.product('Kutija')
+        stream = product_feed.stream_feed('xml')
+        next(stream)
+
+        stream.close()
+
+        self.assertIsNone(product_feed.get_cached_feed('xml'))
+        self.assertEqual(os.listdir(self.root), [product_feed.CHANGED_MARKER])
+
+    def test_catalog_change_invalidates_the_cache(self):
+        product = self.product('Kutija')
+        self.render('xml')
+        self.render('csv')
+
+        ProductVariant.objects.create(product=product, name='20x20', price=150)
+
+        self.assertIsNone(product_feed.get_cached_feed('xml'))
+        self.assertIsNone(product_feed.get_cached_feed('csv'))
+
+    def test_change_during_a_stream_is_not_cached(self):
+        self.product('Kutija')
+        stream = product_feed.stream_feed('xml')
+        next(stream)
+
+        self.product('Nova kutija')
+        b''.join(stream)
+
+        self.assertIsNone(product_feed.get_cached_feed('xml'))
+        self.assertIn('Nova kutija', self.render('xml'))
+        self.assertIsNotNone(product_feed.get_cached_feed('xml'))
+
+
+class FeedViewTests(ProductFeedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product('Kutija')
+
+    def get(self, fmt):
+        return self.client.get(reverse('product-feed', kwargs={'fmt': fmt}))
+
+    def test_first_request_streams_and_the_next_is_served_from_file(self):
+        first = self.get('xml')
+
+        self.assertTrue(first.streaming)
+        self.assertEqual(first['Content-Type'], 'application/xml; charset=utf-8')
+        content = b''.join(first.streaming_content)
+
+        second = self.get('xml')
+        self.assertEqual(b''.join(second.streaming_content), content)
+        self.assertTrue(second.has_header('Last-Modified'))
+        second.close()
+
+    def test_csv_is_inline_attachment(self):
+        response = self.get('csv')
+
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="products.csv"')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'id,item_group_id,'))
+
+    def test_unknown_format_is_404(self):
+        self.assertEqual(self.get('json').status_code, 404)
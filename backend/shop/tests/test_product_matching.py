@@ -0,0 +1,102 @@
+from django.test import SimpleTestCase, TestCase
+
+from shop import product_matching
+from shop.models import Category, Product, ProductVariant
+from shop.models_scraping import CompetitorSite, ScrapedProduct
+from shop.product_matching import CatalogIndex, normalize
+
+from .utils import isolated_files
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_dimension_spellings_give_the_same_token(self):
+        expected = 'dim:40x40x2.8'
+        for name in ['Kutija 40x40x2.8', '40×40×2,8mm', 'KUTIJA 40 X 40 X 2.80 mm', '40*40*2,8 mm']:
+            with self.subTest(name=name):
+                self.assertIn(expected, normalize(name))
+
+    def test_cyrillic_is_transliterated(self):
+        self.assertEqual(normalize('Кутија 40х40'), normalize('Kutija 40x40'))
+
+    def test_diameter(self):
+        self.assertIn('dim:d20', normalize('Cev Ø20'))
+        self.assertIn('dim:d21', normalize('Cev fi 21'))
+
+    def test_words_are_stemmed_and_stopwords_dropped(self):
+        self.assertEqual(normalize('Kutije za ogradu'), normalize('kutija ograde'))
+        self.assertNotIn('za', normalize('Kutije za ogradu'))
+
+    def test_diacritics_are_stripped(self):
+        self.assertEqual(normalize('Tačna kovana'), normalize('Tacna kovana'))
+
+
+class BestMatchTests(SimpleTestCase):
+    def setUp(self):
+        self.index = CatalogIndex([
+            (1, 10, normalize('Kutija profil 40x40x2')),
+            (1, 11, normalize('Kutija profil 40x40x2.8')),
+            (1, 12, normalize('Kutija profil 60x40x2')),
+            (2, None, normalize('Tačna 70 kovana')),
+        ])
+
+    def test_picks_the_variant_with_the_same_dimensions(self):
+        product_id, variant_id, confidence = self.index.best_match('Kutijasti profil 40x40x2,8mm')
+        self.assertEqual((product_id, variant_id), (1, 11))
+        self.assertGreater(confidence, 0.5)
+
+    def test_product_without_variants(self):
+        product_id, variant_id, _ = self.index.best_match('Tacna kovana 70')
+        self.assertEqual((product_id, variant_id), (2, None))
+
+    def test_different_size_scores_low(self):
+        _, _, confidence = self.index.best_match('Kutija 100x100x4')
+        self.assertLess(confidence, 0.5)
+
+    def test_no_shared_tokens(self):
+        self.assertEqual(self.index.best_match('Lanac za kapiju'), (None, None, 0.0))
+
+
+@isolated_files
+class PendingTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Profili')
+        self.product = Product.objects.create(name='Kutija profil', description='-', price=1, category=category)
+        self.variant = ProductVariant.objects.create(product=self.product, name='40x40x2', price=100, stock_quantity=10)
+        site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        ScrapedProduct.objects.create(
+            site=site, external_id='1', name='Kutija 40x40x2', current_price=1, product_url='https://example.rs/1/'
+        )
+        product_matching.match_scraped_products()
+
+    def test_matched_rows_are_not_pending(self):
+        self.assertFalse(product_matching.pending().exists())
+
+    def test_price_and_stock_changes_keep_matches(self):
+        variant = ProductVariant.objects.get(pk=self.variant.pk)
+        variant.stock_quantity = 3
+        variant.price = 120
+        variant.save()
+        product = Product.objects.get(pk=self.product.pk)
+        product.description = 'Novi opis'
+        product.save()
+
+        self.assertFalse(product_matching.pending().exists())
+
+    def test_rename_makes_matches_stale(self):
+        variant = ProductVariant.objects.get(pk=self.variant.pk)
+        variant.name = '40x40x2.0'
+        variant.save()
+
+        self.assertEqual(product_matching.pending().count(), 1)
+
+    def test_new_and_deleted_variants_make_matches_stale(self):
+        other = ProductVariant.objects.create(product=self.product, name='40x40x3', price=100)
+        self.assertEqual(product_matching.pending().count(), 1)
+
+        product_matching.match_scraped_products()
+        other.delete()
+        self.assertEqual(product_matching.pending().count(), 1)
+
+    def test_renamed_scraped_product_is_pending(self):
+        ScrapedProduct.objects.update(name='Kutija 40x40x3')
+        self.assertEqual(product_matching.pending().count(), 1)
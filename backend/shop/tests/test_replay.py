@@ -0,0 +1,140 @@
+import contextlib
+import io
+import tempfile
+from unittest import mock
+
+import requests
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from requests.adapters import HTTPAdapter
+
+from shop.models_scraping import CompetitorSite, PageFetchCache, PriceHistory, ScrapedProduct, ScrapeLog
+from shop.scrapers import replay
+
+from .utils import SCRAPE_CORPUS_DIR
+
+BASE_URL = 'https://jeepcommerce.rs'
+PROFILI = f'{BASE_URL}/kategorija-proizvoda/profili/'
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError('replay must not reach the network')
+
+
+class ScrapeCorpusTests(SimpleTestCase):
+    def setUp(self):
+        self.corpus = replay.ScrapeCorpus.for_site(SCRAPE_CORPUS_DIR, 'JeepCommerce').load()
+        self.session = requests.Session()
+        adapter = replay.ReplayAdapter(self.corpus)
+        self.session.mount('https://', adapter)
+
+    def test_pages(self):
+        self.assertEqual(
+            [url for url, _ in self.corpus.pages()],
+            [f'{BASE_URL}/kategorija-proizvoda/limovi/', PROFILI, f'{BASE_URL}/robots.txt'],
+        )
+
+    def test_replays_recorded_response(self):
+        response = self.session.get(PROFILI)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['ETag'], '"profili-1"')
+        self.assertIn(b'Kutija 40x40x2', response.content)
+
+    def test_unknown_url_is_404(self):
+        self.assertEqual(self.session.get(f'{BASE_URL}/nepoznato/').status_code, 404)
+
+    def test_conditional_requests(self):
+        self.assertEqual(self.session.get(PROFILI, headers={'If-None-Match': '"profili-1"'}).status_code, 304)
+        self.assertEqual(self.session.get(PROFILI, headers={'If-None-Match': '"old"'}).status_code, 200)
+        limovi = f'{BASE_URL}/kategorija-proizvoda/limovi/'
+        since = {'If-Modified-Since': 'Mon, 05 Oct 2026 08:00:00 GMT'}
+        self.assertEqual(self.session.get(limovi, headers=since).status_code, 304)
+
+    def test_record_round_trip(self):
+        def fake_send(adapter, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['ETag'] = '"v1"'
+            response._content = b'<html></html>'
+            response.url = request.url
+            response.request = request
+            return response
+
+        with tempfile.TemporaryDirectory() as directory:
+            corpus = replay.ScrapeCorpus.for_site(directory, 'Test')
+            session = requests.Session()
+            session.mount('https://', replay.RecordingAdapter(corpus))
+            with mock.patch.object(HTTPAdapter, 'send', fake_send):
+                session.get('https://example.rs/a/')
+            corpus.save()
+
+            loaded = replay.ScrapeCorpus.for_site(directory, 'Test').load()
+
+        self.assertEqual(list(loaded.pages()), [('https://example.rs/a/', b'<html></html>')])
+        # The body is stored decoded, so transfer headers are dropped
+        self.assertEqual(loaded.get('https://example.rs/a/')['headers'], {'ETag': '"v1"'})
+
+
+class ReplayScrapeTests(TestCase):
+    def setUp(self):
+        # Seeded by migration 0020
+        self.site = CompetitorSite.objects.get(name='JeepCommerce')
+        CompetitorSite.objects.filter(pk=self.site.pk).update(url=BASE_URL, crawl_delay_seconds=0, robots_txt='CACHED')
+        self.site.refresh_from_db()
+
+    def scrape(self, *args):
+        output = io.StringIO()
+        with mock.patch.object(HTTPAdapter, 'send', no_network), contextlib.redirect_stdout(output):
+            call_command(
+                'scrape_competitors', '--site', 'JeepCommerce', '--force', '--replay', SCRAPE_CORPUS_DIR, *args,
+                stdout=output,
+            )
+        return ScrapeLog.objects.latest('id')
+
+    def test_replay_is_a_dry_run(self):
+        log = self.scrape()
+
+        self.assertEqual(log.status, 'success')
+        self.assertEqual(log.products_found, 3)
+        self.assertEqual(log.products_new, 3)
+        self.assertEqual(log.pages_fetched, 2)
+        # robots.txt of the corpus disallows the third category
+        self.assertEqual(log.pages_disallowed, 1)
+        self.assertFalse(ScrapedProduct.objects.exists())
+        self.assertFalse(PriceHistory.objects.exists())
+        self.assertFalse(PageFetchCache.objects.exists())
+
+        self.site.refresh_from_db()
+        self.assertIsNone(self.site.last_scraped_at)
+        self.assertEqual(self.site.robots_txt, 'CACHED')
+        self.assertIsNone(self.site.robots_fetched_at)
+
+    def test_write_keeps_products_but_not_page_cache_or_robots(self):
+        log = self.scrape('--write')
+
+        self.assertEqual(log.status, 'success')
+        self.assertEqual(
+            sorted(ScrapedProduct.objects.values_list('external_id', flat=True)),
+            ['kutija-40x40x2', 'kutija-60x40x2', 'lim-dekorativni-1mm'],
+        )
+        self.assertEqual(PriceHistory.objects.count(), 3)
+        self.assertFalse(PageFetchCache.objects.exists())
+
+        self.site.refresh_from_db()
+        self.assertIsNotNone(self.site.last_scraped_at)
+        self.assertEqual(self.site.robots_txt, 'CACHED')
+
+    def test_replay_is_deterministic(self):
+        first = self.scrape('--write')
+        second = self.scrape('--write')
+
+        self.assertEqual(first.products_found, second.products_found)
+        self.assertEqual(second.products_new, 0)
+        self.assertEqual(second.products_unchanged, 3)
+
+    def test_write_requires_replay(self):
+        output = io.StringIO()
+        call_command('scrape_competitors', '--write', stdout=output)
+        self.assertIn('--write only applies to --replay', output.getvalue())
+        self.assertFalse(ScrapeLog.objects.exists())
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from shop.management.commands.scrape_competitors import Command
+from shop.models_scraping import CompetitorSite, PriceHistory, ScrapedProduct
+
+from .utils import product_data
+
+
+class SaveProductsTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.create(name='Test', url='https://example.rs')
+        self.command = Command()
+        self.command.save_products(self.site, [product_data(str(i)) for i in range(1, 5)])
+        self.long_ago = timezone.now() - timedelta(days=3)
+        ScrapedProduct.objects.update(last_seen_at=self.long_ago)
+
+    def rows(self):
+        return {
+            product.external_id: product
+            for product in ScrapedProduct.objects.filter(site=self.site)
+        }
+
+    def test_first_run_inserts_products_and_history(self):
+        self.assertEqual(len(self.rows()), 4)
+        self.assertEqual(PriceHistory.objects.count(), 4)
+
+    def test_product_listed_in_two_categories_is_written_once(self):
+        self.command.save_products(self.site, [
+            product_data('5', category='Profili'),
+            product_data('5', category='Cevi'),
+        ])
+
+        self.assertEqual(ScrapedProduct.objects.filter(site=self.site, external_id='5').count(), 1)
+        self.assertEqual(self.rows()['5'].category, 'Cevi')
+
+    def test_upsert_updates_changed_rows_in_place(self):
+        ids = {external_id: row.pk for external_id, row in self.rows().items()}
+
+        self.command.save_products(self.site, [product_data(str(i), name=f'Novo {i}') for i in range(1, 5)])
+
+        rows = self.rows()
+        self.assertEqual({external_id: row.pk for external_id, row in rows.items()}, ids)
+        self.assertEqual(rows['2'].name, 'Novo 2')
+
+    def test_history_only_for_price_state_changes(self):
+        self.command.save_products(self.site, [
+            product_data('1', '90.00'),
+            product_data('2', name='Novi naziv'),
+            product_data('3', on_sale=True, sale_price=product_data('3')['current_price']),
+            product_data('4'),
+        ])
+
+        self.assertEqual(
+            sorted(PriceHistory.objects.values_list('product__external_id', flat=True)),
+            ['1', '1', '2', '3', '3', '4'],
+        )
+
+    def test_raw_scraped_values_equal_to_stored_are_unchanged(self):
+        # Scrapers may return None for text and float/str prices
+        diff = self.command.save_products(self.site, [
+            product_data('1', description=None),
+            product_data('2', current_price=100.0),
+            product_data('3', current_price='100', original_price=120.1),
+            product_data('4', image_url=None),
+        ])
+        self.assertEqual(sorted(diff['changed']), ['3'])  # original_price was None
+
+        diff = self.command.save_products(self.site, [
+            product_data('1', description=None),
+            product_data('2', current_price=100.0),
+            product_data('3', current_price='100', original_price=120.1),
+            product_data('4', image_url=None),
+        ])
+
+        self.assertEqual(sorted(diff['unchanged']), ['1', '2', '3', '4'])
+        self.assertEqual(PriceHistory.objects.count(), 4)
+        self.assertEqual(self.rows()['1'].description, '')
+
+    def test_complete_run_deactivates_missing_products(self):
+        diff = self.command.save_products(self.site, [product_data('1'), product_data('2'), product_data('3')])
+
+        self.assertEqual(diff['removed'], ['4'])
+        rows = self.rows()
+        self.assertFalse(rows['4'].is_active)
+        self.assertEqual(rows['4'].last_seen_at, self.long_ago)
+        self.assertTrue(all(rows[external_id].last_seen_at > self.long_ago for external_id in '123'))
+
+    def test_partial_run_keeps_missing_products_untouched(self):
+        diff = self.command.save_products(
+            self.site, [product_data('1'), product_data('2', '90.00')], seen_unchanged=['3'], allow_removal=False,
+        )
+
+        self.assertEqual(diff['removed'], [])
+        self.assertEqual(sorted(diff['unchanged']), ['1', '3'])
+        rows = self.rows()
+        self.assertTrue(all(row.is_active for row in rows.values()))
+        # Not seen in this run - must not look freshly seen
+        self.assertEqual(rows['4'].last_seen_at, self.long_ago)
+        for external_id in '123':
+            self.assertGreater(rows[external_id].last_seen_at, self.long_ago)
+
+    def test_products_on_unchanged_pages_are_not_removed(self):
+        diff = self.command.save_products(self.site, [], seen_unchanged=['1', '2', '3', '4'])
+
+        self.assertEqual(diff['removed'], [])
+        self.assertTrue(all(row.is_active for row in self.rows().values()))
+
+    def test_removed_product_seen_again_is_reactivated(self):
+        self.command.save_products(self.site, [product_data('1')])
+        diff = self.command.save_products(self.site, [product_data('1'), product_data('4')])
+
+        self.assertEqual(diff['changed'], ['4'])
+        self.assertTrue(self.rows()['4'].is_active)
@@ -0,0 +1,81 @@
+from django.test import SimpleTestCase
+
+from shop.scrape_diff import FIELD_DEFAULTS, TRACKED_FIELDS, diff_scrape, scraped_values
+
+from .utils import product_data
+
+
+def stored_row(data, is_active=True):
+    return {'values': scraped_values(data), 'is_active': is_active}
+
+
+class DiffScrapeTests(SimpleTestCase):
+    def test_classifies_new_changed_unchanged_and_removed(self):
+        stored = {
+            'same': stored_row(product_data('same')),
+            'repriced': stored_row(product_data('repriced', '100.00')),
+            'gone': stored_row(product_data('gone')),
+        }
+        scraped = {
+            'same': product_data('same'),
+            'repriced': product_data('repriced', '90.00'),
+            'fresh': product_data('fresh'),
+        }
+
+        diff = diff_scrape(stored, scraped)
+
+        self.assertEqual(diff['new'], ['fresh'])
+        self.assertEqual(diff['changed'], ['repriced'])
+        self.assertEqual(diff['unchanged'], ['same'])
+        self.assertEqual(diff['removed'], ['gone'])
+
+    def test_inactive_row_seen_again_is_changed(self):
+        stored = {'back': stored_row(product_data('back'), is_active=False)}
+
+        diff = diff_scrape(stored, {'back': product_data('back')})
+
+        self.assertEqual(diff['changed'], ['back'])
+        self.assertEqual(diff['removed'], [])
+
+    def test_products_on_not_modified_pages_are_unchanged_not_removed(self):
+        stored = {
+            'listed': stored_row(product_data('listed')),
+            'gone': stored_row(product_data('gone')),
+        }
+
+        diff = diff_scrape(stored, {}, seen_unchanged=['listed', 'never-stored'])
+
+        self.assertEqual(diff['unchanged'], ['listed'])
+        self.assertEqual(diff['removed'], ['gone'])
+        self.assertEqual(diff['new'], [])
+
+    def test_inactive_stored_rows_are_never_removed_again(self):
+        stored = {'old': stored_row(product_data('old'), is_active=False)}
+
+        self.assertEqual(diff_scrape(stored, {})['removed'], [])
+
+
+class ScrapedValuesTests(SimpleTestCase):
+    def test_scraped_values_fills_optional_fields_with_defaults(self):
+        data = {
+            'external_id': 'x',
+            'name': 'Kutija',
+            'current_price': 5,
+            'product_url': 'https://example.rs/x/',
+        }
+
+        values = dict(zip(TRACKED_FIELDS, scraped_values(data)))
+
+        for field, default in FIELD_DEFAULTS.items():
+            self.assertEqual(values[field], default)
+        self.assertEqual(values['name'], 'Kutija')
+
+    def test_scraped_values_match_stored_field_types(self):
+        values = dict(zip(TRACKED_FIELDS, scraped_values(product_data(
+            'x', current_price=1080.5, description=None, sale_price='990', original_price=None,
+        ))))
+
+        self.assertEqual(values['description'], '')
+        self.assertEqual(str(values['current_price']), '1080.50')
+        self.assertEqual(str(values['sale_price']), '990.00')
+        self.assertIsNone(values['original_price'])
@@ -0,0 +1,278 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from shop import scrape_jobs
+from shop.models_scraping import CompetitorSite, ScrapeJob, ScrapeLog
+from shop.scrapers import SCRAPERS, ScrapeCancelled
+from shop.scrapers.politeness import HostRateLimiter
+
+
+class FakeCommand:
+    """Stands in for scrape_competitors.Command; `during` runs mid-scrape"""
+
+    def __init__(self, status='success', during=None):
+        self.status = status
+        self.during = during
+
+    def scrape_site(self, site, force=False, monitor=None):
+        if self.during is not None:
+            self.during()
+        return ScrapeLog.objects.create(site=site, status=self.status)
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.get(name='JeepCommerce')
+
+    def test_enqueue_returns_the_active_job(self):
+        job, created = scrape_jobs.enqueue(self.site)
+        again, created_again = scrape_jobs.enqueue(self.site)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+
+    def test_database_allows_one_active_job_per_site(self):
+        ScrapeJob.objects.create(site=self.site)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ScrapeJob.objects.create(site=self.site, status=ScrapeJob.STATUS_RUNNING)
+        # Finished jobs don't count
+        ScrapeJob.objects.create(site=self.site, status=ScrapeJob.STATUS_FAILED)
+
+    def test_claim_next_takes_the_oldest_queued_job(self):
+        first, _ = scrape_jobs.enqueue(self.site)
+        scrape_jobs.enqueue(CompetitorSite.objects.get(name='Velog'))
+
+        job = scrape_jobs.claim_next('w1')
+
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(job.status, ScrapeJob.STATUS_RUNNING)
+        self.assertEqual(job.worker, 'w1')
+
+    @override_settings(SCRAPE_JOB_STALE_SECONDS=60)
+    def test_stale_running_jobs_are_failed(self):
+        scrape_jobs.enqueue(self.site)
+        job = scrape_jobs.claim_next('w1')
+        self.assertEqual(scrape_jobs.fail_stale_jobs(), 0)
+
+        ScrapeJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+
+        with self.assertLogs('shop.scrape_jobs', 'WARNING'):
+            self.assertEqual(scrape_jobs.fail_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_FAILED)
+
+
+class RunJobTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.get(name='JeepCommerce')
+        scrape_jobs.enqueue(self.site)
+        self.job = scrape_jobs.claim_next('w1')
+
+    def reap(self):
+        ScrapeJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(days=1))
+        scrape_jobs.fail_stale_jobs()
+
+    def run_reaped(self, command):
+        with self.assertLogs('shop.scrape_jobs', 'WARNING') as logs:
+            job = scrape_jobs.run_job(self.job, command)
+        self.assertIn('was reaped while running', logs.output[-1])
+        return job
+
+    def test_result_is_written(self):
+        job = scrape_jobs.run_job(self.job, FakeCommand())
+
+        self.assertEqual(job.status, ScrapeJob.STATUS_SUCCESS)
+        self.assertIsNotNone(job.log)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_reaped_job_is_not_flipped_back(self):
+        job = self.run_reaped(FakeCommand(during=self.reap))
+
+        self.assertEqual(job.status, ScrapeJob.STATUS_FAILED)
+        self.assertEqual(job.error_message, 'Worker stopped responding')
+        self.assertIsNone(job.log)
+
+    def test_new_job_after_reaping_is_left_alone(self):
+        def reap_and_requeue():
+            self.reap()
+            scrape_jobs.enqueue(self.site)
+
+        self.run_reaped(FakeCommand(during=reap_and_requeue))
+
+        self.assertEqual(ScrapeJob.objects.get(site=self.site, status__in=ScrapeJob.ACTIVE_STATUSES).status, ScrapeJob.STATUS_QUEUED)
+
+    def test_crash_fails_the_job(self):
+        command = FakeCommand()
+        with mock.patch.object(command, 'scrape_site', side_effect=RuntimeError('boom')), \
+                self.assertLogs('shop.scrape_jobs', 'ERROR'):
+            job = scrape_jobs.run_job(self.job, command)
+
+        self.assertEqual(job.status, ScrapeJob.STATUS_FAILED)
+        self.assertEqual(job.error_message, 'boom')
+
+
+class HeartbeatTests(TestCase):
+    def setUp(self):
+        site = CompetitorSite.objects.get(name='JeepCommerce')
+        scrape_jobs.enqueue(site)
+        self.job = scrape_jobs.claim_next('w1')
+        self.monitor = scrape_jobs.JobMonitor(self.job)
+
+    def test_heartbeat_without_progress(self):
+        ScrapeJob.objects.filter(pk=self.job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+
+        # No scraper attached yet (e.g. still fetching robots.txt)
+        self.monitor.heartbeat()
+
+        self.job.refresh_from_db()
+        self.assertGreater(self.job.heartbeat_at, timezone.now() - timedelta(minutes=1))
+        self.assertFalse(self.monitor.cancel_event.is_set())
+
+    def test_reaped_job_stops_the_scraper(self):
+        ScrapeJob.objects.filter(pk=self.job.pk).update(status=ScrapeJob.STATUS_FAILED)
+
+        with self.assertLogs('shop.scrape_jobs', 'WARNING'):
+            self.monitor.heartbeat()
+
+        self.assertTrue(self.monitor.reaped)
+        self.assertTrue(self.monitor.cancel_event.is_set())
+
+
+class ProgressTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.get(name='JeepCommerce')
+        scrape_jobs.enqueue(self.site)
+        self.job = scrape_jobs.claim_next('w1')
+        self.monitor = scrape_jobs.JobMonitor(self.job)
+        self.scraper = SCRAPERS['jeepcommerce']()
+        self.scraper.crawl_delay = 2
+
+    def test_expected_pages_come_from_the_last_successful_run(self):
+        ScrapeLog.objects.create(site=self.site, status='success', pages_fetched=8)
+        ScrapeLog.objects.create(site=self.site, status='failed', pages_fetched=1)
+
+        self.monitor.attach(self.scraper)
+
+        self.assertEqual(self.monitor.pages_expected, 8)
+        self.assertIs(self.scraper.cancel_event, self.monitor.cancel_event)
+
+    def test_without_history_each_category_is_one_page(self):
+        self.monitor.attach(self.scraper)
+        self.assertEqual(self.monitor.pages_expected, len(self.scraper.categories))
+
+    def test_eta_from_the_pace_so_far(self):
+        ScrapeLog.objects.create(site=self.site, status='success', pages_fetched=5)
+        self.monitor.attach(self.scraper)
+        self.assertEqual(self.monitor.progress()['eta_seconds'], 10.0)  # 5 pages x crawl delay
+
+        self.monitor.started = time.monotonic() - 12
+        self.scraper.stats['pages_fetched'] = 2
+        self.scraper.stats['products_parsed'] = 40
+        self.scraper.start_category('Profili')
+
+        progress = self.monitor.progress()
+        self.assertEqual(progress['pages_fetched'], 2)
+        self.assertEqual(progress['pages_expected'], 5)
+        self.assertEqual(progress['products_parsed'], 40)
+        self.assertEqual(progress['current_category'], 'Profili')
+        self.assertAlmostEqual(progress['eta_seconds'], 18.0, delta=0.5)
+
+    def test_more_pages_than_expected(self):
+        ScrapeLog.objects.create(site=self.site, status='success', pages_fetched=2)
+        self.monitor.attach(self.scraper)
+        self.scraper.stats['pages_fetched'] = 3
+
+        self.assertEqual(self.monitor.progress()['pages_expected'], 3)
+        self.assertEqual(self.monitor.progress()['eta_seconds'], 0)
+
+    def test_publish_writes_progress(self):
+        self.monitor.attach(self.scraper)
+        self.scraper.stats['pages_fetched'] = 1
+
+        self.monitor.publish()
+
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.pages_fetched, 1)
+        self.assertIsNotNone(self.job.eta_seconds)
+
+
+class CancelTests(TestCase):
+    def setUp(self):
+        self.site = CompetitorSite.objects.get(name='JeepCommerce')
+
+    def test_queued_job_is_cancelled_right_away(self):
+        job, _ = scrape_jobs.enqueue(self.site)
+
+        self.assertTrue(scrape_jobs.request_cancel(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScrapeJob.STATUS_CANCELLED)
+        self.assertIsNone(scrape_jobs.claim_next('w1'))
+
+    def test_running_job_is_cancelled_through_the_monitor(self):
+        scrape_jobs.enqueue(self.site)
+        job = scrape_jobs.claim_next('w1')
+        monitor = scrape_jobs.JobMonitor(job)
+
+        self.assertTrue(scrape_jobs.request_cancel(job))
+        monitor.heartbeat()
+
+        self.assertTrue(monitor.cancel_event.is_set())
+        self.assertFalse(monitor.reaped)
+
+    def test_finished_job_cannot_be_cancelled(self):
+        job = ScrapeJob.objects.create(site=self.site, status=ScrapeJob.STATUS_SUCCESS)
+        self.assertFalse(scrape_jobs.request_cancel(job))
+
+    def test_cancelled_run_cancels_the_job(self):
+        scrape_jobs.enqueue(self.site)
+        job = scrape_jobs.run_job(scrape_jobs.claim_next('w1'), FakeCommand(status='cancelled'))
+
+        self.assertEqual(job.status, ScrapeJob.STATUS_CANCELLED)
+        self.assertIsNone(job.eta_seconds)
+
+
+class InterruptibleWaitTests(TestCase):
+    def setUp(self):
+        self.scraper = SCRAPERS['jeepcommerce']()
+        self.scraper.rate_limiter = HostRateLimiter()
+        self.scraper.cancel_event = threading.Event()
+
+    def cancel_after(self, seconds):
+        timer = threading.Timer(seconds, self.scraper.cancel_event.set)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+    def test_crawl_delay_wait_ends_on_cancel(self):
+        self.scraper.crawl_delay = 60
+        url = f'{self.scraper.base_url}/a/'
+        self.scraper.rate_limiter.wait(url, 0)
+        self.cancel_after(0.05)
+
+        started = time.monotonic()
+        with mock.patch.object(self.scraper.session, 'get') as get, self.assertRaises(ScrapeCancelled):
+            self.scraper._request(url, {})
+
+        self.assertLess(time.monotonic() - started, 5)
+        get.assert_not_called()
+
+    def test_retry_backoff_ends_on_cancel(self):
+        self.scraper.crawl_delay = 0
+        self.scraper.backoff_base_seconds = 60
+        response = mock.Mock(status_code=503, headers={})
+        self.cancel_after(0.05)
+
+        started = time.monotonic()
+        with mock.patch.object(self.scraper.session, 'get', return_value=response) as get, \
+                mock.patch('builtins.print'), self.assertRaises(ScrapeCancelled):
+            self.scraper._request(f'{self.scraper.base_url}/a/', {})
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(get.call_count, 1)
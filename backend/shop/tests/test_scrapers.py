@@ -0,0 +1,64 @@
+import contextlib
+import io
+import os
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from shop.scrapers import SCRAPERS
+
+from .utils import SCRAPE_FIXTURES_DIR
+
+# Products in the sanitized fixture pages: scraper -> [(external_id, name, price, on_sale), ...]
+EXPECTED = {
+    'joilart': [('101', 'Kovani vrh A1', '1250.00', False), ('102', 'Šiljak S2', '480.00', True)],
+    'jeepcommerce': [('kutija-40x40x2', 'Kutija 40x40x2', '1100.00', False), ('kutija-60x40x2', 'Kutija 60x40x2', '1350.00', True)],
+    'hanan': [('rozetna-r10', 'Rozetna R10', '350.00', False), ('basket-b4', 'Basket B4', '2200.00', True)],
+    'velog': [('flah_20x5', 'Flah 20x5', '420.00', False), ('cev_fi_20', 'Cev Ø20x2', '1080.50', False)],
+    'ironworks': [('501', 'Šiljak kovani 12mm', '310.00', False), ('502', 'Kugla 40', '640.00', False)],
+}
+
+
+def fixture_pages(scraper_name):
+    directory = os.path.join(SCRAPE_FIXTURES_DIR, scraper_name)
+    for file_name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, file_name), 'rb') as f:
+            yield file_name, f.read()
+
+
+class ExtractionTests(SimpleTestCase):
+    def extract(self, scraper, content, full):
+        # Scrapers print per-item warnings
+        with contextlib.redirect_stdout(io.StringIO()):
+            return scraper.extract_products(scraper.parse_html(content, full=full), 'Test')
+
+    def test_every_scraper_has_a_fixture(self):
+        self.assertEqual(sorted(EXPECTED), sorted(SCRAPERS))
+
+    def test_fixture_products(self):
+        for scraper_name, expected in EXPECTED.items():
+            scraper = SCRAPERS[scraper_name]()
+            for file_name, content in fixture_pages(scraper_name):
+                with self.subTest(page=f'{scraper_name}/{file_name}'):
+                    products = self.extract(scraper, content, full=False)
+                    self.assertEqual(
+                        [(p['external_id'], p['name'], p['current_price'], p['on_sale']) for p in products],
+                        [(external_id, name, Decimal(price), on_sale) for external_id, name, price, on_sale in expected],
+                    )
+
+    def test_strainer_extracts_the_same_as_the_full_tree(self):
+        for scraper_name in SCRAPERS:
+            scraper = SCRAPERS[scraper_name]()
+            for file_name, content in fixture_pages(scraper_name):
+                with self.subTest(page=f'{scraper_name}/{file_name}'):
+                    self.assertEqual(self.extract(scraper, content, full=True), self.extract(scraper, content, full=False))
+
+
+class ParsePriceTests(SimpleTestCase):
+    def test_formats(self):
+        scraper = SCRAPERS['joilart']()
+        self.assertEqual(scraper.parse_price('1.200,00 RSD'), Decimal('1200.00'))
+        self.assertEqual(scraper.parse_price('1,200.00 din'), Decimal('1200.00'))
+        self.assertEqual(scraper.parse_price('480,5'), Decimal('480.5'))
+        self.assertEqual(scraper.parse_price('12,000'), Decimal('12000'))
+        self.assertIsNone(scraper.parse_price(''))
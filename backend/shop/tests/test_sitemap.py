@@ -0,0 +1,187 @@
+import gzip
+import io
+import os
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from shop import sitemap_builder
+from shop.models import Category, Product
+
+from .utils import TEMP_ROOT, isolated_files
+
+
+@isolated_files
+@override_settings(SITEMAP_DOMAIN='www.example.rs', SITEMAP_INDEX_BASE_URL='https://api.example.rs/')
+class SitemapTestCase(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp(dir=TEMP_ROOT)
+        override = override_settings(SITEMAP_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.cancel_rebuild_timer)
+        self.root = root
+        self.category = Category.objects.create(name='Profili')
+
+    @staticmethod
+    def cancel_rebuild_timer():
+        if sitemap_builder._timer is not None:
+            sitemap_builder._timer.cancel()
+
+    def product(self, name, **fields):
+        return Product.objects.create(name=name, description='-', price=1, category=self.category, **fields)
+
+    def read(self, file_name):
+        with gzip.open(os.path.join(self.root, file_name), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+
+class BuildTests(SitemapTestCase):
+    def test_small_catalog_is_one_urlset(self):
+        self.product('Kutija 40x40')
+        self.product('Rasprodato', in_stock=False)
+
+        self.assertEqual(sitemap_builder.build_sitemaps(), ['sitemap.xml.gz'])
+
+        xml = self.read('sitemap.xml.gz')
+        self.assertIn('<urlset', xml)
+        self.assertIn('https://www.example.rs/proizvod/kutija-40x40', xml)
+        self.assertNotIn('rasprodato', xml)
+        self.assertIn(f'https://www.example.rs/?category={self.category.id}', xml)
+        self.assertIn('https://www.example.rs/kontakt', xml)
+
+    @override_settings(SITEMAP_MAX_URLS=2)
+    def test_large_catalog_is_split_under_an_index(self):
+        for i in range(3):
+            self.product(f'Proizvod {i}')
+
+        written = sitemap_builder.build_sitemaps()
+
+        self.assertEqual(written, [
+            'sitemap-products-1.xml.gz', 'sitemap-products-2.xml.gz',
+            'sitemap-categories-1.xml.gz', 'sitemap-static-1.xml.gz', 'sitemap-static-2.xml.gz',
+            'sitemap.xml.gz',
+        ])
+        index = self.read('sitemap.xml.gz')
+        self.assertIn('<sitemapindex', index)
+        self.assertIn('<loc>https://api.example.rs/sitemap-products-2.xml</loc>', index)
+        self.assertIn('proizvod-2', self.read('sitemap-products-2.xml.gz'))
+
+    @override_settings(SITEMAP_MAX_URLS=2)
+    def test_parts_that_no_longer_exist_are_removed(self):
+        products = [self.product(f'Proizvod {i}') for i in range(3)]
+        sitemap_builder.build_sitemaps()
+
+        products[2].delete()
+        sitemap_builder.build_sitemaps()
+
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'sitemap-products-2.xml.gz')))
+
+    def test_same_catalog_gives_the_same_bytes(self):
+        self.product('Kutija')
+        sitemap_builder.build_sitemaps()
+        with open(os.path.join(self.root, 'sitemap.xml.gz'), 'rb') as f:
+            first = f.read()
+
+        sitemap_builder.build_sitemaps()
+
+        with open(os.path.join(self.root, 'sitemap.xml.gz'), 'rb') as f:
+            self.assertEqual(f.read(), first)
+
+    def test_catalog_change_marks_the_sitemap_stale(self):
+        sitemap_builder.build_sitemaps()
+        self.assertFalse(sitemap_builder.is_stale())
+
+        self.product('Nova kutija')
+
+        self.assertTrue(sitemap_builder.is_stale())
+        self.assertIsNotNone(sitemap_builder._timer)
+        sitemap_builder.build_sitemaps()
+        self.assertFalse(sitemap_builder.is_stale())
+
+    def test_change_during_a_build_keeps_the_marker(self):
+        sitemap_builder.mark_stale()
+        future = time.time() + 60
+        os.utime(os.path.join(self.root, sitemap_builder.STALE_MARKER), (future, future))
+
+        sitemap_builder.build_sitemaps()
+
+        self.assertTrue(sitemap_builder.is_stale())
+
+    def test_command_if_stale(self):
+        sitemap_builder.build_sitemaps()
+        out = io.StringIO()
+
+        call_command('build_sitemap', if_stale=True, stdout=out)
+        self.assertIn('ažuran', out.getvalue())
+
+        sitemap_builder.mark_stale()
+        call_command('build_sitemap', if_stale=True, stdout=out)
+        self.assertFalse(sitemap_builder.is_stale())
+
+
+class SitemapViewTests(SitemapTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product('Kutija')
+        self.url = reverse('sitemap')
+
+    def test_first_request_builds_the_sitemap(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'sitemap.xml.gz')))
+
+    def test_gzip_is_served_as_stored(self):
+        sitemap_builder.build_sitemaps()
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('proizvod/kutija', gzip.decompress(response.content).decode())
+        with open(os.path.join(self.root, 'sitemap.xml.gz'), 'rb') as f:
+            self.assertEqual(response.content, f.read())
+
+    def test_plain_xml_without_gzip_support(self):
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertIn('proizvod/kutija', response.content.decode())
+
+    def test_etag_and_last_modified(self):
+        plain = self.client.get(self.url)
+        gzipped = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotEqual(plain['ETag'], gzipped['ETag'])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=plain['ETag']).status_code, 304)
+        not_modified = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzipped['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        # An ETag for the other representation does not match
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=gzipped['ETag']).status_code, 200)
+
+        since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=plain['Last-Modified'])
+        self.assertEqual(since.status_code, 304)
+        stale_etag = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH='"old"', HTTP_IF_MODIFIED_SINCE=plain['Last-Modified'],
+        )
+        self.assertEqual(stale_etag.status_code, 200)
+
+    def test_missing_section_is_404(self):
+        response = self.client.get(reverse('sitemap-section', kwargs={'section': 'products', 'page': 9}))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(SITEMAP_MAX_URLS=1)
+    def test_section_file(self):
+        self.product('Druga kutija')
+        sitemap_builder.build_sitemaps()
+
+        response = self.client.get(reverse('sitemap-section', kwargs={'section': 'products', 'page': 2}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('druga-kutija', response.content.decode())
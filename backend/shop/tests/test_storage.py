@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+
+from shop import storage
+from shop.models import get_image_storage
+from shop.storage import CloudinaryMediaStorage
+
+CLOUDINARY_STORAGE = {'CLOUD_NAME': 'test', 'API_KEY': 'key', 'API_SECRET': 'secret'}
+
+
+def upload_result(file, **options):
+    public_id = f'products/{file.name}'
+    return {'public_id': public_id, 'secure_url': f'https://cdn.test/{public_id}.jpg',
+            'width': 800, 'height': 600, 'format': 'jpg'}
+
+
+@override_settings(CLOUDINARY_STORAGE=CLOUDINARY_STORAGE)
+class CloudinaryUploadResultsTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('cloudinary.uploader.upload', side_effect=upload_result)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage = CloudinaryMediaStorage()
+
+    def upload(self, name):
+        return self.storage._save(name, ContentFile(b'jpeg', name=name))
+
+    def test_metadata_comes_from_the_upload_response_once(self):
+        name = self.upload('a')
+
+        metadata = self.storage.get_image_metadata(name)
+        self.assertEqual(metadata, {'url': 'https://cdn.test/products/a.jpg', 'width': 800, 'height': 600, 'format': 'jpg'})
+        self.assertEqual(len(self.storage._upload_results), 0)
+
+        # Already read: only the URL is known without fetch=True
+        self.assertIsNone(self.storage.get_image_metadata(name)['width'])
+
+    def test_unread_results_are_bounded(self):
+        with mock.patch.object(storage, 'UPLOAD_RESULTS_MAX', 3):
+            names = [self.upload(str(i)) for i in range(5)]
+
+        self.assertEqual(list(self.storage._upload_results), names[2:])
+        self.assertIsNone(self.storage.get_image_metadata(names[0])['width'])
+        self.assertEqual(self.storage.get_image_metadata(names[4])['width'], 800)
+
+
+class GetImageStorageTests(SimpleTestCase):
+    def test_local_storage_without_cloudinary_settings(self):
+        # The test runner runs with DEBUG=False; the choice must not depend on it
+        self.assertIs(get_image_storage(), default_storage)
+
+    @override_settings(CLOUDINARY_STORAGE=CLOUDINARY_STORAGE)
+    def test_cloudinary_when_configured(self):
+        self.assertIsInstance(get_image_storage(), CloudinaryMediaStorage)
@@ -0,0 +1,57 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+SCRAPE_FIXTURES_DIR = os.path.join(FIXTURES_DIR, 'scrape_fixtures')
+SCRAPE_CORPUS_DIR = os.path.join(FIXTURES_DIR, 'scrape_corpus')
+
+# Catalog signals write sitemaps and feeds, uploads write media; tests that
+# save products keep all of it in a temp dir instead of backend/
+TEMP_ROOT = tempfile.mkdtemp(prefix='shop-tests-')
+atexit.register(shutil.rmtree, TEMP_ROOT, ignore_errors=True)
+
+isolated_files = override_settings(
+    SITEMAP_ROOT=os.path.join(TEMP_ROOT, 'sitemaps'),
+    PRODUCT_FEED_ROOT=os.path.join(TEMP_ROOT, 'feeds'),
+    MEDIA_ROOT=os.path.join(TEMP_ROOT, 'media'),
+    # The debounced rebuild timer must not fire while tests run
+    SITEMAP_REBUILD_DELAY=3600,
+)
+
+
+def product_data(external_id, price='100.00', **overrides):
+    """Scraped product dict as the scrapers return it"""
+    from decimal import Decimal
+
+    data = {
+        'external_id': external_id,
+        'name': f'Proizvod {external_id}',
+        'category': 'Profili',
+        'description': '',
+        'current_price': Decimal(price),
+        'on_sale': False,
+        'sale_price': None,
+        'original_price': None,
+        'product_url': f'https://example.rs/proizvod/{external_id}/',
+        'image_url': '',
+        'in_stock': True,
+    }
+    data.update(overrides)
+    return data
+
+
+def image_upload(name='slika.jpg', color=(200, 30, 30), size=(64, 48), image_format='JPEG', **save_options):
+    """Uploaded image file made with Pillow"""
+    import io
+
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format, **save_options)
+    content_type = f'image/{image_format.lower()}'
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=content_type)
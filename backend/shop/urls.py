@@ -12,7 +12,7 @@ from .views import (
     ContactMessageViewSet,
     contact_message
 )
-from .views_scraping import CompetitorSiteViewSet, ScrapedProductViewSet
+from .views_scraping import CompetitorSiteViewSet, ScrapedProductViewSet, ScrapeJobViewSet, VariantPriceComparisonViewSet
 
 router = DefaultRouter()
 router.register('categories', CategoryViewSet, basename='category')
@@ -24,10 +24,13 @@ router.register('orders', OrderViewSet, basename='order')
 router.register('contact-messages', ContactMessageViewSet, basename='contact-message')
 router.register('competitor-sites', CompetitorSiteViewSet, basename='competitor-site')
 router.register('scraped-products', ScrapedProductViewSet, basename='scraped-product')
+router.register('scrape-jobs', ScrapeJobViewSet, basename='scrape-job')
+router.register('price-comparisons', VariantPriceComparisonViewSet, basename='price-comparison')
 
 urlpatterns = [
     path('auth/user/', current_user, name='current_user'),
     path('orders/notifications/', views.order_notifications_stream, name='order-notifications'),
+    path('admin/events/', views.admin_events_stream, name='admin-events'),
     path('contact/', contact_message, name='contact-message'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -11,6 +11,8 @@ from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
 
 from django.db import models
+import logging
+from . import product_feed
 from .models import (
     Category, Subcategory, Product, ProductVariant,
     ProductImage, Order, OrderItem, ContactMessage
@@ -22,6 +24,9 @@ from .serializers import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 # Custom throttle classes za specifične endpoint-e
 class ContactThrottle(AnonRateThrottle):
     """Rate limiting za kontakt formu - 3 poruke po satu"""
@@ -178,13 +183,25 @@ class ProductVariantViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [IsAdminUser()]
 
+    def include_price_comparison(self):
+        """?include=price_comparison - samo za admina"""
+        include = self.request.query_params.get('include', '').split(',')
+        return 'price_comparison' in include and self.request.user.is_staff
+
     def get_queryset(self):
         queryset = ProductVariant.objects.all()
         product_id = self.request.query_params.get('product_id')
         if product_id:
             queryset = queryset.filter(product_id=product_id)
+        if self.include_price_comparison():
+            queryset = queryset.select_related('price_comparison')
         return queryset
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_price_comparison'] = self.include_price_comparison()
+        return context
+
     def destroy(self, request, *args, **kwargs):
         # Dozvoli brisanje varijante bez provere narudžbina
         # OrderItem će imati variant=None zbog SET_NULL, ali će zadržati variant_name za istorijat
@@ -213,6 +230,99 @@ class ProductImageViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(product_id=product_id)
         return queryset
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk_upload(self, request):
+        """
+        Upload više slika za jedan proizvod u jednom zahtevu
+        Očekuje multipart: product=<id>, images=<fajl> (više puta), opciono primary_index=<n>
+
+        Slike se obrađuju i upload-uju paralelno (ograničen thread pool), a svi
+        ProductImage redovi se kreiraju u jednoj transakciji. Isti fajl poslat
+        više puta u zahtevu obrađuje se i upload-uje jednom.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from django.db import connection, transaction
+        from shop.image_processing import read_upload
+
+        product = Product.objects.filter(id=request.data.get('product')).first()
+        if product is None:
+            return Response({'error': 'Proizvod ne postoji'}, status=status.HTTP_400_BAD_REQUEST)
+
+        files = request.FILES.getlist('images')
+        if not files:
+            return Response({'error': 'Nije poslata nijedna slika (polje "images")'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(files) > settings.IMAGE_BULK_UPLOAD_MAX_FILES:
+            return Response(
+                {'error': f'Najviše {settings.IMAGE_BULK_UPLOAD_MAX_FILES} slika po zahtevu'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validacija pre bilo kakvog upload-a
+        errors = {}
+        for uploaded in files:
+            serializer = ProductImageSerializer(data={'product': product.id, 'image': uploaded})
+            if not serializer.is_valid():
+                errors[uploaded.name] = serializer.errors
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            primary_index = int(request.data.get('primary_index'))
+        except (TypeError, ValueError):
+            primary_index = None
+        if primary_index is None and not product.images.filter(is_primary=True).exists():
+            # Proizvod nema glavnu sliku - prva iz ovog upload-a postaje glavna
+            primary_index = 0
+
+        start_order = (product.images.aggregate(models.Max('order'))['order__max'] or 0) + 1
+        images = [
+            ProductImage(
+                product=product,
+                image=uploaded,
+                alt_text=product.name,
+                is_primary=(index == primary_index),
+                order=start_order + index,
+            )
+            for index, uploaded in enumerate(files)
+        ]
+
+        # Jedno čitanje po fajlu (sadržaj + SHA-256); duplikat preuzima rezultat prve slike sa istim sadržajem
+        uploads = [read_upload(uploaded) for uploaded in files]
+        first_by_digest = {}
+        for image, upload in zip(images, uploads):
+            first_by_digest.setdefault(upload[1], (image, upload))
+
+        def prepare(image, upload):
+            try:
+                image.prepare_upload(upload)
+            finally:
+                # Svaki thread ima svoju konekciju ka bazi
+                connection.close()
+
+        try:
+            with ThreadPoolExecutor(max_workers=settings.IMAGE_UPLOAD_WORKERS) as pool:
+                list(pool.map(prepare, *zip(*first_by_digest.values())))
+        except Exception as e:
+            logger.error(f"Bulk image upload failed: {e}", exc_info=True)
+            return Response({'error': f'Upload nije uspeo: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+        for image, (_, digest) in zip(images, uploads):
+            first = first_by_digest[digest][0]
+            if first is not image:
+                image.use_stored_image(first)
+
+        with transaction.atomic():
+            # Pravilo jedne glavne slike - jedan UPDATE umesto po jednog u svakom save()
+            if primary_index is not None and 0 <= primary_index < len(images):
+                ProductImage.objects.filter(product=product, is_primary=True).update(is_primary=False)
+            created = ProductImage.objects.bulk_create(images)
+
+        # bulk_create ne šalje post_save signal
+        product_feed.invalidate()
+
+        serializer = self.get_serializer(created, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
 # Order ViewSet
 class OrderViewSet(viewsets.ModelViewSet):
@@ -304,21 +414,18 @@ Stavke:
             # Email za vlasnike iz settings
             recipient_list = settings.OWNER_EMAILS
 
-            # Pošalji email preko Resend-a svakom primaocu
-            from shop.email_utils import send_email_via_resend
-            for recipient in recipient_list:
-                send_email_via_resend(
-                    subject=subject,
-                    message=message,
-                    recipient_email=recipient,
-                    from_email=settings.DEFAULT_FROM_EMAIL
-                )
-
-            order.email_sent = True
-            order.save(update_fields=['email_sent'])
+            # Jedna poruka za sve primaoce (jedan API poziv), posle commit-a
+            from shop.email_utils import deliver_email_after_commit
+            deliver_email_after_commit(
+                subject=subject,
+                message=message,
+                recipients=recipient_list,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                on_sent=lambda: Order.objects.filter(pk=order.pk).update(email_sent=True),
+            )
 
         except Exception as e:
-            print(f"Email send error: {e}")
+            logger.error(f"Email send error: {e}", exc_info=True)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     def update_status(self, request, pk=None):
@@ -337,76 +444,102 @@ Stavke:
         )
 
 
-# SSE endpoint za real-time notifikacije o novim orderima
+# SSE endpoint za real-time notifikacije (admin event bus)
 from django.http import StreamingHttpResponse
 import json
 import time
 
-def order_notifications_stream(request):
-    """Server-Sent Events stream za notifikacije o novim orderima"""
-    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+def _get_staff_user_from_token(request):
+    """Vrati staff korisnika iz JWT tokena u query parametru, ili None"""
     from rest_framework_simplejwt.tokens import UntypedToken
     from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework_simplejwt.state import token_backend
     from django.contrib.auth import get_user_model
-    
+
     User = get_user_model()
-    
-    # Proveri autentifikaciju preko query parametra (token)
+
     token = request.GET.get('token')
     if not token:
-        return StreamingHttpResponse('Unauthorized', status=401)
-    
+        return None
+
     try:
         # Validiraj token
         UntypedToken(token)
-        from rest_framework_simplejwt.state import token_backend
         decoded_data = token_backend.decode(token, verify=True)
-        user_id = decoded_data.get('user_id')
-        user = User.objects.get(id=user_id)
-        
-        if not user or not user.is_staff:
-            return StreamingHttpResponse('Unauthorized', status=401)
-    except (InvalidToken, TokenError, User.DoesNotExist) as e:
+        user = User.objects.get(id=decoded_data.get('user_id'))
+    except (InvalidToken, TokenError, User.DoesNotExist):
+        return None
+
+    return user if user.is_staff else None
+
+
+def admin_events_stream(request, default_topics=None):
+    """
+    Server-Sent Events stream za admin panel.
+
+    Jedna konekcija nosi sve teme (orders, stock, messages, scraping);
+    admin bira teme preko ?topics=orders,stock. Svaki događaj ima SSE id,
+    pa se browser posle prekida nastavlja od Last-Event-ID.
+    """
+    from .events import parse_topics, prune_old_events
+    from .models import AdminEvent
+
+    if _get_staff_user_from_token(request) is None:
         return StreamingHttpResponse('Unauthorized', status=401)
-    
+
+    topics = parse_topics(request.GET.get('topics', default_topics))
+    poll_interval = settings.ADMIN_EVENTS_POLL_SECONDS
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id)
+    except (TypeError, ValueError):
+        last_event_id = None
+
     def event_stream():
-        last_order_id = None
-        
-        # Prvo pošalji trenutni broj ordera
-        current_count = Order.objects.count()
-        yield f"data: {json.dumps({'type': 'init', 'count': current_count})}\n\n"
-        
+        nonlocal last_event_id
+
+        prune_old_events()
+
+        if last_event_id is None:
+            # Nova konekcija - kreni od poslednjeg postojećeg događaja
+            last_event_id = AdminEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+        # Prvo pošalji trenutni broj ordera (frontend ga koristi za inicijalno osvežavanje)
+        yield f"data: {json.dumps({'type': 'init', 'count': Order.objects.count(), 'topics': topics})}\n\n"
+
         while True:
             try:
-                # Proveri da li ima novih ordera
-                if last_order_id:
-                    new_orders = Order.objects.filter(id__gt=last_order_id).order_by('-id')
-                else:
-                    # Prvi put - uzmi poslednji order
-                    last_order = Order.objects.order_by('-id').first()
-                    if last_order:
-                        last_order_id = last_order.id
-                    new_orders = []
-                
-                if new_orders.exists():
-                    for order in new_orders:
-                        yield f"data: {json.dumps({'type': 'new_order', 'order_id': order.id})}\n\n"
-                        last_order_id = order.id
-                
-                # Heartbeat svakih 5 sekundi
-                yield f": heartbeat\n\n"
-                time.sleep(5)
-                
+                # Jedan upit po intervalu za sve teme
+                events = AdminEvent.objects.filter(
+                    id__gt=last_event_id, topic__in=topics
+                ).order_by('id')[:100]
+
+                for event in events:
+                    data = {'type': event.event_type, 'topic': event.topic, **event.payload}
+                    yield f"id: {event.id}\ndata: {json.dumps(data)}\n\n"
+                    last_event_id = event.id
+
+                # Heartbeat
+                yield ": heartbeat\n\n"
+                time.sleep(poll_interval)
+
             except Exception as e:
                 yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-                time.sleep(5)
-    
+                time.sleep(poll_interval)
+
     response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
     response['Cache-Control'] = 'no-cache'
     response['X-Accel-Buffering'] = 'no'
     return response
 
 
+def order_notifications_stream(request):
+    """Stari endpoint za notifikacije o orderima - isti stream, podrazumevano samo tema 'orders'"""
+    return admin_events_stream(request, default_topics='orders')
+
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 @throttle_classes([ContactThrottle])
@@ -445,17 +578,17 @@ Poruka:
 Datum: {contact_msg.created_at.strftime('%d.%m.%Y %H:%M')}
                 """
 
-                # Pošalji email preko Resend-a
-                from shop.email_utils import send_email_via_resend
-                send_email_via_resend(
+                # Pošalji email kroz delivery sloj (posle commit-a)
+                from shop.email_utils import deliver_email_after_commit
+                deliver_email_after_commit(
                     subject=subject,
                     message=message,
-                    recipient_email=recipient_email,
+                    recipients=[recipient_email],
                     from_email=settings.DEFAULT_FROM_EMAIL
                 )
             except Exception as e:
                 # Loguj grešku ali ne prekidaj - poruka je već sačuvana
-                print(f"Email sending failed: {e}")
+                logger.error(f"Email sending failed: {e}", exc_info=True)
 
             return Response({
                 'success': True,
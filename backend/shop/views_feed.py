@@ -0,0 +1,35 @@
+"""
+Product feed za agregatore cena (XML/CSV)
+"""
+import os
+
+from django.http import FileResponse, StreamingHttpResponse, Http404
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from shop import product_feed
+
+
+@require_GET
+def product_feed_view(request, fmt):
+    """
+    GET /feeds/products.xml
+    GET /feeds/products.csv
+
+    Gotov fajl iz keša ili strimovanje novog feed-a (koji se usput kešira).
+    """
+    if fmt not in product_feed.FORMATS:
+        raise Http404
+
+    content_type = product_feed.FORMATS[fmt]
+    path = product_feed.get_cached_feed(fmt)
+
+    if path is not None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Last-Modified'] = http_date(os.path.getmtime(path))
+    else:
+        response = StreamingHttpResponse(product_feed.stream_feed(fmt), content_type=content_type)
+
+    if fmt == 'csv':
+        response['Content-Disposition'] = 'inline; filename="products.csv"'
+    return response
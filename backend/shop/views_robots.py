@@ -1,6 +1,11 @@
-from django.http import HttpResponse
+import gzip
+import os
+
+from django.http import HttpResponse, HttpResponseNotModified, Http404
+from django.utils.http import http_date
 from django.views.decorators.http import require_GET
-from django.contrib.sitemaps.views import sitemap as django_sitemap
+
+from shop.sitemap_builder import INDEX_FILE, get_sitemap_file, section_file_name
 
 
 @require_GET
@@ -18,14 +23,48 @@ def robots_txt(request):
     return HttpResponse("\n".join(lines), content_type="text/plain")
 
 
-def sitemap_view(request, sitemaps, **kwargs):
+def _sitemap_file_response(request, file_name):
     """
-    Custom sitemap view koji ne dodaje X-Robots-Tag: noindex header
+    Servira unapred generisan .xml.gz fajl.
+    Klijenti koji prihvataju gzip dobijaju fajl direktno, ostali raspakovan sadržaj.
     """
-    response = django_sitemap(request, sitemaps, **kwargs)
+    path = get_sitemap_file(file_name)
+    if path is None:
+        raise Http404
+
+    stat = os.stat(path)
+    gzipped = 'gzip' in request.headers.get('Accept-Encoding', '')
+    # Različit ETag za gzip i raspakovano telo (isti fajl, različit sadržaj odgovora)
+    etag = f'"{int(stat.st_mtime)}-{stat.st_size}{"-gz" if gzipped else ""}"'
+    last_modified = http_date(stat.st_mtime)
 
-    # Ukloni X-Robots-Tag header ako postoji
-    if 'X-Robots-Tag' in response:
-        del response['X-Robots-Tag']
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    elif not request.headers.get('If-None-Match') and request.headers.get('If-Modified-Since') == last_modified:
+        response = HttpResponseNotModified()
+    else:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if gzipped:
+            response = HttpResponse(data, content_type='application/xml')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(data), content_type='application/xml')
 
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Vary'] = 'Accept-Encoding'
+    # Bez X-Robots-Tag: noindex headera (Django-ov sitemap view ga dodaje)
     return response
+
+
+@require_GET
+def sitemap_view(request):
+    """sitemap.xml - urlset ili sitemap index, zavisno od broja adresa"""
+    return _sitemap_file_response(request, INDEX_FILE)
+
+
+@require_GET
+def sitemap_section_view(request, section, page):
+    """Deo sitemap-a kada ima više fajlova: sitemap-<sekcija>-<strana>.xml"""
+    return _sitemap_file_response(request, section_file_name(section, page))
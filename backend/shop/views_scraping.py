@@ -1,17 +1,26 @@
 """
 API views for scraping data
 """
+from datetime import timedelta
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.core.management import call_command
+from django.conf import settings
+from django.db import IntegrityError
 from django.utils import timezone
-import threading
+from django.utils.dateparse import parse_datetime
 
-from .models_scraping import CompetitorSite, ScrapedProduct, PriceHistory
-from .serializers_scraping import CompetitorSiteSerializer, ScrapedProductSerializer, PriceHistorySerializer
+from . import price_comparison, price_drops, price_series, product_matching, scrape_jobs
+from .models import ProductVariant
+from .models_scraping import CompetitorSite, ScrapedProduct, PriceHistory, PriceHistoryRollup, ScrapeJob, VariantPriceComparison
+from .serializers_scraping import (
+    CompetitorSiteSerializer, ScrapedProductSerializer, PriceHistorySerializer, PriceHistoryRollupSerializer,
+    ScrapeJobSerializer,
+    ProductMatchSerializer, VariantPriceComparisonSerializer
+)
 
 
 class CompetitorSiteViewSet(viewsets.ReadOnlyModelViewSet):
@@ -25,33 +34,98 @@ class CompetitorSiteViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def trigger_scraping(self, request):
         """
-        Trigger scraping for all active sites or specific site
+        Queue scraping for all active sites or specific site (run_scrape_worker executes it)
         POST /api/competitor-sites/trigger_scraping/
         POST /api/competitor-sites/trigger_scraping/ {"site_id": 1}
+
+        A site that already has a queued/running job gets that job back.
+        Progress: GET /api/scrape-jobs/<id>/progress/
         """
         site_id = request.data.get('site_id')
+        if site_id:
+            sites = CompetitorSite.objects.filter(id=site_id)
+            if not sites:
+                return Response({'error': 'Sajt nije pronađen'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            sites = CompetitorSite.objects.filter(is_active=True)
+
+        jobs = []
+        for site in sites:
+            job, created = scrape_jobs.enqueue(site, force=True, user=request.user)
+            jobs.append({**ScrapeJobSerializer(job).data, 'created': created})
 
-        def run_scraping():
-            """Run scraping in background thread"""
-            try:
-                if site_id:
-                    site = CompetitorSite.objects.get(id=site_id)
-                    call_command('scrape_competitors', '--site', site.name.lower(), '--force')
-                else:
-                    call_command('scrape_competitors', '--force')
-            except Exception as e:
-                print(f"Scraping error: {e}")
-
-        # Run scraping in background thread to avoid blocking the request
-        thread = threading.Thread(target=run_scraping)
-        thread.start()
+        already_running = sum(1 for job in jobs if not job['created'])
+        message = 'Scraping je dodat u red. Napredak: /api/scrape-jobs/<id>/progress/'
+        if already_running:
+            message += f' ({already_running} sajt(ova) se već scrape-uje, vraćen je postojeći posao)'
 
         return Response({
-            'status': 'started',
-            'message': 'Scraping započet u pozadini. Osvežite stranicu za 10-30 sekundi da vidite rezultate.'
+            'status': 'queued',
+            'jobs': jobs,
+            'message': message
         }, status=status.HTTP_202_ACCEPTED)
 
 
+class ScrapeJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for queued/running/finished scrape jobs
+
+    Filters:
+    - site: Filter by competitor site ID
+    - status: queued, running, success, failed
+    """
+    queryset = ScrapeJob.objects.select_related('site', 'log').all()
+    serializer_class = ScrapeJobSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['site', 'status']
+
+    # Columns returned by the polling endpoints (no joins)
+    PROGRESS_FIELDS = [
+        'id', 'site', 'status', 'cancel_requested', 'pages_fetched', 'pages_expected',
+        'products_parsed', 'current_category', 'eta_seconds', 'heartbeat_at',
+    ]
+
+    def _progress_rows(self, queryset):
+        rows = list(queryset.values(*self.PROGRESS_FIELDS))
+        for row in rows:
+            expected = row['pages_expected']
+            row['pages_remaining'] = None if expected is None else max(expected - row['pages_fetched'], 0)
+        return rows
+
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """
+        Lightweight progress for polling
+        GET /api/scrape-jobs/<id>/progress/
+        """
+        rows = self._progress_rows(ScrapeJob.objects.filter(pk=pk))
+        if not rows:
+            return Response({'error': 'Posao nije pronađen'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(rows[0])
+
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        """
+        Queued and running jobs (check before starting a new scrape)
+        GET /api/scrape-jobs/active/
+        """
+        queryset = ScrapeJob.objects.filter(status__in=ScrapeJob.ACTIVE_STATUSES).order_by('created_at')
+        return Response(self._progress_rows(queryset))
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Cancel a queued job, or stop a running one before its next page fetch
+        POST /api/scrape-jobs/<id>/cancel/
+        """
+        job = self.get_object()
+        if not scrape_jobs.request_cancel(job):
+            return Response({'error': 'Posao je već završen'}, status=status.HTTP_409_CONFLICT)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
 class ScrapedProductViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for scraped products
@@ -68,7 +142,7 @@ class ScrapedProductViewSet(viewsets.ReadOnlyModelViewSet):
     Ordering:
     - current_price, last_seen_at, discount_percentage
     """
-    queryset = ScrapedProduct.objects.select_related('site').all()
+    queryset = ScrapedProduct.objects.select_related('site', 'match').all()
     serializer_class = ScrapedProductSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -86,12 +160,150 @@ class ScrapedProductViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'])
     def price_drops(self, request):
-        """Get products with recent price drops"""
-        # This would require more complex logic comparing with price history
-        # For now, return products on sale
-        products = self.queryset.filter(on_sale=True, is_active=True).order_by('-last_seen_at')[:20]
-        serializer = self.get_serializer(products, many=True)
-        return Response(serializer.data)
+        """
+        Products whose latest price is lower than the previous one, biggest drop first
+        GET /api/scraped-products/price_drops/?min_percent=10&site=2&days=7&limit=20
+
+        - min_percent: minimum drop in % (default 0)
+        - site: competitor site ID
+        - days: drops recorded in the last N days (default PRICE_DROP_DEFAULT_DAYS)
+        - limit: max results (default 20, at most PRICE_DROP_MAX_RESULTS)
+
+        Cached until the next scrape completes (shop.price_drops).
+        """
+        try:
+            min_percent = float(request.query_params.get('min_percent', 0))
+            site_id = request.query_params.get('site')
+            site_id = int(site_id) if site_id else None
+            days = request.query_params.get('days')
+            days = int(days) if days else None
+            limit = min(int(request.query_params.get('limit', 20)), settings.PRICE_DROP_MAX_RESULTS)
+        except ValueError:
+            return Response(
+                {'error': 'min_percent, site, days i limit moraju biti brojevi'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        drops = price_drops.find_price_drops(min_percent=min_percent, site_id=site_id, days=days)[:max(limit, 0)]
+        products = self.queryset.in_bulk([drop['product_id'] for drop in drops])
+        results = []
+        for drop in drops:
+            product = products.get(drop['product_id'])
+            if product is None:
+                continue
+            results.append({
+                **self.get_serializer(product).data,
+                'previous_price': str(drop['previous_price']),
+                'drop_amount': str(drop['drop_amount']),
+                'drop_percent': drop['drop_percent'],
+                'dropped_at': drop['dropped_at'],
+            })
+        return Response(results)
+
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Downsampled price series of several products for charts
+        GET /api/scraped-products/series/?ids=1,2,3&start=2025-01-01T00:00:00Z&end=...&points=300&method=minmax
+
+        - ids: scraped product IDs (at most PRICE_SERIES_MAX_PRODUCTS)
+        - start/end: ISO datetimes (default: last 365 days until now)
+        - points: points per series (default 300, 3-PRICE_SERIES_MAX_POINTS)
+        - method: lttb (default) or minmax
+
+        Each series: {"product", "name", "site_name", "t": [epoch ms], "price": [...], "raw_points"}
+        """
+        try:
+            product_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+            points = int(request.query_params.get('points', 300))
+        except ValueError:
+            return Response({'error': 'ids i points moraju biti brojevi'}, status=status.HTTP_400_BAD_REQUEST)
+        if not price_series.MIN_POINTS <= points <= settings.PRICE_SERIES_MAX_POINTS:
+            return Response(
+                {'error': f'points mora biti između {price_series.MIN_POINTS} i {settings.PRICE_SERIES_MAX_POINTS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not product_ids or len(product_ids) > settings.PRICE_SERIES_MAX_PRODUCTS:
+            return Response(
+                {'error': f'Potrebno je 1-{settings.PRICE_SERIES_MAX_PRODUCTS} proizvoda (ids)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        method = request.query_params.get('method', price_series.METHOD_LTTB)
+        if method not in price_series.METHODS:
+            return Response(
+                {'error': f'method mora biti jedan od: {", ".join(price_series.METHODS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        end = timezone.now()
+        start = end - timedelta(days=365)
+        for name in ('start', 'end'):
+            value = request.query_params.get(name)
+            if not value:
+                continue
+            parsed = parse_datetime(value)
+            if parsed is None:
+                return Response({'error': f'{name} nije ispravan datum'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            if name == 'start':
+                start = parsed
+            else:
+                end = parsed
+        if start >= end:
+            return Response({'error': 'start mora biti pre end'}, status=status.HTTP_400_BAD_REQUEST)
+
+        products = ScrapedProduct.objects.filter(id__in=product_ids).select_related('site').only('id', 'name', 'site__name')
+        products = {product.id: product for product in products}
+        series_points = price_series.load_points(list(products), start, end)
+
+        series = []
+        for product_id in product_ids:
+            product = products.get(product_id)
+            if product is None:
+                continue
+            series.append({
+                'product': product_id,
+                'name': product.name,
+                'site_name': product.site.name,
+                **price_series.downsample(series_points[product_id], end, points, method),
+            })
+        return Response({'start': start, 'end': end, 'method': method, 'points': points, 'series': series})
+
+    @action(detail=True, methods=['post', 'delete'])
+    def match(self, request, pk=None):
+        """
+        Manual override of the match with our catalog
+        POST /api/scraped-products/<id>/match/ {"variant_id": 5}
+        POST /api/scraped-products/<id>/match/ {"product_id": 3}   (product without variants)
+        POST /api/scraped-products/<id>/match/ {"reject": true}    (no counterpart in our catalog)
+        DELETE /api/scraped-products/<id>/match/                   (back to automatic matching)
+        """
+        scraped = self.get_object()
+        previous_variant = getattr(getattr(scraped, 'match', None), 'variant_id', None)
+
+        if request.method == 'DELETE':
+            match = product_matching.clear_manual_match(scraped)
+            price_comparison.refresh({previous_variant, match and match.variant_id} - {None})
+            return Response(ProductMatchSerializer(match).data if match else None)
+
+        variant_id = request.data.get('variant_id')
+        product_id = request.data.get('product_id')
+        if request.data.get('reject'):
+            variant_id = product_id = None
+        elif not variant_id and not product_id:
+            return Response(
+                {'error': 'Potrebno je variant_id, product_id ili reject'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            match = product_matching.set_manual_match(scraped, product_id=product_id, variant_id=variant_id)
+        except (ProductVariant.DoesNotExist, IntegrityError, ValueError):
+            return Response({'error': 'Proizvod ili varijanta nije pronađena'}, status=status.HTTP_400_BAD_REQUEST)
+        price_comparison.refresh({previous_variant, match.variant_id} - {None})
+        return Response(ProductMatchSerializer(match).data)
 
     @action(detail=True, methods=['get'])
     def price_history(self, request, pk=None):
@@ -100,3 +312,46 @@ class ScrapedProductViewSet(viewsets.ReadOnlyModelViewSet):
         history = PriceHistory.objects.filter(product=product).order_by('-recorded_at')[:30]
         serializer = PriceHistorySerializer(history, many=True)
         return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def price_rollups(self, request, pk=None):
+        """
+        Daily/weekly summaries of history older than PRICE_HISTORY_RAW_DAYS
+        GET /api/scraped-products/<id>/price_rollups/?period=day
+        """
+        product = self.get_object()
+        period = request.query_params.get('period', settings.PRICE_HISTORY_ROLLUP_PERIOD)
+        rollups = PriceHistoryRollup.objects.filter(product=product, period=period).order_by('-period_start')
+        serializer = PriceHistoryRollupSerializer(rollups, many=True)
+        return Response(serializer.data)
+
+
+class VariantPriceComparisonViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for the materialized competitor price comparison per variant
+    (refreshed after every scrape run)
+
+    Filters:
+    - price_position: cheapest, below_median, above_median, most_expensive
+    - cheapest_site: Filter by competitor site ID
+    - variant__product: Filter by our product ID
+
+    Ordering:
+    - price_index, competitor_count, min_price, updated_at
+    """
+    queryset = VariantPriceComparison.objects.select_related('variant__product', 'cheapest_site').all()
+    serializer_class = VariantPriceComparisonSerializer
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['price_position', 'cheapest_site', 'variant__product']
+    ordering_fields = ['price_index', 'competitor_count', 'min_price', 'updated_at']
+    ordering = ['-price_index']
+    lookup_field = 'variant'
+
+    @action(detail=False, methods=['post'])
+    def refresh(self, request):
+        """
+        Rebuild the table now (normally done at the end of every scrape)
+        POST /api/price-comparisons/refresh/
+        """
+        return Response(price_comparison.refresh())